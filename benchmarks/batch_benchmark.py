@@ -0,0 +1,64 @@
+"""
+Measures the throughput of the variational search loop in iterations per second, for the full re-evaluation and
+incremental walks and for the batched walk at several batch sizes, along with the energy each one reaches in the
+same number of iterations, and in the same wall time, running as many iterations as its throughput allows.
+
+Run from the repository root with: python -m benchmarks.batch_benchmark
+"""
+import random
+import time
+
+import numpy as np
+
+import variational_principle.variation_method as vm
+import variational_principle.potential_handling.potential as pot
+from benchmarks.common import print_table
+
+# The grids to benchmark, as (D, N).
+grids = [(1, 100), (2, 30)]
+batch_sizes = (1, 16, 128)
+num_iterations = 10 ** 4
+# The wall time each walk gets for the comparison of the energies at equal time, in seconds.
+time_budget = 2.0
+start, stop = -10, 10
+
+
+def _grid(D: int, N: int) -> np.ndarray:
+    x = np.linspace(start, stop, N)
+    return np.array(np.meshgrid(*([x] * D), indexing="ij"))
+
+
+def _walk(r, V, dr, D, N, num_iterations, incremental, batch_size) -> (float, float):
+    """
+    The energy of the ground state the walk reaches in the number of iterations, and the seconds it took.
+    """
+    random.seed("THE-VARIATIONAL-PRINCIPLE")
+    t1 = time.perf_counter()
+    psi, E = vm.nth_state(r, V, dr, D, N, num_iterations, np.zeros((1, N ** D)), 1, incremental, "grid",
+                          batch_size=batch_size)
+    return E, time.perf_counter() - t1
+
+
+def main():
+    rows = []
+    for D, N in grids:
+        r = _grid(D, N)
+        V = pot.potential(r, "harmonic_oscillator")
+        dr = (stop - start) / N
+
+        modes = [("full", False, 1), ("incremental", True, 1)]
+        modes += [("batched", True, batch_size) for batch_size in batch_sizes if batch_size > 1]
+        for name, incremental, batch_size in modes:
+            E, seconds = _walk(r, V, dr, D, N, num_iterations, incremental, batch_size)
+            rate = num_iterations / seconds
+            # as many iterations as the walk runs in the time budget, at the throughput it just measured.
+            timed_E, _ = _walk(r, V, dr, D, N, int(rate * time_budget), incremental, batch_size)
+            rows.append([D, N, name, batch_size, "{:.0f}".format(rate), "{:.6f}".format(E),
+                         "{:.6f}".format(timed_E)])
+
+    print_table(["D", "N", "walk", "B", "iterations/s", "energy",
+                 "energy in {:g} s".format(time_budget)], rows)
+
+
+if __name__ == "__main__":
+    main()
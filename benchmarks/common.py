@@ -0,0 +1,92 @@
+import heapq
+import time
+import tracemalloc
+
+import numpy as np
+
+import variational_principle.quantum_operators as qo
+
+
+def measure(function, *args, **kwargs):
+    """
+    Times a call to the given function and records the peak memory it allocated.
+    :param function: The function to call.
+    :return: The result of the call, the wall time in seconds and the peak allocated memory in bytes.
+    """
+    tracemalloc.start()
+    t1 = time.perf_counter()
+    try:
+        result = function(*args, **kwargs)
+        t2 = time.perf_counter()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, t2 - t1, peak
+
+
+def megabytes(num_bytes) -> str:
+    return "{:.1f} MB".format(num_bytes / 2 ** 20)
+
+
+def print_table(headers, rows):
+    """
+    Prints the rows of results as an aligned plain text table.
+    :param headers: The names of the columns.
+    :param rows: The rows of values for each column.
+    """
+    rows = [[str(value) for value in row] for row in rows]
+    widths = [max(len(str(h)), *(len(row[i]) for row in rows)) if rows else len(str(h))
+              for i, h in enumerate(headers)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(value.ljust(w) for value, w in zip(row, widths)))
+
+
+def _lowest_sums(levels: list, D: int, num_states: int) -> list:
+    """
+    The lowest sums of one level along each of D axes, for the energies of a separable system.
+    """
+    first = (0,) * D
+    candidates = [(D * levels[0], first)]
+    seen = {first}
+    sums = []
+    while candidates and len(sums) < num_states:
+        E, indices = heapq.heappop(candidates)
+        sums.append(E)
+        for ax in range(D):
+            if indices[ax] + 1 < len(levels):
+                next_indices = indices[:ax] + (indices[ax] + 1,) + indices[ax + 1:]
+                if next_indices not in seen:
+                    seen.add(next_indices)
+                    heapq.heappush(candidates, (sum(levels[i] for i in next_indices), next_indices))
+    return sums
+
+
+def harmonic_oscillator_energies(D: int, num_states: int) -> list:
+    """
+    The exact lowest energies of the harmonic oscillator V = x^2 / 2 along each axis, E_n = (n + 1/2) sqrt(2 K)
+    along each axis, where K = hbar^2 / 2m is the factor of the Laplacian in the Hamiltonian.
+    :param D: The number of axes of the system.
+    :param num_states: The number of energies.
+    :return: The list of energies in ascending order.
+    """
+    omega = np.sqrt(-2 * qo.factor)
+    return _lowest_sums([(n + 0.5) * omega for n in range(num_states)], D, num_states)
+
+
+def infinite_square_well_energies(D: int, N: int, dr: float, num_states: int) -> list:
+    """
+    The exact lowest energies of the infinite square well potential module along each axis, E_n = K (n pi / L)^2,
+    where L is the distance between the infinite points either side of the well, as seen by the Laplacian.
+    :param D: The number of axes of the system.
+    :param N: The size of each axis.
+    :param dr: The grid spacing in the system.
+    :param num_states: The number of energies.
+    :return: The list of energies in ascending order.
+    """
+    # the same width of well as square_well._well_profile.
+    third = N // 3
+    width = third + int(abs(third - N / 3) * 3)
+    L = (width + 1) * dr
+    return _lowest_sums([-qo.factor * (n * np.pi / L) ** 2 for n in range(1, num_states + 1)], D, num_states)
@@ -0,0 +1,76 @@
+"""
+Compares the cost of reading and setting config attributes by re-reading 'data.json' on every access, as the
+config did before it held a snapshot, against the in-memory snapshot, with and without reloading on changes of
+the file's modified time, and the locked CachedJsonData.
+
+Runs against a temporary copy of the config, so 'data/data.json' isn't changed.
+
+Run from the repository root with: python -m benchmarks.config_benchmark
+"""
+import os
+import shutil
+import tempfile
+import time
+
+import variational_principle.data_handling.json_data as json_data
+from variational_principle.data_handling.cached_json_data import CachedJsonData
+from benchmarks.common import print_table
+
+# The number of attribute reads to time.
+num_reads = 10000
+# The number of attributes to set in each batch of changes.
+num_sets = 10
+
+
+def _time(function, repeats: int) -> float:
+    t1 = time.perf_counter()
+    for i in range(repeats):
+        function()
+    return (time.perf_counter() - t1) / repeats
+
+
+def _set_each_rewriting(filename):
+    # every set reads the file, then writes it back.
+    for i in range(num_sets):
+        data = json_data.read_data(filename)
+        data["num_states"] = i
+        json_data.write_json(data, filename)
+
+
+def _set_in_transaction(config):
+    with config.transaction():
+        for i in range(num_sets):
+            config.num_states = i
+
+
+def main():
+    source = os.path.join(os.path.dirname(json_data.__file__), os.pardir, "data")
+    cwd = os.getcwd()
+    directory = tempfile.mkdtemp()
+    try:
+        shutil.copytree(source, os.path.join(directory, "data"), ignore=shutil.ignore_patterns("plots"))
+        os.chdir(directory)
+        filename = "data/data.json"
+
+        snapshot = json_data.JsonData(filename)
+        reloading = json_data.JsonData(filename, auto_reload=True)
+        cached = CachedJsonData(filename)
+
+        rows = [["read, re-parsing the file", "{:.2f} us".format(
+                    1e6 * _time(lambda: json_data.read_data(filename).get("label"), num_reads // 10))],
+                ["read, snapshot", "{:.2f} us".format(1e6 * _time(lambda: snapshot.label, num_reads))],
+                ["read, snapshot reloaded on mtime", "{:.2f} us".format(
+                    1e6 * _time(lambda: reloading.label, num_reads))],
+                ["read, locked CachedJsonData", "{:.2f} us".format(1e6 * _time(lambda: cached.label, num_reads))],
+                ["{} sets, each rewriting the file".format(num_sets), "{:.2f} ms".format(
+                    1e3 * _time(lambda: _set_each_rewriting(filename), 10))],
+                ["{} sets, in one transaction".format(num_sets), "{:.2f} ms".format(
+                    1e3 * _time(lambda: _set_in_transaction(snapshot), 10))]]
+        print_table(["access", "time per access"], rows)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
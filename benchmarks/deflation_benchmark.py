@@ -0,0 +1,55 @@
+"""
+Compares the memory and time of the dense null space basis against the implicit projected basis, for growing
+2D and 3D grids. The dense basis is only attempted when its predicted size fits in the memory limit, the
+projected basis runs for every grid.
+
+Run from the repository root with: python -m benchmarks.deflation_benchmark
+"""
+import numpy as np
+
+import variational_principle.deflation as dfl
+from benchmarks.common import measure, megabytes, print_table
+
+# The grids to benchmark, as (D, N).
+grids = [(1, 1000), (2, 30), (2, 50), (2, 100), (2, 200), (3, 20), (3, 30), (3, 50)]
+# The number of previous states to project out.
+num_prev_states = 5
+# The number of directions to sample from each basis.
+num_samples = 1000
+# Don't attempt dense null spaces predicted to need more memory than this.
+memory_limit = 2 * 2 ** 30
+
+
+def _sample(basis):
+    rng = np.random.default_rng(0)
+    for index in rng.integers(len(basis), size=num_samples):
+        basis[index]
+    return basis
+
+
+def main():
+    rows = []
+    for D, N in grids:
+        size = N ** D
+        rng = np.random.default_rng(1)
+        prev_psi_linear = rng.standard_normal((num_prev_states, size))
+
+        # null_space returns an (N^D - k) x N^D matrix, and the SVD needs an N^D x N^D one.
+        dense_bytes = 8 * size * size
+        if dense_bytes <= memory_limit:
+            _, dense_time, dense_peak = measure(lambda: _sample(dfl.NullSpaceBasis(prev_psi_linear)))
+            dense = "{:.3f} s / {}".format(dense_time, megabytes(dense_peak))
+        else:
+            dense = "skipped, needs ~{}".format(megabytes(dense_bytes))
+
+        for generator in ("grid", "bump"):
+            _, projected_time, projected_peak = measure(
+                lambda: _sample(dfl.ProjectedBasis(prev_psi_linear, [N] * D, generator)))
+            rows.append([D, N, size, generator, dense, "{:.3f} s / {}".format(projected_time,
+                                                                             megabytes(projected_peak))])
+
+    print_table(["D", "N", "N^D", "generator", "null_space", "projected"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Compares one iteration of the random walk, a change to psi, normalising it and evaluating its energy, with the
+trapz based normalise and energy the walk used before, against the fused EnergyKernel, which changes psi in place
+and integrates with dot products into preallocated buffers. Reports the time and the memory allocated per
+iteration, and the largest difference of the energies from the trapezoidal rule.
+
+Run from the repository root with: python -m benchmarks.kernel_benchmark
+"""
+import time
+import tracemalloc
+
+import numpy as np
+import scipy.integrate as intg
+
+import variational_principle.quantum_operators as qo
+import variational_principle.calculus.laplacian as lap
+import variational_principle.potential_handling.potential as pot
+from benchmarks.common import print_table
+
+# The grids to compare on, as (D, N).
+grids = [(1, 1000), (2, 100), (3, 40)]
+num_iterations = 1000
+start, stop = -10, 10
+
+
+def _trapz_normalise(psi, dr):
+    # normalise as it was before, integrating psi^2 with trapz.
+    return psi / np.sqrt(intg.trapz(psi * psi, dx=dr))
+
+
+def _trapz_energy(psi, V, dr, laplacian):
+    # energy as it was before, integrating psi * H psi with trapz.
+    return intg.trapz(psi * (qo.factor * (laplacian @ psi) + V * psi), dx=dr)
+
+
+def _trapz_iteration(psi, V, dr, laplacian, basis_vector, change):
+    psi = psi + basis_vector * change
+    psi = _trapz_normalise(psi, dr)
+    return psi, _trapz_energy(psi, V, dr, laplacian)
+
+
+def _kernel_iteration(psi, kernel, basis_vector, change, buffer):
+    np.multiply(basis_vector, change, out=buffer)
+    psi += buffer
+    kernel.normalise(psi)
+    return psi, kernel.energy(psi)
+
+
+def _per_iteration(iteration) -> tuple:
+    """
+    The mean time of an iteration, and the memory allocated by one iteration, in bytes.
+    """
+    iteration()
+    t1 = time.perf_counter()
+    for i in range(num_iterations):
+        iteration()
+    seconds = (time.perf_counter() - t1) / num_iterations
+
+    tracemalloc.start()
+    try:
+        iteration()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    rows = []
+    for D, N in grids:
+        x = np.linspace(start, stop, N)
+        r = np.array(np.meshgrid(*([x] * D), indexing="ij"))
+        dr = (stop - start) / N
+        V = pot.potential(r, "harmonic_oscillator").reshape(N ** D)
+        rng = np.random.default_rng(0)
+        basis_vector = np.zeros(N ** D)
+        basis_vector[N ** D // 2] = 1
+
+        for matrix_free in (False, True):
+            laplacian = lap.generate_laplacian(D, N, dr, matrix_free=matrix_free)
+            psi = qo.normalise(rng.standard_normal(N ** D), dr)
+            kernel = qo.EnergyKernel(V, dr, laplacian)
+            buffer = np.empty_like(psi)
+            kernel_psi = psi.copy()
+
+            trapz_seconds, trapz_peak = _per_iteration(
+                lambda: _trapz_iteration(psi, V, dr, laplacian, basis_vector, 1e-3))
+            kernel_seconds, kernel_peak = _per_iteration(
+                lambda: _kernel_iteration(kernel_psi, kernel, basis_vector, 1e-3, buffer))
+
+            # the energies of the same wavefunctions from both.
+            error = 0
+            for i in range(10):
+                sample = rng.standard_normal(N ** D)
+                E = _trapz_energy(_trapz_normalise(sample, dr), V, dr, laplacian)
+                error = max(error, abs(kernel.energy(kernel.normalise(sample)) - E) / abs(E))
+
+            name = "matrix-free" if matrix_free else "assembled"
+            rows.append([D, N, name, "{:.2f} us".format(1e6 * trapz_seconds), "{:.2f} us".format(1e6 * kernel_seconds),
+                         "{} B".format(trapz_peak), "{} B".format(kernel_peak), "{:.1e}".format(error)])
+
+    print_table(["D", "N", "laplacian", "trapz time", "kernel time", "trapz allocated", "kernel allocated",
+                 "relative difference"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Compares the assembled sparse Laplacian against the matrix-free stencil operator, in the time and peak memory
+taken to build each, and the time taken to apply each to a vector.
+
+Run from the repository root with: python -m benchmarks.laplacian_benchmark
+"""
+import time
+
+import numpy as np
+
+import variational_principle.calculus.laplacian as lap
+from benchmarks.common import measure, megabytes, print_table
+
+# The grids to benchmark, as (D, N).
+grids = [(1, 10000), (2, 100), (2, 400), (3, 50), (3, 100), (3, 200)]
+# The number of times to apply each operator.
+num_applications = 10
+
+
+def _apply(operator, psi):
+    t1 = time.perf_counter()
+    for i in range(num_applications):
+        operator @ psi
+    return (time.perf_counter() - t1) / num_applications
+
+
+def main():
+    rows = []
+    for D, N in grids:
+        dr = 20 / N
+        psi = np.random.default_rng(0).standard_normal(N ** D)
+        for matrix_free in (False, True):
+            operator, build_time, build_peak = measure(lap.generate_laplacian, D, N, dr, matrix_free=matrix_free)
+            _, _, apply_peak = measure(operator.__matmul__, psi)
+            apply_time = _apply(operator, psi)
+            rows.append([D, N, "matrix-free" if matrix_free else "assembled", "{:.4f} s".format(build_time),
+                         megabytes(build_peak), "{:.5f} s".format(apply_time), megabytes(apply_peak)])
+
+    print_table(["D", "N", "laplacian", "build time", "build peak", "apply time", "apply peak"], rows)
+
+
+if __name__ == "__main__":
+    main()
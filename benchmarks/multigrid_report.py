@@ -0,0 +1,54 @@
+"""
+Reports the wall time and the final energy error of the multigrid warm start against the single level run, for
+the harmonic oscillator, whose energies are known exactly: E_n = (n + 1/2) sqrt(2 K) along each axis, with
+K = hbar^2 / 2m the factor of the Laplacian in the Hamiltonian.
+
+Run from the repository root with: python -m benchmarks.multigrid_report
+"""
+import random
+import time
+
+import numpy as np
+
+import variational_principle.variation_method as vm
+import variational_principle.potential_handling.potential as pot
+from benchmarks.common import harmonic_oscillator_energies, print_table
+
+# The grids to report on, as (D, N).
+grids = [(1, 64), (1, 200), (2, 40)]
+levels = (1, 2, 3)
+num_iterations = 10 ** 5
+num_states = 3
+start, stop = -10, 10
+
+
+def main():
+    rows = []
+    for D, N in grids:
+        x = np.linspace(start, stop, N)
+        r = np.array(np.meshgrid(*([x] * D), indexing="ij"))
+        dr = (stop - start) / N
+        exact = harmonic_oscillator_energies(D, num_states)
+
+        for num_levels in levels:
+            settings = {"solver": "variational", "num_iterations": num_iterations, "incremental": True,
+                        "basis": "grid", "matrix_free": False, "batch_size": 1, "multigrid_levels": num_levels,
+                        "tolerance": 0, "convergence_window": 1000, "dtype": "float64",
+                        "stencil_order": 2, "boundary": "dirichlet"}
+            random.seed("THE-VARIATIONAL-PRINCIPLE")
+            t1 = time.perf_counter()
+            if num_levels > 1:
+                all_psi, all_E = vm._solve_multigrid(r, dr, D, N, num_states, "harmonic_oscillator", settings)
+            else:
+                V = pot.potential(r, "harmonic_oscillator")
+                all_psi, all_E = vm._solve_states(r, V, dr, D, N, num_states, settings)
+            seconds = time.perf_counter() - t1
+
+            errors = ["{:.2e}".format(abs(E - E_exact)) for E, E_exact in zip(all_E, exact)]
+            rows.append([D, N, num_levels, "{:.2f} s".format(seconds)] + errors)
+
+    print_table(["D", "N", "levels", "wall time"] + ["|E_{} - exact|".format(n) for n in range(num_states)], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Times building each potential on open grids of D = 1..4 axes and N up to 512 points per axis, along with the
+peak memory allocated. Grids with more than max_points points in total are skipped.
+
+Run from the repository root with: python -m benchmarks.potentials_benchmark
+"""
+import warnings
+
+import numpy as np
+
+import variational_principle.potential_handling.potential as pot
+from benchmarks.common import measure, megabytes, print_table
+
+dimensions = (1, 2, 3, 4)
+sizes = (32, 64, 128, 256, 512)
+# The largest grid to build, in total number of points.
+max_points = 2 ** 27
+
+
+def open_axes(D: int, N: int, start=-10, stop=10) -> list:
+    x = np.linspace(start, stop, N)
+    grid = []
+    for i in range(D):
+        shape = [1] * D
+        shape[i] = N
+        grid.append(x.reshape(shape))
+    return grid
+
+
+def main():
+    rows = []
+    for name in sorted(pot.list_potentials()):
+        for D in dimensions:
+            for N in sizes:
+                if N ** D > max_points:
+                    continue
+                grid = open_axes(D, N)
+                with warnings.catch_warnings():
+                    # the inverse potentials divide by 0 at the origin.
+                    warnings.simplefilter("ignore", RuntimeWarning)
+                    _, seconds, peak = measure(pot.potential_from_grid, grid, name)
+                rows.append([name, D, N, "{:.4f} s".format(seconds), megabytes(peak),
+                             megabytes(8 * N ** D)])
+
+    print_table(["potential", "D", "N", "time", "peak", "grid size"], rows)
+
+
+if __name__ == "__main__":
+    main()
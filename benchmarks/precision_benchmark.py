@@ -0,0 +1,82 @@
+"""
+Compares storing the system in single precision against double precision, for the harmonic oscillator, whose
+energies are known exactly. For each precision it reports the memory of the grid r, the throughput of products
+with the Laplacian, and the wall time and energy error of the variational method, whose energy and norm are
+always accumulated in double precision.
+
+Run from the repository root with: python -m benchmarks.precision_benchmark
+"""
+import random
+import time
+
+import numpy as np
+
+import variational_principle.variation_method as vm
+import variational_principle.calculus.laplacian as lap
+import variational_principle.potential_handling.potential as pot
+from benchmarks.common import harmonic_oscillator_energies, megabytes, print_table
+
+# The grids to compare the products with the Laplacian on, and the smaller ones to run the variational method on.
+product_grids = [(1, 10 ** 5), (2, 400), (3, 100)]
+variational_grids = [(1, 200), (2, 40)]
+num_products = 100
+num_iterations = 10 ** 4
+num_states = 2
+start, stop = -10, 10
+
+
+def _r(D: int, N: int, dtype: str) -> np.ndarray:
+    x = np.linspace(start, stop, N, dtype=dtype)
+    return np.array(np.meshgrid(*([x] * D), indexing="ij"))
+
+
+def _products():
+    rows = []
+    for D, N in product_grids:
+        dr = (stop - start) / N
+        for matrix_free in (False, True):
+            for dtype in lap.dtypes:
+                laplacian = lap.generate_laplacian(D, N, dr, matrix_free=matrix_free, dtype=dtype)
+                psi = np.random.default_rng(0).standard_normal(N ** D).astype(dtype)
+                laplacian @ psi
+                t1 = time.perf_counter()
+                for i in range(num_products):
+                    laplacian @ psi
+                seconds = (time.perf_counter() - t1) / num_products
+                name = "matrix-free" if matrix_free else "assembled"
+                rows.append([D, N, name, dtype, megabytes(_r(D, N, dtype).nbytes),
+                             "{:.1f} products/s".format(1 / seconds)])
+    print_table(["D", "N", "laplacian", "dtype", "grid r", "throughput"], rows)
+
+
+def _variational():
+    rows = []
+    for D, N in variational_grids:
+        dr = (stop - start) / N
+        exact = harmonic_oscillator_energies(D, num_states)
+        for dtype in lap.dtypes:
+            r = _r(D, N, dtype)
+            V = pot.potential(r, "harmonic_oscillator", dtype)
+            settings = {"solver": "variational", "num_iterations": num_iterations, "incremental": False,
+                        "basis": "grid", "matrix_free": True, "batch_size": 1, "multigrid_levels": 1,
+                        "tolerance": 0, "convergence_window": 1000, "dtype": dtype,
+                        "stencil_order": 2, "boundary": "dirichlet"}
+            random.seed("THE-VARIATIONAL-PRINCIPLE")
+            t1 = time.perf_counter()
+            all_psi, all_E = vm._solve_states(r, V, dr, D, N, num_states, settings)
+            seconds = time.perf_counter() - t1
+
+            errors = ["{:.2e}".format(abs(E - E_exact) / abs(E_exact)) for E, E_exact in zip(all_E, exact)]
+            rows.append([D, N, dtype, "{:.2f} s".format(seconds)] + errors)
+    print_table(["D", "N", "dtype", "wall time"] + ["E_{} relative error".format(n) for n in range(num_states)],
+                rows)
+
+
+def main():
+    _products()
+    print()
+    _variational()
+
+
+if __name__ == "__main__":
+    main()
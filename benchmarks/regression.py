@@ -0,0 +1,208 @@
+"""
+Regression checks of the solvers against exact energies, on grids large enough to take the iterative paths rather
+than the dense diagonalisation of small systems. Prints the result of each check, and exits with a non zero status
+if any of them fail.
+
+Run from the repository root with: python -m benchmarks.regression
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+
+import variational_principle.variation_method as vm
+import variational_principle.band_structure as bs
+import variational_principle.symmetry as sym
+import variational_principle.quantum_operators as qo
+import variational_principle.sparse_solver as ss
+import variational_principle.calculus.laplacian as lap
+import variational_principle.potential_handling.potential as pot
+from variational_principle.data_handling.computation_data import ComputationData
+from benchmarks.common import harmonic_oscillator_energies, print_table
+
+start, stop = -10, 10
+num_states = 3
+
+# The checks to run, in order, each a function returning whether it passed and the details to print.
+checks = []
+
+
+def check(function):
+    checks.append(function)
+    return function
+
+
+def _system(D: int, N: int, potential_name="harmonic_oscillator"):
+    """
+    The grid, the potential as a linear column vector and the grid spacing of a system.
+    """
+    x = np.linspace(start, stop, N)
+    r = np.array(np.meshgrid(*([x] * D), indexing="ij"))
+    V = pot.potential(r, potential_name).reshape(N ** D)
+    return r, V, x[1] - x[0]
+
+
+@contextmanager
+def _computation_data(**overrides):
+    """
+    A ComputationData of an empty config in a temporary directory, so every setting besides the overrides is the
+    default, and the config in the working directory is never read or written.
+    """
+    directory = tempfile.mkdtemp()
+    try:
+        config_path = os.path.join(directory, "data.json")
+        with open(config_path, "w") as config_file:
+            config_file.write("{}")
+        yield ComputationData(filename=config_path, overrides=overrides)
+    finally:
+        shutil.rmtree(directory)
+
+
+def _relative_errors(E: list, exact: list) -> list:
+    return [abs(E_n - E_exact) / abs(E_exact) for E_n, E_exact in zip(E, exact)]
+
+
+def _compare(E: list, exact: list, tolerance: float) -> (bool, str):
+    errors = _relative_errors(E, exact)
+    detail = "E={} exact={} max relative error {:.1e}".format(np.round(E, 4).tolist(), np.round(exact, 4).tolist(),
+                                                                max(errors))
+    return max(errors) <= tolerance, detail
+
+
+@check
+def sparse_solvers_harmonic_oscillator() -> (bool, str):
+    # above the dense limit in both cases, so eigsh uses its shift-invert mode. The tolerances allow for the error
+    # of the discretisation, which is larger on the coarser 2D grid.
+    details = []
+    passed = True
+    for D, N, tolerance in ((1, 1000, 1e-3), (2, 60, 3e-2)):
+        r, V, dr = _system(D, N)
+        H = qo.hamiltonian(V, lap.generate_laplacian(D, N, dr))
+        exact = harmonic_oscillator_energies(D, num_states)
+        for solver in ss.solvers:
+            E, _ = ss.lowest_eigenpairs(H, num_states, solver)
+            ok, detail = _compare(list(E), exact, tolerance)
+            passed = passed and ok
+            details.append("{}D N={} {}: {}".format(D, N, solver, detail))
+    return passed, "; ".join(details)
+
+
+def _rayleigh_quotient(psi: np.ndarray, V: np.ndarray, laplacian, finite: np.ndarray) -> float:
+    """
+    The energy of psi from the Hamiltonian over the finite points, with the same weight for every point.
+    """
+    psi = psi[finite]
+    H = qo.hamiltonian(V[finite], laplacian)
+    return float(np.dot(psi, H @ psi) / np.dot(psi, psi))
+
+
+@check
+def variational_infinite_square_well() -> (bool, str):
+    # the walk's energy has to be the energy of the state it returns, the points next to the walls aren't halved.
+    D, N = 1, 100
+    r, V, dr = _system(D, N, "infinite_square_well")
+    finite = np.isfinite(V)
+    laplacian, _ = lap.get_restricted_laplacian(lap.laplacian_key(D, N, dr), finite)
+    random.seed("THE-VARIATIONAL-PRINCIPLE")
+    psi, E = vm.nth_state(r, V.reshape(N), dr, D, N, 10 ** 4, np.zeros((1, N)), 1)
+    quotient = _rayleigh_quotient(psi.reshape(N), V, laplacian, finite)
+    error = abs(E - quotient) / quotient
+    return error <= 1e-2, "E={:.4f} energy of the returned state {:.4f}, relative difference {:.1e}".format(
+        E, quotient, error)
+
+
+@check
+def adaptive_walk_harmonic_oscillator() -> (bool, str):
+    # the walk may only report convergence once it has reached the energies of the grid, a step that collapsed
+    # once stopped it far above them.
+    D, N = 1, 100
+    r, V, dr = _system(D, N)
+    H = qo.hamiltonian(V, lap.generate_laplacian(D, N, dr))
+    exact, _ = ss.lowest_eigenpairs(H, 2, "eigsh")
+    random.seed("THE-VARIATIONAL-PRINCIPLE")
+    prev_psi = np.zeros((1, N))
+    E, converged = [], []
+    for n in range(len(exact)):
+        stats = []
+        psi, E_n = vm.nth_state(r, V.reshape(N), dr, D, N, 10 ** 5, prev_psi, n + 1, tolerance=1e-6, stats=stats)
+        prev_psi = psi.reshape(1, N) if n == 0 else np.vstack((prev_psi, psi.reshape(N)))
+        E.append(E_n)
+        converged.append(stats[0].converged)
+    passed, detail = _compare(E, list(exact), 1e-3)
+    return passed and all(converged), "{} converged={}".format(detail, converged)
+
+
+@check
+def symmetry_detection() -> (bool, str):
+    # the points of a linspace grid are only mirrored up to round off, which mustn't hide the symmetry, while a grid
+    # that's off centre still breaks it.
+    details = []
+    passed = True
+    for D, N, lower, expected in ((1, 100, start, (0,)), (1, 101, start, (0,)), (2, 60, start, (0, 1)),
+                                  (1, 100, start + 1, ())):
+        x = np.linspace(lower, stop, N)
+        r = np.array(np.meshgrid(*([x] * D), indexing="ij"))
+        axes = sym.symmetric_axes(pot.potential(r, "harmonic_oscillator"), tuple(range(D)))
+        passed = passed and axes == expected
+        details.append("{}D N={} on [{}, {}]: {}".format(D, N, lower, stop, axes))
+    return passed, "; ".join(details)
+
+
+@check
+def symmetry_sectors_variational() -> (bool, str):
+    # the variational method on the half grids of the sectors has to find the states of the full grid, the mirror's
+    # centre at the end of each half grid isn't halved by the trapezoidal rule.
+    D, N = 1, 100
+    r, V, dr = _system(D, N)
+    V = V.reshape(N)
+    with _computation_data(solver="variational", num_iterations=5, num_workers=1) as data:
+        settings = vm._solver_settings(data)
+
+    random.seed("THE-VARIATIONAL-PRINCIPLE")
+    _, full_E = vm._solve_states(r, V, dr, D, N, num_states, settings)
+    _, sector_E = vm._solve_symmetric(r, V, dr, D, N, num_states, settings, (0,))
+    return _compare(sector_E, full_E, 1e-2)
+
+
+@check
+def free_particle_band_structure() -> (bool, str):
+    # the bands of an empty periodic cell are the free particle's energies at the wavevectors k + 2 pi m / L, large
+    # enough a cell for eigsh to shift and invert.
+    details = []
+    passed = True
+    for N in (100, 800):
+        for solver in ss.solvers:
+            with _computation_data(boundary="periodic", solver=solver, num_samples=N, num_dimensions=1,
+                                   potential_name="free_particle") as data:
+                length = data.stop - data.start
+                k_points = [(0.0,), (0.5 * np.pi / length,), (np.pi / length,)]
+                k_points, energies = bs.band_structure(data, k_points, num_states, num_workers=1)
+            for k, E in zip(k_points, energies):
+                wavevectors = sorted(abs(k[0] + 2 * np.pi * m / length) for m in range(-num_states, num_states + 1))
+                exact = [-qo.factor * q ** 2 for q in wavevectors[:num_states]]
+                # the lowest band is 0 at k=0, so the errors are relative to the highest band.
+                error = max(abs(E_n - E_exact) for E_n, E_exact in zip(E, exact)) / exact[-1]
+                passed = passed and error <= 1e-2
+                details.append("N={} {} k={:.3f}: E={} exact={}".format(N, solver, k[0], np.round(E, 4).tolist(),
+                                                                       np.round(exact, 4).tolist()))
+    return passed, "; ".join(details)
+
+
+def main():
+    rows = []
+    failed = 0
+    for function in checks:
+        passed, detail = function()
+        failed += not passed
+        rows.append([function.__name__, "pass" if passed else "FAIL", detail])
+    print_table(["check", "result", "details"], rows)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Finds the smallest grid that reaches a target relative error in the lowest energies of the harmonic oscillator for
+each order of the finite difference stencil, and the time taken to solve for the states on that grid, to show the
+speed-up of the higher orders over the second order stencil.
+
+The energies are found with the sparse eigensolver, so they only carry the error of the discretisation and not of
+the random walk. The grid spacing is taken from the grid points themselves, so that only the error of the stencil
+is measured.
+
+Run from the repository root with: python -m benchmarks.stencil_convergence [--target 1e-4]
+"""
+import argparse
+import time
+
+import numpy as np
+
+import variational_principle.quantum_operators as qo
+import variational_principle.sparse_solver as ss
+import variational_principle.calculus.laplacian as lap
+import variational_principle.potential_handling.potential as pot
+from benchmarks.common import harmonic_oscillator_energies, print_table
+
+dimensions = (1, 2)
+# The sizes of each axis to search, smallest first, and the largest to search in each number of dimensions.
+sizes = range(10, 1001, 10)
+max_points = 250000
+num_states = 3
+start, stop = -10, 10
+
+
+def _solve(D: int, N: int, order: int) -> (list, float):
+    """
+    The lowest energies of the harmonic oscillator on the grid, and the time taken to build and solve the system.
+    """
+    x = np.linspace(start, stop, N)
+    r = np.array(np.meshgrid(*([x] * D), indexing="ij"))
+    dr = x[1] - x[0]
+    V = pot.potential(r, "harmonic_oscillator").reshape(N ** D)
+
+    t1 = time.perf_counter()
+    laplacian = lap.generate_laplacian(D, N, dr, order)
+    H = qo.hamiltonian(V, laplacian)
+    E, _ = ss.lowest_eigenpairs(H, num_states)
+    return list(E), time.perf_counter() - t1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the convergence of each order of stencil.")
+    parser.add_argument("--target", type=float, default=1e-4, help="the relative energy error to reach.")
+    arguments = parser.parse_args()
+
+    rows = []
+    for D in dimensions:
+        exact = harmonic_oscillator_energies(D, num_states)
+        base_seconds = None
+        for order in lap.stencil_orders:
+            for N in sizes:
+                if N ** D > max_points:
+                    rows.append([D, order, "> {}".format(N - sizes.step), "", "", ""])
+                    break
+                E, seconds = _solve(D, N, order)
+                error = max(abs(E_n - E_exact) / E_exact for E_n, E_exact in zip(E, exact))
+                if error <= arguments.target:
+                    if order == 2:
+                        base_seconds = seconds
+                    speed_up = "{:.1f}x".format(base_seconds / seconds) if base_seconds is not None else ""
+                    rows.append([D, order, N, "{:.2e}".format(error), "{:.4f} s".format(seconds), speed_up])
+                    break
+            else:
+                rows.append([D, order, "> {}".format(sizes[-1]), "", "", ""])
+
+    print_table(["D", "order", "smallest N", "relative error", "solve time", "speed-up"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+A reproducible benchmark suite of the core of the method, to compare changes to variation_method,
+quantum_operators and calculus.laplacian. It times, and records the peak memory of:
+
+- generate_laplacian, normalise and energy, for D = 1..3 and N from 50 to 400,
+- each potential builder on the same grids,
+- nth_state and compute for each solver,
+
+and for compute it reports the energy error against the exact energies of the harmonic oscillator and the
+infinite square well, with the digits of accuracy gained per CPU second, to compare the solvers on accuracy
+per second. Every run is seeded, so the results only change with the code.
+
+Run from the repository root with: python -m benchmarks.suite [--quick] [--json results.json]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+import variational_principle.variation_method as vm
+import variational_principle.quantum_operators as qo
+import variational_principle.calculus.laplacian as lap
+import variational_principle.potential_handling.potential as pot
+from variational_principle.data_handling.computation_data import ComputationData
+from benchmarks.common import measure, megabytes, print_table, harmonic_oscillator_energies, \
+    infinite_square_well_energies
+
+dimensions = (1, 2, 3)
+sizes = (50, 100, 200, 400)
+start, stop = -10, 10
+# The largest grids, in points, to benchmark the operators and potentials on, in full and quick runs.
+max_points = {False: 2 * 10 ** 6, True: 10 ** 5}
+# The largest grids, in points, to run the variational method on.
+max_variational_points = {False: 2500, True: 400}
+# The log10 of the number of iterations of the variational method.
+num_iterations = 4
+num_states = 3
+# The solvers to compare, with the largest grid in points to run each on.
+solvers = {"variational": max_variational_points, "eigsh": max_points, "lobpcg": max_points}
+# The potentials with exact energies to compare against.
+exact_potentials = ("harmonic_oscillator", "infinite_square_well")
+
+
+def _grids(limit: int):
+    for D in dimensions:
+        for N in sizes:
+            if N ** D <= limit:
+                yield D, N
+
+
+def _r(D: int, N: int) -> np.ndarray:
+    x = np.linspace(start, stop, N)
+    return np.array(np.meshgrid(*([x] * D), indexing="ij"))
+
+
+def _record(results: list, section: str, name: str, D: int, N: int, seconds: float, peak: int, **extra):
+    results.append(dict(section=section, name=name, D=D, N=N, seconds=seconds, peak_bytes=peak, **extra))
+
+
+def _operators(results: list, quick: bool):
+    for D, N in _grids(max_points[quick]):
+        dr = (stop - start) / N
+        for matrix_free in (False, True):
+            laplacian, seconds, peak = measure(lap.generate_laplacian, D, N, dr, matrix_free=matrix_free)
+            name = "generate_laplacian" + (" matrix-free" if matrix_free else "")
+            _record(results, "operators", name, D, N, seconds, peak)
+
+        laplacian = lap.get_laplacian(D, N, dr)
+        psi = np.random.default_rng(0).standard_normal(N ** D)
+        V = pot.potential(_r(D, N), "harmonic_oscillator").reshape(N ** D)
+        _, seconds, peak = measure(qo.normalise, psi, dr)
+        _record(results, "operators", "normalise", D, N, seconds, peak)
+        _, seconds, peak = measure(qo.energy, psi, V, dr, laplacian)
+        _record(results, "operators", "energy", D, N, seconds, peak)
+
+
+def _potentials(results: list, quick: bool):
+    for D, N in _grids(max_points[quick]):
+        grid = pot.open_grid(_r(D, N))
+        for name in sorted(pot.list_potentials()):
+            _, seconds, peak = measure(pot.potential_from_grid, grid, name)
+            _record(results, "potentials", name, D, N, seconds, peak)
+
+
+def _nth_state(results: list, quick: bool):
+    for D, N in _grids(max_variational_points[quick]):
+        r = _r(D, N)
+        V = pot.potential(r, "harmonic_oscillator")
+        dr = (stop - start) / N
+        random.seed("THE-VARIATIONAL-PRINCIPLE")
+        (psi, E), seconds, peak = measure(vm.nth_state, r, V, dr, D, N, 10 ** num_iterations,
+                                          np.zeros((1, N ** D)), 1, True, "grid")
+        _record(results, "nth_state", "incremental grid", D, N, seconds, peak, energy=float(E))
+
+
+def _compute(results: list, quick: bool, config_path: str):
+    for potential_name in exact_potentials:
+        for solver, limits in solvers.items():
+            for D, N in _grids(limits[quick]):
+                data = ComputationData(filename=config_path)
+                with data.transaction():
+                    data.start, data.stop, data.num_samples, data.num_dimensions = start, stop, N, D
+                    data.num_states, data.num_iterations = num_states, num_iterations
+                    data.potential_name, data.solver = potential_name, solver
+                    data.incremental_energy, data.basis = True, "grid"
+                    # time every solve, instead of the result cache.
+                    data.use_separable, data.result_cache_size = False, 0
+
+                # time the run without tracing the memory, which slows the Python loops, then trace a second run.
+                cpu, wall = time.process_time(), time.perf_counter()
+                vm.compute(data)
+                cpu, seconds = time.process_time() - cpu, time.perf_counter() - wall
+                data.clear()
+                data, _, peak = measure(vm.compute, data)
+
+                dr = (stop - start) / N
+                if potential_name == "harmonic_oscillator":
+                    exact = harmonic_oscillator_energies(D, num_states)
+                else:
+                    exact = infinite_square_well_energies(D, N, dr, num_states)
+                error = max(abs(E - E_exact) / abs(E_exact) for E, E_exact in zip(data.all_energy, exact))
+                digits = -np.log10(max(error, 1e-16))
+                _record(results, "compute", "{} {}".format(potential_name, solver), D, N, seconds, peak,
+                        cpu_seconds=cpu, relative_error=float(error), digits_per_cpu_second=float(digits / cpu))
+
+
+def run(quick=False) -> list:
+    """
+    Runs the benchmark suite.
+    :param quick: Whether to only run the smaller grids.
+    :return: The list of result records.
+    """
+    results = []
+    _operators(results, quick)
+    _potentials(results, quick)
+    _nth_state(results, quick)
+
+    # compute reads its settings from a config file, so give it a scratch copy of the default config.
+    directory = tempfile.mkdtemp()
+    try:
+        config_path = os.path.join(directory, "data.json")
+        default_path = os.path.join(os.path.dirname(vm.__file__), "data", "default_data.json")
+        shutil.copyfile(default_path, config_path)
+        _compute(results, quick, config_path)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the benchmark suite.")
+    parser.add_argument("--quick", action="store_true", help="only run the smaller grids.")
+    parser.add_argument("--json", help="a file to write the result records to, to compare between changes.")
+    arguments = parser.parse_args()
+
+    results = run(arguments.quick)
+
+    rows = []
+    for result in results:
+        accuracy = ""
+        if "relative_error" in result:
+            accuracy = "{:.2e} ({:.2f} digits/CPU-s)".format(result["relative_error"],
+                                                           result["digits_per_cpu_second"])
+        rows.append([result["section"], result["name"], result["D"], result["N"],
+                     "{:.5f} s".format(result["seconds"]), megabytes(result["peak_bytes"]), accuracy])
+    print_table(["section", "name", "D", "N", "time", "peak", "relative error"], rows)
+
+    if arguments.json:
+        with open(arguments.json, "w", encoding="utf-8") as results_file:
+            json.dump(results, results_file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
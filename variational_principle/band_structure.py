@@ -0,0 +1,159 @@
+import argparse
+import csv
+import json
+import logging
+import logging.config
+import multiprocessing
+import os
+from multiprocessing import Pool
+
+import numpy as np
+
+import variational_principle.quantum_operators as qo
+import variational_principle.sparse_solver as ss
+import variational_principle.variation_method as vm
+import variational_principle.calculus.laplacian as lap
+import variational_principle.potential_handling.potential as pot
+from variational_principle.data_handling.computation_data import ComputationData
+
+
+def zone_path(lengths: tuple, num_points: int, axis=0) -> list:
+    """
+    Evenly spaced Bloch wavevectors across the first Brillouin zone of a cell along one axis, from -pi/L to pi/L,
+    where L is the length of the cell along the axis, with no component along the other axes.
+    :param lengths: The length of the cell along each axis.
+    :param num_points: The number of wavevectors.
+    :param axis: The axis to vary the wavevector along.
+    :return: The list of the wavevectors, as tuples of their component along each axis.
+    """
+    k_max = np.pi / lengths[axis]
+    points = []
+    for k in np.linspace(-k_max, k_max, num_points):
+        point = [0.0] * len(lengths)
+        point[axis] = float(k)
+        points.append(tuple(point))
+    return points
+
+
+def solve_k_point(V: np.ndarray, dr, D: int, N, k: tuple, num_bands: int, settings: dict) -> list:
+    """
+    Finds the energies of the lowest bands at a Bloch wavevector, from the Hamiltonian of a single periodic cell,
+    whose Laplacian wraps around the edges of the cell with the phase of the wavevector.
+    :param V: The potential function of the cell as a grid.
+    :param dr: The grid spacing in the cell, or a sequence of the spacing along each axis.
+    :param D: The number of axes in the system.
+    :param N: The size of each axis of the cell, or a sequence of the size of each axis.
+    :param k: The Bloch wavevector, as its component along each axis.
+    :param num_bands: The number of bands to find.
+    :param settings: The solver settings, from _solver_settings.
+    :return: The list of the energies of the lowest bands, in ascending order.
+    """
+
+    logger = logging.getLogger(__name__)
+    logger.debug("Solving for the %d lowest band(s) at k=%s.", num_bands, k)
+
+    key = lap.laplacian_key(D, N, dr, settings["stencil_order"], "periodic", settings["matrix_free"],
+                            settings["dtype"], k)
+    V = V.reshape(V.size)
+
+    # Only solve over the points where the potential is finite.
+    finite = np.isfinite(V)
+    laplacian, _ = lap.get_restricted_laplacian(key, finite)
+    H = qo.hamiltonian(V[finite], laplacian)
+
+    # the Hamiltonian is complex, so the energies come from the sparse solvers rather than the random walk.
+    solver = settings["solver"] if settings["solver"] in ss.solvers else "eigsh"
+    energies, _ = ss.lowest_eigenpairs(H, min(num_bands, H.shape[0] - 1), solver)
+    return [float(E) for E in np.real(energies)]
+
+
+def band_structure(computed_data: ComputationData, k_points=None, num_bands=None, num_workers=0) -> (list, list):
+    """
+    Computes the lowest bands of the periodic crystal whose unit cell is the configured grid, solving each Bloch
+    wavevector independently over a pool of worker processes.
+    :param computed_data: a ComputedData object of the unit cell, with the periodic boundary.
+    :param k_points: The list of wavevectors, as tuples of their component along each axis, defaults to a path of
+    21 points across the first Brillouin zone along the first axis.
+    :param num_bands: The number of bands to find, defaults to the configured number of states.
+    :param num_workers: The maximum number of worker processes, 0 for one per CPU.
+    :return: The list of the wavevectors, and the list of the energies of the bands at each wavevector.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    settings = vm._solver_settings(computed_data)
+    if settings["boundary"] != "periodic":
+        raise ValueError("The band structure needs the 'periodic' boundary, got '{}'.".format(settings["boundary"]))
+
+    D = computed_data.num_dimensions
+    starts, stops, sizes = vm.grid_axes(computed_data)
+    N = vm._even(sizes)
+    dr = vm._even(tuple((b - a) / n for a, b, n in zip(starts, stops, sizes)))
+    lengths = tuple(b - a for a, b in zip(starts, stops))
+
+    if k_points is None:
+        k_points = zone_path(lengths, 21)
+    k_points = [lap.axis_wavevectors(D, k) for k in k_points]
+    if num_bands is None:
+        num_bands = computed_data.num_states
+
+    r = vm.calculate_r(computed_data)
+    V = pot.potential(r, computed_data.potential_name, settings["dtype"], dict(computed_data.potential_parameters))
+
+    jobs = [(V, dr, D, N, k, num_bands, settings) for k in k_points]
+    num_workers = min(num_workers or os.cpu_count() or 1, len(jobs))
+    logger.debug("Solving %d wavevector(s) over %d worker(s).", len(jobs), num_workers)
+
+    # a daemonic process, such as a worker of a sweep, can't start a pool of its own.
+    if num_workers > 1 and not multiprocessing.current_process().daemon:
+        with Pool(processes=num_workers) as pool:
+            energies = pool.starmap(solve_k_point, jobs)
+    else:
+        energies = [solve_k_point(*job) for job in jobs]
+
+    return k_points, energies
+
+
+def write_table(k_points: list, energies: list, filename="data/bands.csv"):
+    """
+    Writes the energies of the bands to a csv table, a row per wavevector.
+    :param k_points: The list of the wavevectors, as tuples of their component along each axis.
+    :param energies: The list of the energies of the bands at each wavevector.
+    :param filename: The path of the csv file, relative to the working directory.
+    """
+    D = len(k_points[0]) if k_points else 0
+    num_bands = max((len(E) for E in energies), default=0)
+
+    filename = os.path.join(os.getcwd(), filename)
+    with open(filename, "w", newline="", encoding="utf-8") as table_file:
+        writer = csv.writer(table_file)
+        writer.writerow(["k_{}".format(ax) for ax in range(D)] + ["E_{}".format(n) for n in range(num_bands)])
+        for k, E in zip(k_points, energies):
+            writer.writerow(list(k) + list(E))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Computes the band structure of the periodic crystal whose unit "
+                                                 "cell is the grid of 'data/data.json', without changing it.")
+    parser.add_argument("--config", default="data/data.json", help="the config file of the unit cell.")
+    parser.add_argument("--num-k", type=int, default=21, help="the number of wavevectors across the zone.")
+    parser.add_argument("--axis", type=int, default=0, help="the axis to vary the wavevector along.")
+    parser.add_argument("--bands", type=int, default=None, help="the number of bands, defaults to 'num_states'.")
+    parser.add_argument("--workers", type=int, default=0, help="the number of worker processes, 0 for one per CPU.")
+    parser.add_argument("--output", default="data/bands.csv", help="the csv file to write the energies to.")
+    arguments = parser.parse_args(args)
+
+    logging.config.dictConfig(json.load(open("data/logging.json", "r")))
+
+    # the cell is always periodic, the config file itself is never written to.
+    data = ComputationData(filename=arguments.config, overrides={"boundary": "periodic"})
+    starts, stops, _ = vm.grid_axes(data)
+    lengths = tuple(b - a for a, b in zip(starts, stops))
+    k_points = zone_path(lengths, arguments.num_k, arguments.axis)
+
+    k_points, energies = band_structure(data, k_points, arguments.bands, arguments.workers)
+    write_table(k_points, energies, arguments.output)
+
+
+if __name__ == "__main__":
+    main()
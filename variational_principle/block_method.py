@@ -0,0 +1,182 @@
+import hashlib
+import random
+from multiprocessing import Pool
+
+import numpy as np
+import scipy.linalg as la
+
+import variational_principle.quantum_operators as qo
+import variational_principle.deflation as dfl
+import variational_principle.calculus.laplacian as lap
+
+import logging
+import os
+
+# The relative change in energy between synchronisations under which a state counts as converged.
+lock_tolerance = 1e-6
+
+# Seed for the random initial block of states, for repeatable results.
+seed = "THE-VARIATIONAL-PRINCIPLE"
+
+
+def _optimise_state(psi: np.ndarray, constraints: np.ndarray, V: np.ndarray, dr, shape: tuple,
+                    finite: np.ndarray, laplacian_key: tuple, num_iterations: int, first_iteration: int,
+                    total_iterations: int, state_seed: str) -> np.ndarray:
+    """
+    Lowers the energy of one state of the block by random changes orthogonal to the constraining states, keeping
+    the changes that lower the energy. Runs in a worker process.
+    :param psi: The state to optimise, as a linear column vector over the finite points.
+    :param constraints: The lower states to stay orthogonal to, as rows.
+    :param V: The finite potential function as a linear column vector.
+    :param dr: The weight of each finite point in the integrals, from trapezoid_weights.
+    :param shape: The shape of the full grid.
+    :param finite: The boolean mask of the finite points of the full grid.
+    :param laplacian_key: The cache key of the Laplacian on the full grid.
+    :param num_iterations: The number of iterations to run for.
+    :param first_iteration: The overall iteration number to start the step schedule at.
+    :param total_iterations: The overall number of iterations of the step schedule.
+    :param state_seed: The seed of the random changes.
+    :return: The optimised state, normalised.
+    """
+
+    random.seed(state_seed)
+
+    # The operators are cached in each worker, so they are only built once per worker.
+    laplacian, key = lap.get_restricted_laplacian(laplacian_key, finite)
+    H = qo.hamiltonian(V, laplacian, key=key)
+    weights = qo.trapezoid_weights(len(psi), dr)
+
+    orthonormal_basis = dfl.ProjectedBasis(constraints, shape, "grid", allowed=finite)
+    num_bases = len(orthonormal_basis)
+
+    # project the constraints out of psi too, and keep it normalised.
+    psi = orthonormal_basis.project(np.array(psi))
+    psi = qo.normalise(psi, dr)
+    H_psi = H @ psi
+    prev_E = np.dot(weights * psi, H_psi)
+
+    for i in range(first_iteration, first_iteration + num_iterations):
+        rand_index = random.randrange(num_bases)
+        rand_change = random.random() * 0.1 * (total_iterations - i) / total_iterations
+        if random.random() > 0.5:
+            rand_change *= -1
+
+        basis_vector = orthonormal_basis[rand_index]
+        H_basis_vector = H @ basis_vector
+
+        weighted_basis_vector = weights * basis_vector
+        numerator = prev_E + rand_change * (np.dot(weighted_basis_vector, H_psi) +
+                                            np.dot(weights * psi, H_basis_vector)) \
+            + rand_change ** 2 * np.dot(weighted_basis_vector, H_basis_vector)
+        denominator = 1 + 2 * rand_change * np.dot(weighted_basis_vector, psi) \
+            + rand_change ** 2 * np.dot(weighted_basis_vector, basis_vector)
+        new_E = numerator / denominator
+
+        if new_E < prev_E:
+            norm = np.sqrt(denominator)
+            psi += rand_change * basis_vector
+            psi /= norm
+            H_psi += rand_change * H_basis_vector
+            H_psi /= norm
+            prev_E = new_E
+
+    return psi
+
+
+def _rayleigh_ritz(states: np.ndarray, H, weights: np.ndarray) -> (np.ndarray, np.ndarray):
+    """
+    Re-orthonormalises a block of states, and rotates them into the eigenvectors of H within the subspace they span.
+    :param states: The block of states, as rows.
+    :param H: The Hamiltonian of the system.
+    :param weights: The trapezoidal weights of the inner product.
+    :return: The energies in ascending order, and the rotated states as rows.
+    """
+    root_weights = np.sqrt(weights)
+    # orthonormalise with respect to the weighted inner product.
+    Q = np.linalg.qr((states * root_weights).T)[0]
+    states = Q.T / root_weights
+
+    H_states = (H @ states.T).T
+    subspace_H = (states * weights) @ H_states.T
+    subspace_H = 0.5 * (subspace_H + subspace_H.T)
+    energies, rotation = la.eigh(subspace_H)
+    return energies, rotation.T @ states
+
+
+def compute_states(V: np.ndarray, dr, shape: tuple, num_states: int, num_iterations: int,
+                   laplacian_key: tuple, num_workers=0, sync_interval=1000, publish=None) -> (list, list):
+    """
+    Optimises all of the states at the same time, each in a worker process, re-orthonormalising the whole block
+    with a Rayleigh-Ritz step every sync_interval iterations. Once the lowest unconverged state stops changing
+    in energy it's locked, published and kept fixed for the rest of the run.
+    :param V: The potential function of the system as a linear column vector.
+    :param dr: The grid spacing in the system, or the weight of each point, from trapezoid_weights.
+    :param shape: The shape of the grid of the system.
+    :param num_states: The number of states to compute.
+    :param num_iterations: The number of iterations to optimise each state over.
+    :param laplacian_key: The cache key of the Laplacian operator of the system.
+    :param num_workers: The number of worker processes, 0 for one per CPU.
+    :param sync_interval: The number of iterations between each re-orthonormalisation of the block.
+    :param publish: A function of (i, psi, E) to call with each state as soon as it's converged, where psi is a
+    linear column vector over the full grid.
+    :return: The lists of the states as linear column vectors over the full grid, and of their energies.
+    """
+
+    logger = logging.getLogger(__name__)
+    logger.debug("Optimising a block of %d state(s) over %d worker(s).", num_states, num_workers)
+
+    finite = np.isfinite(V)
+    V_finite = V[finite]
+    laplacian, key = lap.get_restricted_laplacian(laplacian_key, finite)
+    H = qo.hamiltonian(V_finite, laplacian, key=key)
+    # the finite points keep their weights in the integral over the whole grid.
+    weights = qo.trapezoid_weights(V.size, dr)[finite]
+
+    # start from a random block, rotated into the best approximations to the eigenstates it can hold.
+    rng = np.random.default_rng(int.from_bytes(hashlib.sha1(seed.encode()).digest()[:4], "little"))
+    energies, states = _rayleigh_ritz(rng.standard_normal((num_states, len(V_finite))), H, weights)
+
+    num_locked = 0
+    all_psi = []
+    all_E = []
+
+    def lock(i):
+        psi = np.zeros(V.size)
+        psi[finite] = states[i]
+        all_psi.append(psi)
+        all_E.append(energies[i])
+        logger.debug("State %d converged with energy %f.", i, energies[i])
+        if publish is not None:
+            publish(i, psi, energies[i])
+
+    num_workers = num_workers or os.cpu_count() or 1
+    sync_interval = max(1, min(sync_interval, num_iterations))
+    with Pool(processes=min(num_workers, num_states)) as pool:
+        for first_iteration in range(0, num_iterations, sync_interval):
+            round_iterations = min(sync_interval, num_iterations - first_iteration)
+
+            # every unlocked state is optimised orthogonally to the states below it.
+            jobs = [(states[j], states[:j], V_finite, weights, shape, finite, laplacian_key, round_iterations,
+                     first_iteration, num_iterations, "{}-{}-{}".format(seed, first_iteration, j))
+                    for j in range(num_locked, num_states)]
+            optimised = pool.starmap(_optimise_state, jobs)
+            states[num_locked:] = optimised
+
+            prev_energies = energies
+            new_energies, unlocked = _rayleigh_ritz(states[num_locked:], H, weights)
+            energies = np.concatenate((prev_energies[:num_locked], new_energies))
+            states[num_locked:] = unlocked
+
+            # lock the lowest states whose energies have settled.
+            while num_locked < num_states and \
+                    abs(energies[num_locked] - prev_energies[num_locked]) <= lock_tolerance * abs(energies[num_locked]):
+                lock(num_locked)
+                num_locked += 1
+
+    # publish the remaining states once the iterations run out.
+    while num_locked < num_states:
+        lock(num_locked)
+        num_locked += 1
+
+    logger.debug("DONE optimising the block of states.")
+    return all_psi, all_E
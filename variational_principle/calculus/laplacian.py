@@ -1,77 +1,523 @@
-from scipy.sparse import diags
+from scipy.sparse import coo_matrix, diags, identity, issparse, kron
+from scipy.sparse.linalg import LinearOperator
 import numpy as np
+import hashlib
+
+from variational_principle.calculus.operator_cache import OperatorCache
 
 import logging
 
+# The finite difference stencil orders and boundary conditions that the Laplacian can be generated with. The
+# periodic boundary wraps each axis around onto itself, with the phase of a Bloch wavevector across the grid.
+stencil_orders = (2, 4, 6)
+boundary_conditions = ("dirichlet", "periodic")
+
+# The central difference coefficients of the second derivative of each order, for the point itself followed by its
+# neighbours 1, 2, ... points away either side.
+_stencil_coefficients = {2: (-2.0, 1.0),
+                         4: (-5 / 2, 4 / 3, -1 / 12),
+                         6: (-49 / 18, 3 / 2, -3 / 20, 1 / 90)}
+
+# The floating point types that the Laplacian, and the rest of the system, can be stored in, and the complex type
+# of the same precision that the Laplacian of a non zero Bloch wavevector is stored in.
+dtypes = ("float64", "float32")
+complex_dtypes = {"float64": "complex128", "float32": "complex64"}
+
+# The generated Laplacian operators, keyed by the parameters of their grid.
+_cache = OperatorCache("Laplacian")
+
+
+def axis_sizes(D: int, N) -> tuple:
+    """
+    The number of points along each axis of a grid.
+    :param D: The number of dimensions/axes in the system.
+    :param N: The size of every axis, or a sequence of the size of each axis.
+    :return: The tuple of the size of each axis.
+    """
+    if np.ndim(N) == 0:
+        return (int(N),) * D
+    if len(N) != D:
+        raise ValueError("Expected the sizes of {} axes, got {}.".format(D, len(N)))
+    return tuple(int(n) for n in N)
+
 
-def _partial_derivative_matrix(D: int, N: int, axis_number: int, dr: float) -> np.ndarray:
+def axis_spacings(D: int, dr) -> tuple:
+    """
+    The grid spacing along each axis of a grid.
+    :param D: The number of dimensions/axes in the system.
+    :param dr: The spacing of every axis, or a sequence of the spacing of each axis.
+    :return: The tuple of the spacing of each axis.
+    """
+    if np.ndim(dr) == 0:
+        return (float(dr),) * D
+    if len(dr) != D:
+        raise ValueError("Expected the grid spacings of {} axes, got {}.".format(D, len(dr)))
+    return tuple(float(d) for d in dr)
+
+
+def axis_wavevectors(D: int, k) -> tuple:
+    """
+    The component of a Bloch wavevector along each axis of a grid.
+    :param D: The number of dimensions/axes in the system.
+    :param k: The component along every axis, or a sequence of the component along each axis.
+    :return: The tuple of the component along each axis.
+    """
+    if np.ndim(k) == 0:
+        return (float(k),) * D
+    if len(k) != D:
+        raise ValueError("Expected the wavevector components along {} axes, got {}.".format(D, len(k)))
+    return tuple(float(k_ax) for k_ax in k)
+
+
+def bloch_phases(D: int, N, dr, k) -> tuple:
+    """
+    The phase a Bloch wavefunction gains across the periodic grid along each axis, psi(x + L) = e^(ikL) psi(x),
+    where the grid spans L = N dr along the axis, as the last point neighbours the first point of the next cell.
+    :param D: The number of dimensions/axes in the system.
+    :param N: The size of each dimension, or a sequence of the size of each axis.
+    :param dr: The grid spacing in the system, or a sequence of the spacing along each axis.
+    :param k: The Bloch wavevector, along every axis, or a sequence of its component along each axis.
+    :return: The tuple of the phase along each axis, exactly 1 along the axes with no wavevector.
+    """
+    phases = []
+    for n, spacing, k_ax in zip(axis_sizes(D, N), axis_spacings(D, dr), axis_wavevectors(D, k)):
+        phases.append(np.exp(1j * k_ax * n * spacing) if k_ax != 0 else 1.0)
+    return tuple(phases)
+
+
+def _partial_derivative_matrix(D: int, N, axis_number: int, dr: float, order=2, phase=None) -> np.ndarray:
     """
     Generates the sparse second derivative central difference derivative matrix along given axis, for a grid of dimensions N^D.
     :param D: The number of dimensions of the system, e.g.: 3D...
-    :param N: The dimensions of the symmetric grid.
+    :param N: The size of every axis of the grid, or a sequence of the size of each axis.
     :param axis_number: The axis to derive along, starting at 0.
-    :param dr: The grid spacing in the system.
-    :return: The second order central difference derivative sparse matrix along the given axis.
+    :param dr: The grid spacing along the axis.
+    :param order: The order of accuracy of the stencil, one of stencil_orders.
+    :param phase: The Bloch phase across the grid along the axis to wrap the stencil around the edges of the axis
+    with, for a periodic boundary, or None for the neighbours beyond the edges to be 0.
+    :return: The central difference derivative sparse matrix of the given order along the given axis.
     """
 
+    sizes = axis_sizes(D, N)
+    size = int(np.prod(sizes))
+
     logger = logging.getLogger(__name__)
-    logger.debug("Generating a second derivative matrix for %d dimension(s) of size %d, along axis %d", D, N, axis_number)
+    logger.debug("Generating a second derivative matrix for a grid of sizes %s, along axis %d", sizes, axis_number)
 
     logger.debug("Constraining axis number to total number of dimensions")
     # cap axis_number in range to prevent errors.
     axis_number %= D
+    N = sizes[axis_number]
 
-    # Determine the number of the cell grids that need to be repeated along to populate the matrix
-    num_cells = D - (axis_number + 1)
+    # Determine the number of the cell grids that need to be repeated along to populate the matrix, the axes before
+    # this one in the linear column vector.
+    num_cells = int(np.prod(sizes[:axis_number]))
 
-    logger.debug("Generating second derivative stencil")
+    logger.debug("Generating second derivative stencil of order %d", order)
+    coefficients = _stencil_coefficients[order]
     # The general pattern for a derivative matrix along the axis: axis_number, for a num_axes number of
-    # dimensions, each of length N
-    diagonals = [[-2] * N ** D,
-                 (([1] * N ** axis_number) * (N - 1) + [0] * N ** axis_number) * N ** num_cells,
-                 (([1] * N ** axis_number) * (N - 1) + [0] * N ** axis_number) * N ** num_cells]
+    # dimensions, the neighbours are 0 where they would wrap around the edge of the axis.
+    stride = int(np.prod(sizes[axis_number + 1:]))
+    diagonals = [np.full(size, coefficients[0])]
+    offsets = [0]
+    for j in range(1, min(len(coefficients), N)):
+        # the neighbours j points away along the axis, 0 for the last j points, which have none.
+        neighbours = np.tile(np.concatenate((np.full(stride * (N - j), coefficients[j]), np.zeros(stride * j))),
+                             num_cells)
+        diagonals += [neighbours, neighbours]
+        offsets += [-j * stride, j * stride]
+
+        if phase is not None:
+            # the last j points neighbour the first j points of the next cell along the axis, where the wavefunction
+            # has gained the phase, and the first j points neighbour the last j points of the previous cell.
+            wrapped = np.tile(np.concatenate((np.ones(stride * j), np.zeros(stride * (N - j)))), num_cells)
+            diagonals += [coefficients[j] * phase * wrapped, coefficients[j] * np.conj(phase) * wrapped]
+            offsets += [-(N - j) * stride, (N - j) * stride]
 
     logger.debug("Generating second derivative diagonal matrix")
     # Create a sparse matrix for the given diagonals, of the desired size.
-    D_n = diags(diagonals, [0, -N ** axis_number, N ** axis_number], shape=(N ** D, N ** D))
+    D_n = diags(diagonals, offsets, shape=(size, size))
 
     logger.debug("Scaling by grid spacing")
     # return the matrix, factored by the grid spacing as required by the central difference formula
     return D_n * (dr ** -2)
 
 
-def generate_laplacian(D: int, N: int, dr: float):
+class StencilLaplacian(LinearOperator):
+    """
+    A matrix-free Laplacian, that applies the central difference stencil with slice arithmetic on the N^D shaped
+    grid, instead of holding the assembled sparse matrix. Points beyond the edges of the grid are 0, the same as in
+    the assembled matrix.
+    """
+
+    def __init__(self, D: int, N, dr, dtype=np.float64, order=2, phases=None):
+        """
+        :param D: The number of dimensions/axes in the system.
+        :param N: The size of each dimension, or a sequence of the size of each axis.
+        :param dr: The grid spacing in the system, or a sequence of the spacing along each axis.
+        :param dtype: The data type of the operator.
+        :param order: The order of accuracy of the stencil, one of stencil_orders.
+        :param phases: The Bloch phase across the grid along each axis to wrap the stencil around the edges of the
+        axes with, for a periodic boundary, or None for the points beyond the edges to be 0.
+        """
+        self._grid_shape = axis_sizes(D, N)
+        spacings = axis_spacings(D, dr)
+        self._scale = spacings[0] ** -2
+        size = int(np.prod(self._grid_shape))
+        super().__init__(dtype=np.dtype(dtype), shape=(size, size))
+
+        coefficients = _stencil_coefficients[order]
+        # the stencil along each axis, relative to the scale of the first axis, 1 along every axis of an even grid.
+        relative_scales = [(spacings[0] / spacing) ** 2 for spacing in spacings]
+        self._centre = sum(coefficients[0] * relative for relative in relative_scales)
+        # The coefficient of each neighbour, with the slices of the grid that are offset by its distance below and
+        # above it along each axis.
+        self._neighbours = []
+        for ax in range(D):
+            for j in range(1, len(coefficients)):
+                below = [slice(None)] * D
+                above = [slice(None)] * D
+                below[ax] = slice(None, -j)
+                above[ax] = slice(j, None)
+                self._neighbours.append((coefficients[j] * relative_scales[ax], tuple(below), tuple(above)))
+
+        # For a periodic boundary, the coefficient of each neighbour across the edge of an axis, with its phase and
+        # the slices of the first and last points along the axis, which neighbour each other.
+        self._wrapped = []
+        if phases is not None:
+            for ax in range(D):
+                for j in range(1, len(coefficients)):
+                    head = [slice(None)] * D
+                    tail = [slice(None)] * D
+                    head[ax] = slice(None, j)
+                    tail[ax] = slice(self._grid_shape[ax] - j, None)
+                    self._wrapped.append((coefficients[j] * relative_scales[ax], phases[ax], tuple(head), tuple(tail)))
+
+    def apply(self, x: np.ndarray, out=None) -> np.ndarray:
+        """
+        Applies the Laplacian to x, writing into the preallocated out buffer if one is given.
+        :param x: The linear column vector, or a block of column vectors, to apply the Laplacian to.
+        :param out: The buffer to write the result into, of the same shape as x.
+        :return: The Laplacian of x.
+        """
+        if out is None:
+            out = np.empty(x.shape, dtype=np.result_type(x, self.dtype))
+
+        # Any trailing axes are a block of column vectors, they're carried along by the slicing.
+        grid = x.reshape(self._grid_shape + x.shape[1:])
+        out_grid = out.reshape(grid.shape)
+
+        np.multiply(grid, self._centre, out=out_grid)
+        # The buffer the scaled neighbours of the higher order stencils are written into.
+        scaled = None
+        for coefficient, below, above in self._neighbours:
+            if coefficient == 1:
+                # add the neighbours along this axis to each point, in place.
+                np.add(out_grid[above], grid[below], out=out_grid[above])
+                np.add(out_grid[below], grid[above], out=out_grid[below])
+                continue
+            if scaled is None:
+                scaled = np.empty(grid.shape, dtype=out.dtype)
+            np.multiply(grid[below], coefficient, out=scaled[above])
+            np.add(out_grid[above], scaled[above], out=out_grid[above])
+            np.multiply(grid[above], coefficient, out=scaled[below])
+            np.add(out_grid[below], scaled[below], out=out_grid[below])
+        for coefficient, phase, head, tail in self._wrapped:
+            # only the points at the edges wrap around, so these products are small.
+            out_grid[tail] += (coefficient * phase) * grid[head]
+            out_grid[head] += (coefficient * np.conj(phase)) * grid[tail]
+        out *= self._scale
+        return out
+
+    def _matvec(self, x):
+        return self.apply(x.reshape(self.shape[1])).reshape(x.shape)
+
+    def _matmat(self, X):
+        return self.apply(np.asarray(X))
+
+    def _rmatvec(self, x):
+        # The Laplacian is hermitian.
+        return self._matvec(x)
+
+    def _adjoint(self):
+        return self
+
+
+def generate_laplacian(D: int, N, dr, order=2, boundary="dirichlet", matrix_free=False, dtype="float64", k=0.0):
     """
     Generates the Lagrangian second derivative matrix for the number of axes D.
     :param D: The number of dimensions/axes in the system.
-    :param N: The size of each dimension.
-    :param dr: The grid spacing in the system.
+    :param N: The size of each dimension, or a sequence of the size of each axis.
+    :param dr: The grid spacing in the system, or a sequence of the spacing along each axis.
+    :param order: The order of accuracy of the finite difference stencil.
+    :param boundary: The boundary condition at the edges of the grid.
+    :param matrix_free: Whether to generate a matrix-free StencilLaplacian instead of assembling a sparse matrix.
+    :param dtype: The floating point type of the operator, one of dtypes.
+    :param k: The Bloch wavevector of a periodic boundary, along every axis or a sequence of its component along
+    each axis, the Laplacian of a non zero wavevector is hermitian, of the complex type of the same precision.
+    :return: The Laplacian operator.
     """
 
     logger = logging.getLogger(__name__)
-    logger.debug("Generating Laplacian matrix operator for system of %d dimension(s), sized %d", D, N)
-
-    # Initially set DEV2 to be undefined.
-    laplacian = None
-
-    # iterate over each dimension in the system.
-    for ax in range(D):
-        # generate the second order central difference matrix for this axis
-        D_n = _partial_derivative_matrix(D, N, ax, dr)
-        # if it's the first matrix generated, set DEV2 equal to it.
-        if laplacian is None:
-            laplacian = D_n
-        # otherwise add it, as matrix multiplication is distributive (ie differentiation is distributive)
-        else:
-            laplacian += D_n
+    logger.debug("Generating Laplacian matrix operator for system of %d dimension(s), sized %s", D, N)
+
+    if order not in stencil_orders:
+        raise ValueError("Unsupported stencil order {}, expected one of {}.".format(order, stencil_orders))
+    if boundary not in boundary_conditions:
+        raise ValueError("Unsupported boundary condition '{}', expected one of {}.".format(boundary,
+                                                                                         boundary_conditions))
+    if dtype not in dtypes:
+        raise ValueError("Unsupported dtype '{}', expected one of {}.".format(dtype, dtypes))
+
+    phases = None
+    if boundary == "periodic":
+        reach = len(_stencil_coefficients[order]) - 1
+        if min(axis_sizes(D, N)) <= 2 * reach:
+            raise ValueError("The periodic boundary needs more than {} points along each axis for a stencil of "
+                             "order {}.".format(2 * reach, order))
+        phases = bloch_phases(D, N, dr, k)
+        if any(np.iscomplexobj(phase) for phase in phases):
+            dtype = complex_dtypes[dtype]
+        logger.debug("Wrapping the stencil around the edges of the grid, with the Bloch phases %s.", phases)
+
+    if matrix_free:
+        logger.debug("Using a matrix-free stencil operator.")
+        laplacian = StencilLaplacian(D, N, dr, dtype, order, phases)
+    else:
+        # Initially set DEV2 to be undefined.
+        laplacian = None
+
+        spacings = axis_spacings(D, dr)
+        # iterate over each dimension in the system.
+        for ax in range(D):
+            # generate the second order central difference matrix for this axis
+            D_n = _partial_derivative_matrix(D, N, ax, spacings[ax], order,
+                                             phases[ax] if phases is not None else None)
+            # if it's the first matrix generated, set DEV2 equal to it.
+            if laplacian is None:
+                laplacian = D_n
+            # otherwise add it, as matrix multiplication is distributive (ie differentiation is distributive)
+            else:
+                laplacian += D_n
+        # the stencil is assembled in double precision, then stored in the requested precision.
+        laplacian = laplacian.tocsr().astype(dtype)
 
     logger.debug("DONE generating Laplacian.")
-    logger.debug("Setting global variable.")
+    return laplacian
 
-    global DEV2
-    DEV2 = laplacian
 
+def laplacian_key(D: int, N, dr, order=2, boundary="dirichlet", matrix_free=False, dtype="float64",
+                  k=0.0) -> tuple:
+    """
+    The key identifying a Laplacian operator in the cache, with the sizes, spacings and wavevector components of an
+    even grid given once. The wavevector is always 0 in the key of a Dirichlet boundary, which doesn't use it.
+    """
+    sizes = axis_sizes(D, N)
+    spacings = axis_spacings(D, dr)
+    wavevector = axis_wavevectors(D, k) if boundary == "periodic" else (0.0,) * D
+    N = sizes[0] if len(set(sizes)) == 1 else sizes
+    dr = spacings[0] if len(set(spacings)) == 1 else spacings
+    k = wavevector[0] if len(set(wavevector)) == 1 else wavevector
+    return D, N, dr, order, boundary, bool(matrix_free), str(np.dtype(dtype)), k
+
+
+def get_laplacian(D: int, N, dr, order=2, boundary="dirichlet", matrix_free=False, dtype="float64", k=0.0):
+    """
+    Gets the Laplacian operator for the given grid from the cache, generating it if it hasn't been already.
+    :param D: The number of dimensions/axes in the system.
+    :param N: The size of each dimension, or a sequence of the size of each axis.
+    :param dr: The grid spacing in the system, or a sequence of the spacing along each axis.
+    :param order: The order of accuracy of the finite difference stencil.
+    :param boundary: The boundary condition at the edges of the grid.
+    :param matrix_free: Whether to get a matrix-free StencilLaplacian instead of an assembled sparse matrix.
+    :param dtype: The floating point type of the operator, one of dtypes.
+    :param k: The Bloch wavevector of a periodic boundary, along every axis or a sequence of its component along
+    each axis.
+    :return: The Laplacian operator.
+    """
+    key = laplacian_key(D, N, dr, order, boundary, matrix_free, dtype, k)
+    return _cache.get(key, lambda: generate_laplacian(*key))
+
+
+def get_laplacian_by_key(key: tuple):
+    """
+    Gets the Laplacian operator with the given key from the cache, either of a grid, from laplacian_key, or of a
+    symmetry sector of a grid, from sector_key, generating it if it hasn't been already.
+    :param key: The cache key of the Laplacian.
+    :return: The Laplacian operator.
+    """
+    if key[0] == "sector":
+        _, grid_key, axes, parities = key
+        return _cache.get(key, lambda: _sector_laplacian(grid_key, axes, parities))
+    return get_laplacian(*key)
+
+
+def folding_matrix(N: int, parity: int):
+    """
+    The orthonormal columns that unfold the even or odd half of an axis onto the whole axis, mirroring each point
+    k of the first half onto the point N - 1 - k, with the same sign for the even half and the opposite sign for
+    the odd half. The middle point of an odd sized axis only belongs to the even half, the odd states vanish on it.
+    :param N: The size of the axis.
+    :param parity: 0 for the even half, 1 for the odd half.
+    :return: The sparse N by n matrix, where n is the size of the half.
+    """
+    n = (N + 1) // 2 if parity == 0 else N // 2
+    sign = -1.0 if parity else 1.0
+
+    rows = []
+    columns = []
+    values = []
+    for k in range(n):
+        if k == N - 1 - k:
+            # the middle point is its own mirror image.
+            rows.append(k)
+            columns.append(k)
+            values.append(1.0)
+            continue
+        rows.extend((k, N - 1 - k))
+        columns.extend((k, k))
+        values.extend((np.sqrt(0.5), sign * np.sqrt(0.5)))
+    return coo_matrix((values, (rows, columns)), shape=(N, n)).tocsr()
+
+
+def sector_shape(shape: tuple, axes: tuple, parities: tuple) -> tuple:
+    """
+    The shape of the half grid of a symmetry sector.
+    :param shape: The size of each axis of the full grid.
+    :param axes: The axes the grid is folded along.
+    :param parities: The parity of the sector along each of the axes, 0 for even and 1 for odd.
+    :return: The tuple of the size of each axis of the sector.
+    """
+    sizes = list(shape)
+    for ax, parity in zip(axes, parities):
+        sizes[ax] = (shape[ax] + 1) // 2 if parity == 0 else shape[ax] // 2
+    return tuple(sizes)
+
+
+def sector_projector(shape: tuple, axes: tuple, parities: tuple):
+    """
+    The orthonormal columns that unfold a vector on the half grid of a symmetry sector onto the full grid, as the
+    product of the folding matrices of each folded axis, in the same row-major order as the grid is flattened.
+    :param shape: The size of each axis of the full grid.
+    :param axes: The axes the grid is folded along.
+    :param parities: The parity of the sector along each of the axes, 0 for even and 1 for odd.
+    :return: The sparse matrix, of the size of the full grid by the size of the sector.
+    """
+    parity_of = dict(zip(axes, parities))
+    projector = None
+    for ax, N in enumerate(shape):
+        if ax in parity_of:
+            P_ax = folding_matrix(N, parity_of[ax])
+        else:
+            P_ax = identity(N, format="csr")
+        projector = P_ax if projector is None else kron(projector, P_ax, format="csr")
+    return projector
+
+
+def sector_key(key: tuple, axes: tuple, parities: tuple) -> tuple:
+    """
+    The key identifying the Laplacian of a symmetry sector of a grid in the cache.
+    :param key: The cache key of the Laplacian on the full grid, from laplacian_key.
+    :param axes: The axes the grid is folded along.
+    :param parities: The parity of the sector along each of the axes, 0 for even and 1 for odd.
+    """
+    return "sector", key, tuple(axes), tuple(parities)
+
+
+class ProjectedOperator(LinearOperator):
+    """
+    An operator on the full grid, acting on the vectors of a subspace through the orthonormal columns that span it.
+    """
+
+    def __init__(self, operator, projector):
+        """
+        :param operator: The LinearOperator on the full grid.
+        :param projector: The sparse matrix of the orthonormal columns spanning the subspace.
+        """
+        self._operator = operator
+        self._projector = projector
+        self._projector_T = projector.T.tocsr()
+        size = projector.shape[1]
+        super().__init__(dtype=operator.dtype, shape=(size, size))
+
+    def _matvec(self, x):
+        full = (self._projector @ x.reshape(self.shape[1])).astype(self.dtype, copy=False)
+        return (self._projector_T @ (self._operator @ full)).astype(self.dtype, copy=False).reshape(x.shape)
+
+    def _rmatvec(self, x):
+        # The Laplacian is symmetric.
+        return self._matvec(x)
+
+
+def project(operator, projector):
+    """
+    Projects an operator on the full grid onto the subspace spanned by the orthonormal columns of the projector.
+    :param operator: The sparse matrix or LinearOperator on the full grid.
+    :param projector: The sparse matrix of the orthonormal columns.
+    :return: The projected operator.
+    """
+    if issparse(operator):
+        return (projector.T @ operator @ projector).tocsr().astype(operator.dtype)
+    return ProjectedOperator(operator, projector)
+
+
+def _sector_laplacian(key: tuple, axes: tuple, parities: tuple):
+    """
+    The Laplacian of a grid projected onto a symmetry sector, on the half grid of the sector.
+    """
+    D, N = key[0], key[1]
+    projector = sector_projector(axis_sizes(D, N), axes, parities)
+    return project(get_laplacian(*key), projector)
+
+
+class RestrictedOperator(LinearOperator):
+    """
+    An operator on the full grid, restricted to the points selected by a mask, with 0 at every other point.
+    """
+
+    def __init__(self, operator, mask: np.ndarray):
+        """
+        :param operator: The LinearOperator on the full grid.
+        :param mask: A boolean mask of the points to keep.
+        """
+        self._operator = operator
+        self._mask = mask
+        size = int(np.count_nonzero(mask))
+        super().__init__(dtype=operator.dtype, shape=(size, size))
+
+    def _matvec(self, x):
+        full = np.zeros(self._operator.shape[1], dtype=np.result_type(x, self.dtype))
+        full[self._mask] = x.reshape(self.shape[1])
+        return (self._operator @ full)[self._mask].reshape(x.shape)
+
+    def _rmatvec(self, x):
+        # The Laplacian is symmetric.
+        return self._matvec(x)
+
+
+def restrict(operator, mask: np.ndarray):
+    """
+    Restricts an operator on the full grid to the points selected by the mask, with 0 at every other point.
+    :param operator: The sparse matrix or LinearOperator on the full grid.
+    :param mask: A boolean mask of the points to keep.
+    :return: The restricted operator.
+    """
+    if issparse(operator):
+        operator = operator.tocsr()
+        return operator[mask][:, mask]
+    return RestrictedOperator(operator, mask)
+
+
+def get_restricted_laplacian(key: tuple, mask: np.ndarray) -> tuple:
+    """
+    Gets the Laplacian operator with the given key, restricted to the points selected by the mask, from the cache.
+    :param key: The cache key of the Laplacian on the full grid, or of a symmetry sector.
+    :param mask: A boolean mask of the points to keep.
+    :return: The restricted Laplacian, and its own cache key.
+    """
+    if np.all(mask):
+        return get_laplacian_by_key(key), key
 
-def get_laplacian():
-    global DEV2
-    return DEV2
+    digest = hashlib.sha1(np.packbits(mask)).hexdigest()
+    restricted_key = ("restricted", key, digest)
+    return _cache.get(restricted_key, lambda: restrict(get_laplacian_by_key(key), mask)), restricted_key
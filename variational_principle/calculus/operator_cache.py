@@ -0,0 +1,62 @@
+from collections import OrderedDict
+import os
+import threading
+import logging
+
+
+class OperatorCache(object):
+    """
+    A size bounded, least recently used cache of operators, keyed by the parameters they were built from.
+    Access is guarded by a lock so threads can share it, and each process has its own copy, with the lock
+    recreated after a fork so a child can't inherit it held.
+    """
+
+    def __init__(self, name: str, max_size=8):
+        """
+        :param name: The name of the cache, for logging.
+        :param max_size: The maximum number of operators to keep.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.name = name
+        self.max_size = max_size
+        self._operators = OrderedDict()
+        self._lock = threading.Lock()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset_lock)
+
+    def _reset_lock(self):
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        """
+        Gets the operator for the given key, building and storing it if it isn't cached.
+        :param key: The hashable parameters of the operator.
+        :param build: A function of no arguments that builds the operator.
+        :return: The operator.
+        """
+        with self._lock:
+            operator = self._operators.get(key)
+            if operator is not None:
+                self._operators.move_to_end(key)
+                self.logger.debug("Found %s operator for %s in the cache.", self.name, key)
+                return operator
+
+        # build outside of the lock, so other keys can be looked up meanwhile.
+        self.logger.debug("Building %s operator for %s.", self.name, key)
+        operator = build()
+
+        with self._lock:
+            self._operators[key] = operator
+            self._operators.move_to_end(key)
+            while len(self._operators) > self.max_size:
+                evicted, _ = self._operators.popitem(last=False)
+                self.logger.debug("Evicted %s operator for %s from the cache.", self.name, evicted)
+        return operator
+
+    def clear(self):
+        with self._lock:
+            self._operators.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._operators)
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import random
+import threading
+
+import numpy as np
+
+import logging
+
+
+def fingerprint(settings: dict) -> str:
+    """
+    A digest of the settings that determine the result of a run, so a checkpoint is only resumed by the same run.
+    :param settings: The JSON serialisable settings of the run.
+    :return: The hex digest of the settings.
+    """
+    return hashlib.sha1(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _pack_rng(state: tuple) -> dict:
+    version, internal, gauss_next = state
+    return {"rng_version": np.array(version),
+            "rng_internal": np.array(internal, dtype=np.int64),
+            "rng_gauss_next": np.array(np.nan if gauss_next is None else gauss_next)}
+
+
+def _unpack_rng(data) -> tuple:
+    gauss_next = float(data["rng_gauss_next"])
+    return (int(data["rng_version"]), tuple(int(x) for x in data["rng_internal"]),
+            None if np.isnan(gauss_next) else gauss_next)
+
+
+def _write(path: str, arrays: dict):
+    """
+    Writes the arrays to an npz file atomically, so a killed process leaves either the old or the new checkpoint.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as tmp_file:
+        np.savez(tmp_file, **arrays)
+        tmp_file.flush()
+        os.fsync(tmp_file.fileno())
+    os.replace(tmp_path, path)
+
+
+class Checkpointer(object):
+    """
+    Periodically saves the progress of the variational method, the completed states, and the state of the walk
+    of the current one, with the random number generator state, so the run can be resumed deterministically.
+    The snapshots are written by a background thread, so the walk only pays for copying psi: if the writer is
+    still busy, a newer snapshot replaces the pending one.
+    """
+
+    def __init__(self, path: str, interval: int, run_fingerprint: str):
+        """
+        :param path: The file to write the checkpoints to.
+        :param interval: The number of iterations between each checkpoint.
+        :param run_fingerprint: The fingerprint of the settings of the run.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.path = os.path.join(os.getcwd(), path)
+        self.interval = max(int(interval), 1)
+        self.fingerprint = run_fingerprint
+
+        self._completed_psi = np.zeros((0, 0))
+        self._completed_E = np.zeros(0)
+        self._state = 0
+        self._next = self.interval
+
+        self._pending = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._writer = threading.Thread(target=self._write_loop, name="checkpoint-writer", daemon=True)
+        self._writer.start()
+
+    def load(self):
+        """
+        Reads the checkpoint for this run, if there is one.
+        :return: The dict of the checkpoint, or None if there isn't a checkpoint, or it's from a different run.
+        """
+        if not os.path.isfile(self.path):
+            self.logger.info("No checkpoint found at '%s', starting from the beginning.", self.path)
+            return None
+
+        with np.load(self.path) as data:
+            if str(data["fingerprint"]) != self.fingerprint:
+                self.logger.warning("The checkpoint at '%s' is from a run with different settings, ignoring it.",
+                                    self.path)
+                return None
+
+            checkpoint = {"completed_psi": data["completed_psi"],
+                          "completed_E": data["completed_E"],
+                          "state": int(data["state"]),
+                          "rng": _unpack_rng(data),
+                          "walk": None}
+            if int(data["has_walk"]):
+                walk = {key[len("walk_"):]: data[key] for key in data.files if key.startswith("walk_")}
+                walk["iteration"] = int(data["iteration"])
+                walk["rng"] = checkpoint["rng"]
+                checkpoint["walk"] = walk
+
+        self.logger.info("Resuming from state %d of the checkpoint at '%s'.", checkpoint["state"], self.path)
+        return checkpoint
+
+    def set_completed(self, completed_psi: np.ndarray, completed_E: list, save=True):
+        """
+        Records the completed states, and starts checking for the next state.
+        :param completed_psi: The completed states, as rows of linear column vectors.
+        :param completed_E: The energies of the completed states.
+        :param save: Whether to save a checkpoint of the completed states now, rather than just record them for the
+        next checkpoint, as when they were restored from a checkpoint.
+        """
+        self._completed_psi = np.array(completed_psi)
+        self._completed_E = np.array(completed_E, dtype=float)
+        self._state = len(completed_E)
+        self._next = self.interval
+        if save:
+            self._submit({}, 0, has_walk=False)
+
+    def due(self, iteration: int) -> bool:
+        """
+        Whether a checkpoint should be saved at this iteration of the walk.
+        """
+        return iteration >= self._next
+
+    def save(self, iteration: int, **walk):
+        """
+        Saves a snapshot of the walk at the start of the given iteration, before it has drawn any random numbers.
+        :param iteration: The iteration of the walk.
+        :param walk: The arrays and values the walk needs to continue from this iteration.
+        """
+        self._next = iteration + self.interval
+        # copy the arrays, as the walk changes them in place.
+        walk = {key: np.array(value) for key, value in walk.items()}
+        self._submit(walk, iteration, has_walk=True)
+
+    def _submit(self, walk: dict, iteration: int, has_walk: bool):
+        arrays = {"walk_" + key: value for key, value in walk.items()}
+        arrays.update(_pack_rng(random.getstate()))
+        arrays.update({"fingerprint": np.array(self.fingerprint),
+                       "completed_psi": self._completed_psi,
+                       "completed_E": self._completed_E,
+                       "state": np.array(self._state),
+                       "iteration": np.array(iteration),
+                       "has_walk": np.array(int(has_walk))})
+        with self._condition:
+            self._pending = arrays
+            self._condition.notify()
+
+    def _write_loop(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                arrays = self._pending
+                self._pending = None
+            try:
+                _write(self.path, arrays)
+                self.logger.debug("Wrote checkpoint at iteration %d of state %d.", int(arrays["iteration"]),
+                                  int(arrays["state"]))
+            except OSError as e:
+                self.logger.error("Failed to write the checkpoint to '%s': %s", self.path, e)
+
+    def close(self, remove=False):
+        """
+        Writes any pending checkpoint and stops the writer thread.
+        :param remove: Whether to delete the checkpoint, once the run has finished.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._writer.join()
+        if remove and os.path.isfile(self.path):
+            os.remove(self.path)
+            self.logger.debug("Removed the checkpoint of the finished run.")
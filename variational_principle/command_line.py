@@ -2,12 +2,28 @@ from variational_principle import variation_method as vp
 from variational_principle import plot as plt
 from variational_principle.data_handling import computation_data
 
+import argparse
 import logging
 import logging.config
 import json
 
 
-def run_computation():
+def parse_arguments(args=None) -> argparse.Namespace:
+    """
+    Parses the command line arguments.
+    :param args: The list of arguments to parse, defaults to sys.argv.
+    :return: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Computes the bound energy eigenstates of the system configured in "
+                                                 "'data/data.json' with the variational principle.")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted run from its checkpoint, see 'checkpoint_interval'.")
+    return parser.parse_args(args)
+
+
+def run_computation(args=None):
+
+    arguments = parse_arguments(args)
 
     logging.config.dictConfig(json.load(open("data/logging.json", "r")))
     logger = logging.getLogger(__name__)
@@ -25,9 +41,9 @@ def run_computation():
 
     # The size and range of the grid
     start, stop, N = data.start, data.stop, data.num_samples
-    logger.debug("Set `start` to %f", start)
-    logger.debug("Set `stop` to %f", stop)
-    logger.debug("Set `N` to %d", N)
+    logger.debug("Set `start` to %s", start)
+    logger.debug("Set `stop` to %s", stop)
+    logger.debug("Set `N` to %s", N)
 
     # The number of orders of psi to calculate
     num_states = data.num_states
@@ -45,7 +61,7 @@ def run_computation():
 
     logger.debug("Computing the energy eigenstates")
 
-    data = vp.compute(data)
+    data = vp.compute(data, resume=arguments.resume)
     r = data.r
     V = data.V
     all_psi = data.all_psi
@@ -5,13 +5,14 @@ from numpy import ndarray
 
 class ComputationData(CachedJsonData):
 
-    def __init__(self, r=None, V=None, filename="data/data.json"):
-        super().__init__(filename)
+    def __init__(self, r=None, V=None, filename="data/data.json", overrides=None):
+        super().__init__(filename, overrides=overrides)
         self.logger = logging.getLogger(__name__)
         self.logger.debug("Initialising new ComputationData object.")
 
         self._all_psi = []
         self._all_energy = []
+        self._all_convergence_stats = []
         self.logger.debug("Initialised lists.")
 
         self.r_key = "position"
@@ -45,6 +46,10 @@ class ComputationData(CachedJsonData):
     def all_energy(self):
         return self._all_energy
 
+    @property
+    def all_convergence_stats(self):
+        return self._all_convergence_stats
+
     def add_psi(self, psi: ndarray):
         if psi is None:
             self.logger.debug("Given psi is None, returning.")
@@ -57,8 +62,15 @@ class ComputationData(CachedJsonData):
             return
         self._all_energy.append(energy)
 
+    def add_convergence_stats(self, stats):
+        if stats is None:
+            self.logger.debug("Given convergence stats are None, returning.")
+            return
+        self._all_convergence_stats.append(stats)
+
     def clear(self):
         self.logger.debug("Clearing all container types.")
         self._all_psi.clear()
         self._all_energy.clear()
+        self._all_convergence_stats.clear()
         self.logger.debug("Cleared the lists.")
\ No newline at end of file
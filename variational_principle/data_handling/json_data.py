@@ -1,6 +1,8 @@
 import os
 import json
 import logging
+from contextlib import contextmanager
+from types import MappingProxyType
 
 # hardcoded default data incase the default_data.json file doesn't exist or can't be read.
 _backup_default_data = {"label": "Linear Harmonic Oscillator",
@@ -13,33 +15,50 @@ _backup_default_data = {"label": "Linear Harmonic Oscillator",
                         "potential_name": "harmonic_oscillator",
                         "plot_with_potential": False,
                         "plot_scale": 10,
-                        "colourmap": "autumn"
+                        "colourmap": "autumn",
+                        "solver": "variational",
+                        "incremental_energy": False,
+                        "basis": "null_space",
+                        "laplacian": "assembled",
+                        "use_separable": True,
+                        "batch_size": 1,
+                        "num_workers": 0,
+                        "sync_interval": 1000,
+                        "checkpoint_interval": 0,
+                        "checkpoint_file": "data/checkpoint.npz",
+                        "result_cache_size": 512,
+                        "result_cache_dir": "data/results",
+                        "multigrid_levels": 1,
+                        "tolerance": 0,
+                        "convergence_window": 1000,
+                        "metrics": False,
+                        "metrics_file": "data/metrics.json",
+                        "dtype": "float64",
+                        "potential_parameters": {},
+                        "stencil_order": 2,
+                        "use_symmetry": False,
+                        "boundary": "dirichlet"
                         }
 
 
-def write_data(label, start, stop, num_states, num_dimensions, num_samples, num_iterations, potential_name, plot_with_potential,
-               plot_scale, colourmap, filename="data/data.json"):
+def write_json(data: dict, filename="data/data.json"):
+    """
+    Writes the config to the json file atomically, through a temporary file that replaces it, so a reader never
+    sees a half written file.
+    :param data: The config values.
+    :param filename: The path of the json file, relative to the working directory.
+    """
 
     filename = os.path.join(os.getcwd(), filename)
 
     logger = logging.getLogger(__name__)
     logger.debug("Writing json data to '%s'", filename)
 
-    data = {"label": label,
-            "start": start,
-            "stop": stop,
-            "num_states": num_states,
-            "num_dimensions": num_dimensions,
-            "num_samples": num_samples,
-            "num_iterations": num_iterations,
-            "potential_name": potential_name,
-            "plot_with_potential": plot_with_potential,
-            "plot_scale": plot_scale,
-            "colourmap": colourmap
-            }
-    with open(filename, "w", encoding="utf-8") as data_file:
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, "w", encoding="utf-8") as data_file:
         dump = json.dumps(data, indent=4, separators=(",", ": "), ensure_ascii=False)
         data_file.write(dump)
+    os.replace(tmp_filename, filename)
 
     logger.debug("Successfully wrote %s to file.", data)
 
@@ -65,144 +84,377 @@ def read_data(filename="data/data.json"):
         return read_default()
 
 
-class JsonData(object):
+def _modified_time(filename: str):
+    try:
+        return os.stat(os.path.join(os.getcwd(), filename)).st_mtime_ns
+    except OSError:
+        return None
+
 
-    def __init__(self, filename="data/data.json"):
+class JsonData(object):
+    """
+    The config of the system, read from the json file once and held as an immutable snapshot, so reading an
+    attribute doesn't touch the file. Setting an attribute writes the whole config back once, or setting several
+    inside a transaction writes them together when it ends. With auto_reload, the snapshot is re-read whenever the
+    modified time of the file changes. Any overrides are held in memory over the snapshot, and are never written.
+    """
+
+    def __init__(self, filename="data/data.json", auto_reload=False, overrides=None):
+        """
+        :param filename: The path of the json file, relative to the working directory.
+        :param auto_reload: Whether to re-read the file when it's changed by something else.
+        :param overrides: A dict of config values to use instead of those in the file, without changing it.
+        """
         # TODO make check for exists of given filename and make directorie(s) if not
         self._filename = filename
+        self.auto_reload = auto_reload
+        self._changes = None
+        self._overrides = dict(overrides or {})
+        self.reload()
+
+    def reload(self):
+        """
+        Re-reads the snapshot from the json file.
+        """
+        self._mtime = _modified_time(self._filename)
+        self._snapshot = MappingProxyType(read_data(self._filename))
+
+    @property
+    def snapshot(self) -> MappingProxyType:
+        """
+        The immutable mapping of the config values, as last read or written.
+        """
+        if self.auto_reload and _modified_time(self._filename) != self._mtime:
+            self.reload()
+        return self._snapshot
+
+    @contextmanager
+    def transaction(self):
+        """
+        Batches the attributes set inside the with block, writing them to the file together once it ends, or
+        discarding them if it raises.
+        """
+        if self._changes is not None:
+            # already inside a transaction, which will write the changes.
+            yield self
+            return
+
+        self._changes = {}
+        try:
+            yield self
+            changes = self._changes
+        finally:
+            self._changes = None
+        if changes:
+            data = dict(self.snapshot)
+            data.update(changes)
+            self.write(data)
+
+    @property
+    def overrides(self) -> MappingProxyType:
+        """
+        The immutable mapping of the config values held in memory over the file.
+        """
+        return MappingProxyType(self._overrides)
+
+    def _get(self, key: str):
+        if key in self._overrides:
+            return self._overrides[key]
+        if self._changes is not None and key in self._changes:
+            return self._changes[key]
+        return self.snapshot.get(key, _backup_default_data[key])
+
+    def _set(self, key: str, value):
+        if key in self._overrides:
+            # overridden values stay in memory.
+            self._overrides[key] = value
+            return
+        if self._changes is not None:
+            self._changes[key] = value
+            return
+        data = dict(self.snapshot)
+        data[key] = value
+        self.write(data)
 
     def write(self, data: dict):
-        label = data.get("label", _backup_default_data["label"])
-        start = data.get("start", _backup_default_data["start"])
-        stop = data.get("stop", _backup_default_data["stop"])
-        num_states = data.get("num_states", _backup_default_data["num_states"])
-        num_dimensions = data.get("num_dimensions", _backup_default_data["num_dimensions"])
-        num_samples = data.get("num_samples", _backup_default_data["num_samples"])
-        num_iterations = data.get("num_iterations", _backup_default_data["num_iterations"])
-        potential_name = data.get("potential_name", _backup_default_data["potential_name"])
-        plot_with_potential = data.get("plot_with_potential", _backup_default_data["plot_with_potential"])
-        plot_scale = data.get("plot_scale", _backup_default_data["plot_scale"])
-        cmap = data.get("colourmap", _backup_default_data["colourmap"])
-
-        write_data(label, start, stop, num_states, num_dimensions, num_samples, num_iterations,
-                   potential_name, plot_with_potential, plot_scale, cmap, filename=self._filename)
+        # keep only the known keys, filling in any missing ones with their defaults.
+        data = {key: data.get(key, default) for key, default in _backup_default_data.items()}
+        write_json(data, self._filename)
+        self._snapshot = MappingProxyType(data)
+        self._mtime = _modified_time(self._filename)
 
     def read(self):
-        return read_data(self._filename)
+        data = dict(self.snapshot)
+        data.update(self._overrides)
+        return data
 
     @property
     def label(self):
-        return self.read().get("label", _backup_default_data["label"])
+        return self._get("label")
 
     @label.setter
     def label(self, l: str):
-        data = self.read()
-        data["label"] = l
-        self.write(data)
+        self._set("label", l)
 
     @property
     def start(self):
-        return self.read().get("start", _backup_default_data["start"])
+        return self._get("start")
 
     @start.setter
     def start(self, s):
-        data = self.read()
-        data["start"] = s
-        self.write(data)
+        self._set("start", s)
 
     @property
     def stop(self):
-        return self.read().get("stop", _backup_default_data["stop"])
+        return self._get("stop")
 
     @stop.setter
     def stop(self, s):
-        data = self.read()
-        data["stop"] = s
-        self.write(data)
+        self._set("stop", s)
 
     @property
     def num_states(self):
-        return self.read().get("num_states", _backup_default_data["num_states"])
+        return self._get("num_states")
 
     @num_states.setter
     def num_states(self, num):
-        data = self.read()
-        data["num_states"] = num
-        self.write(data)
+        self._set("num_states", num)
 
     @property
     def num_dimensions(self):
-        return self.read().get("num_dimensions", _backup_default_data["num_dimensions"])
+        return self._get("num_dimensions")
 
     @num_dimensions.setter
     def num_dimensions(self, dim):
-        data = self.read()
-        data["num_dimensions"] = dim
-        self.write(data)
+        self._set("num_dimensions", dim)
 
     @property
     def num_samples(self):
-        return self.read().get("num_samples", _backup_default_data["num_samples"])
+        return self._get("num_samples")
 
     @num_samples.setter
     def num_samples(self, num):
-        data = self.read()
-        data["num_samples"] = num
-        self.write(data)
+        self._set("num_samples", num)
 
     @property
     def num_iterations(self):
-        return self.read().get("num_iterations", _backup_default_data["num_iterations"])
+        return self._get("num_iterations")
 
     @num_iterations.setter
     def num_iterations(self, num):
-        data = self.read()
-        data["num_iterations"] = num
-        self.write(data)
+        self._set("num_iterations", num)
 
     @property
     def potential_name(self):
-        return self.read().get("potential_name", _backup_default_data["potential_name"])
+        return self._get("potential_name")
 
     @potential_name.setter
     def potential_name(self, name):
-        data = self.read()
-        data["potential_name"] = name
-        self.write(data)
+        self._set("potential_name", name)
 
     @property
     def plot_with_potential(self):
-        return self.read().get("plot_with_potential", _backup_default_data["plot_with_potential"])
+        return self._get("plot_with_potential")
 
     @plot_with_potential.setter
     def plot_with_potential(self, v):
-        data = self.read()
-        data["plot_with_potential"] = v
-        self.write(data)
+        self._set("plot_with_potential", v)
 
     @property
     def plot_scale(self):
-        return self.read().get("plot_scale", _backup_default_data["plot_scale"])
+        return self._get("plot_scale")
 
     @plot_scale.setter
     def plot_scale(self, sc):
-        data = self.read()
-        data["plot_scale"] = sc
-        self.write(data)
+        self._set("plot_scale", sc)
 
     @property
     def colourmap(self):
-        return self.read().get("colourmap", _backup_default_data["colourmap"])
+        return self._get("colourmap")
 
     @colourmap.setter
     def colourmap(self, cmap):
-        data = self.read()
-        data["colourmap"] = cmap
-        self.write(data)
+        self._set("colourmap", cmap)
+
+    @property
+    def solver(self):
+        return self._get("solver")
+
+    @solver.setter
+    def solver(self, name):
+        self._set("solver", name)
+
+    @property
+    def incremental_energy(self):
+        return self._get("incremental_energy")
+
+    @incremental_energy.setter
+    def incremental_energy(self, incremental):
+        self._set("incremental_energy", incremental)
+
+    @property
+    def basis(self):
+        return self._get("basis")
+
+    @basis.setter
+    def basis(self, generator):
+        self._set("basis", generator)
+
+    @property
+    def laplacian(self):
+        return self._get("laplacian")
+
+    @laplacian.setter
+    def laplacian(self, operator):
+        self._set("laplacian", operator)
+
+    @property
+    def use_separable(self):
+        return self._get("use_separable")
+
+    @use_separable.setter
+    def use_separable(self, separable):
+        self._set("use_separable", separable)
+
+    @property
+    def batch_size(self):
+        return self._get("batch_size")
+
+    @batch_size.setter
+    def batch_size(self, size):
+        self._set("batch_size", size)
+
+    @property
+    def num_workers(self):
+        return self._get("num_workers")
+
+    @num_workers.setter
+    def num_workers(self, workers):
+        self._set("num_workers", workers)
+
+    @property
+    def sync_interval(self):
+        return self._get("sync_interval")
+
+    @sync_interval.setter
+    def sync_interval(self, interval):
+        self._set("sync_interval", interval)
+
+    @property
+    def checkpoint_interval(self):
+        return self._get("checkpoint_interval")
+
+    @checkpoint_interval.setter
+    def checkpoint_interval(self, interval):
+        self._set("checkpoint_interval", interval)
+
+    @property
+    def checkpoint_file(self):
+        return self._get("checkpoint_file")
+
+    @checkpoint_file.setter
+    def checkpoint_file(self, filename):
+        self._set("checkpoint_file", filename)
+
+    @property
+    def result_cache_size(self):
+        return self._get("result_cache_size")
+
+    @result_cache_size.setter
+    def result_cache_size(self, size):
+        self._set("result_cache_size", size)
+
+    @property
+    def result_cache_dir(self):
+        return self._get("result_cache_dir")
+
+    @result_cache_dir.setter
+    def result_cache_dir(self, directory):
+        self._set("result_cache_dir", directory)
+
+    @property
+    def multigrid_levels(self):
+        return self._get("multigrid_levels")
+
+    @multigrid_levels.setter
+    def multigrid_levels(self, levels):
+        self._set("multigrid_levels", levels)
+
+    @property
+    def tolerance(self):
+        return self._get("tolerance")
+
+    @tolerance.setter
+    def tolerance(self, tol):
+        self._set("tolerance", tol)
+
+    @property
+    def convergence_window(self):
+        return self._get("convergence_window")
+
+    @convergence_window.setter
+    def convergence_window(self, window):
+        self._set("convergence_window", window)
+
+    @property
+    def metrics(self):
+        return self._get("metrics")
+
+    @metrics.setter
+    def metrics(self, enabled):
+        self._set("metrics", enabled)
+
+    @property
+    def metrics_file(self):
+        return self._get("metrics_file")
+
+    @metrics_file.setter
+    def metrics_file(self, filename):
+        self._set("metrics_file", filename)
+
+    @property
+    def dtype(self):
+        return self._get("dtype")
+
+    @dtype.setter
+    def dtype(self, dtype):
+        self._set("dtype", dtype)
+
+    @property
+    def potential_parameters(self):
+        return self._get("potential_parameters")
+
+    @potential_parameters.setter
+    def potential_parameters(self, parameters):
+        self._set("potential_parameters", parameters)
+
+    @property
+    def stencil_order(self):
+        return self._get("stencil_order")
+
+    @stencil_order.setter
+    def stencil_order(self, order):
+        self._set("stencil_order", order)
+
+    @property
+    def use_symmetry(self):
+        return self._get("use_symmetry")
+
+    @use_symmetry.setter
+    def use_symmetry(self, symmetry):
+        self._set("use_symmetry", symmetry)
+
+    @property
+    def boundary(self):
+        return self._get("boundary")
+
+    @boundary.setter
+    def boundary(self, boundary):
+        self._set("boundary", boundary)
+
 
 def write_default():
-    json_dat = JsonData("data/default_data.json")
-    json_dat.write(_backup_default_data)
+    write_json(_backup_default_data, "data/default_data.json")
 
 
 def read_default():
@@ -210,9 +462,9 @@ def read_default():
     if not os.path.exists("data/default_data.json"):
         write_default()
 
-    json_data = JsonData("data/default_data.json")
     try:
-        return json_data.read()
+        with open(os.path.join(os.getcwd(), "data/default_data.json")) as data_file:
+            return json.load(data_file)
     except json.JSONDecodeError as json_decoder_error:
         write_default()
-        return json_data.read()
+        return dict(_backup_default_data)
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+
+import logging
+
+
+def result_key(potential_source: bytes, settings: dict) -> str:
+    """
+    The content address of a computation, as a hash of the source of its potential and all of the settings that
+    determine its states.
+    :param potential_source: The source code of the potential module.
+    :param settings: The JSON serialisable settings of the computation.
+    :return: The hex digest of the computation.
+    """
+    digest = hashlib.sha256(potential_source)
+    digest.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResultCache(object):
+    """
+    A persistent store of computed states and energies, in a directory per result key holding psi.npy,
+    energies.npy and stats.npy, the convergence stats of each state. Hits are loaded memory-mapped, so they return
+    without reading the states into memory. The total size of the store is capped, evicting the least recently used
+    results first.
+    """
+
+    def __init__(self, directory="data/results", max_megabytes=512):
+        """
+        :param directory: The directory to store the results in.
+        :param max_megabytes: The maximum total size of the stored results, in megabytes.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.directory = os.path.join(os.getcwd(), directory)
+        self.max_bytes = int(max_megabytes * 1024 ** 2)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def load(self, key: str):
+        """
+        Looks up the result of a computation.
+        :param key: The result key of the computation.
+        :return: The memory-mapped array of the states, the array of their energies, and the array of the
+        convergence stats of each state as rows, or None if it isn't stored.
+        """
+        path = self._path(key)
+        try:
+            all_psi = np.load(os.path.join(path, "psi.npy"), mmap_mode="r")
+            all_E = np.load(os.path.join(path, "energies.npy"))
+        except (OSError, ValueError):
+            self.logger.debug("No stored result for %s.", key)
+            return None
+        try:
+            all_stats = np.load(os.path.join(path, "stats.npy"))
+        except (OSError, ValueError):
+            # a result stored without the stats, from a run that didn't converge to a tolerance.
+            all_stats = np.zeros((0, 0))
+
+        # mark the result as recently used.
+        os.utime(path)
+        self.logger.debug("Found the stored result for %s.", key)
+        return all_psi, all_E, all_stats
+
+    def store(self, key: str, all_psi: list, all_E: list, all_stats=()):
+        """
+        Stores the result of a computation, then evicts the least recently used results over the size cap.
+        :param key: The result key of the computation.
+        :param all_psi: The states of the computation, as grids.
+        :param all_E: The energies of the states.
+        :param all_stats: The convergence stats of each state, as tuples of numbers, if it converged to a tolerance.
+        """
+        all_psi = np.array(all_psi)
+        if all_psi.nbytes > self.max_bytes:
+            self.logger.debug("The result for %s is larger than the cache, not storing it.", key)
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        # write into a temporary directory, then move it into place, so a result is never half written.
+        tmp_path = self._path("tmp-" + uuid.uuid4().hex)
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, "psi.npy"), all_psi)
+        np.save(os.path.join(tmp_path, "energies.npy"), np.array(all_E, dtype=float))
+        np.save(os.path.join(tmp_path, "stats.npy"), np.array([tuple(stats) for stats in all_stats], dtype=float))
+
+        path = self._path(key)
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            # another process stored the same result first.
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        self.logger.debug("Stored the result for %s.", key)
+
+        self._evict()
+
+    def _evict(self):
+        """
+        Removes the least recently used results until the store fits the size cap.
+        """
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.is_dir() or entry.name.startswith("tmp-"):
+                continue
+            size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+            entries.append((entry.stat().st_mtime, size, entry.path))
+            total += size
+
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            self.logger.debug("Evicted the stored result at '%s'.", path)
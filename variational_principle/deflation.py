@@ -0,0 +1,136 @@
+import numpy as np
+import scipy.linalg as la
+
+import logging
+
+# The ways of generating the directions to change psi along that can be selected with the "basis" setting.
+generators = ("null_space", "grid", "bump")
+
+# Projected directions shorter than this lie in the span of the previous states, and are left unnormalised.
+_tolerance = 1e-12
+
+
+class NullSpaceBasis(object):
+    """
+    The dense orthonormal basis of the null space of the previous states, as a (N^D - k) x N^D matrix.
+    """
+
+    def __init__(self, prev_psi_linear: np.ndarray):
+        self.logger = logging.getLogger(__name__)
+        self.logger.debug("Calculating the dense null space of %d previous state(s).", len(prev_psi_linear))
+        self._basis = la.null_space(prev_psi_linear).T
+        # The products of a Hamiltonian with the basis vectors, calculated as each one is first sampled.
+        self._products = {}
+
+    def __len__(self):
+        return len(self._basis)
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        return self._basis[index]
+
+    def product(self, H, index: int, basis_vector: np.ndarray) -> np.ndarray:
+        """
+        The product of H with the basis vector of the given index, cached as the basis is fixed.
+        :param H: The operator to apply to the basis vector.
+        :param index: The index of the basis vector.
+        :param basis_vector: The basis vector of that index.
+        :return: H @ basis_vector
+        """
+        H_basis_vector = self._products.get(index)
+        if H_basis_vector is None:
+            H_basis_vector = self._products[index] = H @ basis_vector
+        return H_basis_vector
+
+
+class ProjectedBasis(object):
+    """
+    An implicit basis of the orthogonal complement of the previous states. Directions are generated cheaply,
+    either as unit grid vectors or as local bumps, and the previous states are projected out of them with a
+    k x N^D block, so the memory is O(k N^D) instead of O(N^2D).
+    """
+
+    def __init__(self, prev_psi_linear: np.ndarray, shape, generator="grid", allowed=None):
+        """
+        :param prev_psi_linear: The previous calculated psi states, as rows over the allowed points.
+        :param shape: The shape of the full grid of the system.
+        :param generator: How to generate the directions, either "grid" or "bump".
+        :param allowed: A boolean mask of the points of the full grid that the system is solved over, defaults
+        to every point. The basis vectors are linear column vectors over just these points.
+        """
+        self.logger = logging.getLogger(__name__)
+
+        if generator not in ("grid", "bump"):
+            raise ValueError("Unknown basis generator '{}', expected 'grid' or 'bump'.".format(generator))
+
+        self._shape = tuple(shape)
+        self._generator = generator
+        size = int(np.prod(self._shape))
+
+        if allowed is None:
+            allowed = np.ones(size, dtype=bool)
+        self._allowed = np.asarray(allowed, dtype=bool).reshape(size)
+        # The grid points the directions are centred on.
+        self._indices = np.flatnonzero(self._allowed)
+        size = len(self._indices)
+
+        # Only the non-zero previous states need projecting out.
+        prev_psi_linear = np.asarray(prev_psi_linear).reshape(-1, size)
+        prev_psi_linear = prev_psi_linear[np.any(prev_psi_linear != 0, axis=1)]
+        if len(prev_psi_linear):
+            # The orthonormal columns spanning the previous states.
+            self._Q = np.linalg.qr(prev_psi_linear.T)[0]
+        else:
+            self._Q = np.zeros((size, 0))
+        self.logger.debug("Projecting %d previous state(s) out of %d '%s' direction(s).", self._Q.shape[1],
+                          len(self._indices), generator)
+
+    def __len__(self):
+        return len(self._indices)
+
+    def _direction(self, index: int) -> np.ndarray:
+        if self._generator == "grid":
+            vector = np.zeros(len(self._indices))
+            vector[index] = 1
+            return vector
+
+        # a tent function spanning the neighbouring points along each axis, built on the full grid.
+        centre = self._indices[index]
+        vector = np.zeros(self._allowed.shape)
+        grid = vector.reshape(self._shape)
+        window = []
+        weights = np.ones(())
+        for c, n in zip(np.unravel_index(centre, self._shape), self._shape):
+            lo, hi = max(c - 1, 0), min(c + 2, n)
+            window.append(slice(lo, hi))
+            tent = np.array([0.5, 1, 0.5])[lo - c + 1:hi - c + 1]
+            weights = np.multiply.outer(weights, tent)
+        grid[tuple(window)] = weights
+        return vector[self._allowed]
+
+    def project(self, vector: np.ndarray) -> np.ndarray:
+        """
+        Projects the previous states out of a vector, in place.
+        :param vector: The linear column vector over the allowed points.
+        :return: (I - Q Q^T) vector
+        """
+        vector -= self._Q @ (self._Q.T @ vector)
+        return vector
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        vector = self._direction(index)
+        # project the previous states out of the direction, (I - Q Q^T) v
+        vector = self.project(vector)
+        norm = np.sqrt(np.dot(vector, vector))
+        if norm > _tolerance:
+            vector /= norm
+        return vector
+
+    def product(self, H, index: int, basis_vector: np.ndarray) -> np.ndarray:
+        """
+        The product of H with the basis vector of the given index, calculated afresh so the memory stays O(k N^D).
+        :param H: The operator to apply to the basis vector.
+        :param index: The index of the basis vector.
+        :param basis_vector: The basis vector of that index.
+        :return: H @ basis_vector
+        """
+        return H @ basis_vector
@@ -0,0 +1,65 @@
+from typing import NamedTuple
+
+import numpy as np
+
+import logging
+
+
+class GridEvent(NamedTuple):
+    """
+    The spatial grid of the system, sent once before anything else.
+    """
+    r: np.ndarray
+
+
+class PotentialEvent(NamedTuple):
+    """
+    The potential function of the system, sent once after the grid.
+    """
+    V: np.ndarray
+
+
+class StateEvent(NamedTuple):
+    """
+    A computed energy eigenstate, sent as soon as it's found, in order of energy.
+    """
+    index: int
+    psi: np.ndarray
+    energy: float
+
+
+class ProgressEvent(NamedTuple):
+    """
+    How many of the states have been computed so far.
+    """
+    completed: int
+    total: int
+
+
+class PipeAdapter(object):
+    """
+    Translates the events into the tuples written through the pipe by the original multiprocessing mode:
+    (r_key, r), (v_key, V), ("state_i", psi) followed by the bare energy E, ignoring progress.
+    """
+
+    def __init__(self, write_pipe, r_key: str, v_key: str):
+        """
+        :param write_pipe: A Connection object for a pipe to write computed data to.
+        :param r_key: The key to send the grid with.
+        :param v_key: The key to send the potential with.
+        """
+        self.logger = logging.getLogger(__name__)
+        self._write_pipe = write_pipe
+        self._r_key = r_key
+        self._v_key = v_key
+
+    def __call__(self, event):
+        if isinstance(event, GridEvent):
+            self._write_pipe.send((self._r_key, event.r))
+            self.logger.debug("Sent position array through pipe.")
+        elif isinstance(event, PotentialEvent):
+            self._write_pipe.send((self._v_key, event.V))
+            self.logger.debug("Sent potential array through pipe.")
+        elif isinstance(event, StateEvent):
+            self._write_pipe.send(("state_{}".format(event.index), event.psi))
+            self._write_pipe.send(event.energy)
@@ -0,0 +1,145 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+
+# The Metrics of the current run, None while the instrumentation is disabled.
+_current = None
+
+
+class Metrics(object):
+    """
+    The instrumentation of a run: the time spent in each phase, and for each state the accepted and rejected
+    moves of the walk and samples of its energy trajectory.
+    """
+
+    def __init__(self, sample_interval=1000):
+        """
+        :param sample_interval: The number of iterations between each sample of the energy trajectory.
+        """
+        self.sample_interval = max(int(sample_interval), 1)
+        self.phases = {}
+        self.states = []
+
+    def add_time(self, phase: str, seconds: float):
+        total = self.phases.get(phase)
+        if total is None:
+            self.phases[phase] = {"seconds": seconds, "calls": 1}
+        else:
+            total["seconds"] += seconds
+            total["calls"] += 1
+
+    def begin_state(self, n: int):
+        """
+        Starts recording the moves and trajectory of the next state.
+        :param n: The order of the state.
+        """
+        self.states.append({"state": n, "accepted": 0, "rejected": 0, "trajectory": []})
+
+    def record_moves(self, accepted: int, rejected: int):
+        if self.states:
+            self.states[-1]["accepted"] += int(accepted)
+            self.states[-1]["rejected"] += int(rejected)
+
+    def sample(self, iteration: int, E: float):
+        if self.states:
+            self.states[-1]["trajectory"].append([int(iteration), float(E)])
+
+    def as_dict(self) -> dict:
+        return {"phases": self.phases, "states": self.states}
+
+    def write(self, filename: str):
+        """
+        Writes the metrics to a json file.
+        :param filename: The path of the file, relative to the working directory.
+        """
+        filename = os.path.join(os.getcwd(), filename)
+        with open(filename, "w", encoding="utf-8") as metrics_file:
+            json.dump(self.as_dict(), metrics_file, indent=4)
+
+
+class _TimedOperator(object):
+    """
+    Forwards to an operator, adding the time spent in each product with it to a phase.
+    """
+
+    def __init__(self, operator, phase: str, metrics: Metrics):
+        self._operator = operator
+        self._phase = phase
+        self._metrics = metrics
+
+    def __matmul__(self, x):
+        t1 = time.perf_counter()
+        result = self._operator @ x
+        self._metrics.add_time(self._phase, time.perf_counter() - t1)
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._operator, name)
+
+
+def enable(sample_interval=1000) -> Metrics:
+    """
+    Starts recording the metrics of a new run.
+    :param sample_interval: The number of iterations between each sample of the energy trajectory.
+    :return: The Metrics of the run.
+    """
+    global _current
+    _current = Metrics(sample_interval)
+    return _current
+
+
+def disable():
+    """
+    Stops recording metrics.
+    :return: The Metrics that were being recorded, if any.
+    """
+    global _current
+    metrics, _current = _current, None
+    return metrics
+
+
+def current():
+    """
+    The Metrics being recorded, or None while disabled. Hot loops check this once, outside of the loop.
+    """
+    return _current
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Adds the time spent in the with block to a phase, when recording metrics.
+    :param name: The name of the phase.
+    """
+    metrics = _current
+    if metrics is None:
+        yield
+        return
+    t1 = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_time(name, time.perf_counter() - t1)
+
+
+def timed(operator, name="matvec"):
+    """
+    Wraps an operator to add the time of each product with it to a phase, when recording metrics.
+    :param operator: The sparse matrix or LinearOperator.
+    :param name: The name of the phase.
+    :return: The wrapped operator, or the operator itself while disabled.
+    """
+    if _current is None:
+        return operator
+    return _TimedOperator(operator, name, _current)
+
+
+def begin_state(n: int):
+    if _current is not None:
+        _current.begin_state(n)
+
+
+def record_moves(accepted: int, rejected: int):
+    if _current is not None:
+        _current.record_moves(accepted, rejected)
@@ -0,0 +1,70 @@
+import numpy as np
+
+import logging
+
+# The smallest number of points along an axis a coarse level can have.
+min_level_size = 8
+
+# The fraction of the iterations spent refining on each level above the coarsest.
+refinement_fraction = 0.25
+
+
+def level_sizes(N: int, num_levels: int) -> list:
+    """
+    The sizes of the grids of each level, halving from N, coarsest first.
+    :param N: The size of each axis of the finest grid.
+    :param num_levels: The number of levels, including the finest.
+    :return: The list of sizes of each axis on each level, coarsest first, dropping any that would be too small.
+    """
+    sizes = [N // 2 ** level for level in range(max(num_levels, 1))]
+    sizes = [N] + [size for size in sizes[1:] if size >= min_level_size]
+    return sizes[::-1]
+
+
+def level_iterations(num_iterations: int, level: int) -> int:
+    """
+    The number of iterations to spend on a level, the full number on the coarsest, where each iteration is cheap,
+    and a fraction of it refining on each finer level.
+    :param num_iterations: The number of iterations of a single level run.
+    :param level: The level, 0 for the coarsest.
+    :return: The number of iterations for the level.
+    """
+    if level == 0:
+        return num_iterations
+    return max(int(num_iterations * refinement_fraction), 1)
+
+
+def _interpolation_matrix(x_from: np.ndarray, x_to: np.ndarray) -> np.ndarray:
+    """
+    The matrix of the linear interpolation from the points x_from to the points x_to.
+    """
+    # each point of x_to lies between two neighbouring points of x_from.
+    upper = np.clip(np.searchsorted(x_from, x_to), 1, len(x_from) - 1)
+    lower = upper - 1
+    t = np.clip((x_to - x_from[lower]) / (x_from[upper] - x_from[lower]), 0, 1)
+
+    matrix = np.zeros((len(x_to), len(x_from)))
+    rows = np.arange(len(x_to))
+    matrix[rows, lower] = 1 - t
+    matrix[rows, upper] += t
+    return matrix
+
+
+def interpolate(psi: np.ndarray, x_from: np.ndarray, x_to: np.ndarray) -> np.ndarray:
+    """
+    Linearly interpolates a wavefunction from a grid with the axis points x_from to one with the points x_to,
+    one axis at a time.
+    :param psi: The wavefunction as a grid with len(x_from) points along every axis.
+    :param x_from: The points along each axis of the grid of psi.
+    :param x_to: The points along each axis of the grid to interpolate to.
+    :return: The interpolated wavefunction as a grid with len(x_to) points along every axis.
+    """
+
+    logger = logging.getLogger(__name__)
+    logger.debug("Interpolating a wavefunction from %d to %d points along each axis.", len(x_from), len(x_to))
+
+    matrix = _interpolation_matrix(x_from, x_to)
+    for ax in range(psi.ndim):
+        # interpolate along this axis, keeping it in place.
+        psi = np.moveaxis(np.tensordot(matrix, psi, axes=([1], [ax])), 0, ax)
+    return psi
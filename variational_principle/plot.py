@@ -11,6 +11,16 @@ th = {1: "st", 2: "nd", 3: "rd"}
 # a list of names for the 1st 10 axes.
 axes = ("x", "y", "z", "w", "q", "r", "s", "t", "u", "v")
 
+# The config shared by every plot, only re-read when 'data.json' changes.
+_config = None
+
+
+def _get_config() -> json_data.JsonData:
+    global _config
+    if _config is None:
+        _config = json_data.JsonData(auto_reload=True)
+    return _config
+
 
 def plot_system(r, all_psi : list, D, include_V=False, V=None, V_scale=1):
     """
@@ -39,7 +49,7 @@ def plot_system(r, all_psi : list, D, include_V=False, V=None, V_scale=1):
             logger.warning(e)
             raise e
 
-    sys_name = json_data.JsonData().label
+    sys_name = _get_config().label
     logger.debug("Plotting the %d energy eigenstate(s) for the system: '%s'", len(all_psi), sys_name)
 
     # If the system is 1D, plot a line
@@ -113,18 +123,14 @@ def plot_system(r, all_psi : list, D, include_V=False, V=None, V_scale=1):
 
         if include_V:
             title = "The Potential function for the {} along $x$, $y$ & $z$".format(sys_name)
-            N = V.shape[1]
-            D = len(V.shape)
-            V = V.reshape(N ** D)
+            V = V.reshape(V.size)
             _plot_3D_scatter(*r, V, title)
 
         num_states = len(all_psi)
         for n in range(num_states):
             title = "$\psi_{}$ for the {} along $x$, $y$ & $z$".format(n, sys_name)
 
-            N = all_psi[n].shape[1]
-            D = len(all_psi[n].shape)
-            psi = all_psi[n].reshape(N ** D)
+            psi = all_psi[n].reshape(all_psi[n].size)
 
             _plot_3D_scatter(*r, psi, title)
 
@@ -151,7 +157,7 @@ def _plot_line(x, y, title, ylabel="$\psi$", legend=None, filename=None, include
 
 # A method to plot the 2D system as a flat image.
 def _plot_img(x, y, z, title):
-    colour_map = json_data.JsonData().colourmap
+    colour_map = _get_config().colourmap
     cmap = plt.cm.get_cmap(colour_map)
     plt.contourf(x, y, z, cmap=cmap)
     plt.colorbar()
@@ -176,7 +182,7 @@ def _plot_wireframe(x, y, z, title, zlabel="$\psi$"):
 # A method to plot the 2D system as a surface plot.
 def _plot_surface(x, y, z, title, zlabel="$\psi$"):
 
-    colour_map = json_data.JsonData().colourmap
+    colour_map = _get_config().colourmap
     cmap = plt.cm.get_cmap(colour_map)
 
     fig = plt.figure()
@@ -193,7 +199,7 @@ def _plot_surface(x, y, z, title, zlabel="$\psi$"):
 # A method to plot the 3d system as a 3D scatter plot.
 def _plot_3D_scatter(x, y, z, vals, title):
 
-    colour_map = json_data.JsonData().colourmap
+    colour_map = _get_config().colourmap
 
     fig = plt.figure()
     ax = fig.gca(projection='3d')
@@ -1,14 +1,70 @@
 import numpy as np
+import hashlib
 import importlib
+import json
 import logging
 import os
 
+from variational_principle.calculus.operator_cache import OperatorCache
 
-def potential(r: np.ndarray, potential_name="harmonic_oscillator") -> np.ndarray:
+# The potentials evaluated on the grids of recent computations, keyed by their axes and parameters.
+_cache = OperatorCache("Potential", max_size=4)
+
+
+def open_grid(r: np.ndarray) -> list:
     """
-    The potential energy function of the system
+    Converts the full coordinate grid into an open grid, of one array per axis holding the coordinates along that
+    axis, shaped to broadcast against the other axes, so that no full sized copy of each axis is needed.
     :param r: The coordinate grid of the system for each axis.
+    :return: The list of broadcastable coordinate arrays for each axis.
+    """
+    D = r.shape[0]
+    grid = []
+    for i in range(D):
+        # the coordinates along this axis, holding every other axis at its first point.
+        index = [0] * D
+        index[i] = slice(None)
+        x = r[(i,) + tuple(index)]
+        shape = [1] * D
+        shape[i] = len(x)
+        grid.append(x.reshape(shape))
+    return grid
+
+
+def potential(r: np.ndarray, potential_name="harmonic_oscillator", dtype=None, parameters=None) -> np.ndarray:
+    """
+    The potential energy function of the system, reused from the cache for the same grid and parameters.
+    :param r: The coordinate grid of the system for each axis.
+    :param potential_name: The filename of the potential system to import and use.
+    :param dtype: The floating point type to return V in, defaults to the type the potential evaluates to.
+    :param parameters: A dict of keyword arguments to pass to the potential function, such as the depth of a well.
+    :return: The potential function V as a read only grid of values for each position.
+    """
+    grid = open_grid(r)
+
+    # the grid is identified by its axes, which are small next to the full grid.
+    axes = hashlib.sha1()
+    for x in grid:
+        axes.update(np.ascontiguousarray(x).view(np.uint8))
+    key = (potential_name, str(r.shape), r.dtype.str, str(dtype), json.dumps(parameters, sort_keys=True),
+           axes.hexdigest())
+
+    def build():
+        V = potential_from_grid(grid, potential_name, dtype, parameters)
+        # the cached potential is shared between computations, so it mustn't be changed in place.
+        V.flags.writeable = False
+        return V
+
+    return _cache.get(key, build)
+
+
+def potential_from_grid(grid: list, potential_name="harmonic_oscillator", dtype=None, parameters=None) -> np.ndarray:
+    """
+    The potential energy function of the system, evaluated on an open grid.
+    :param grid: The open grid of the system, as broadcastable coordinate arrays for each axis.
     :param potential_name: The filename of the potential system to import and use.
+    :param dtype: The floating point type to return V in, defaults to the type the potential evaluates to.
+    :param parameters: A dict of keyword arguments to pass to the potential function, such as the depth of a well.
     :return: The potential function V as a grid of values for each position.
     """
     logger = logging.getLogger(__name__)
@@ -24,17 +80,23 @@ def potential(r: np.ndarray, potential_name="harmonic_oscillator") -> np.ndarray
     except ModuleNotFoundError as e:
         logger.warning("Module '%s' not found, defaulting to '%s'." % (potential_name, default_potential_name))
         logger.warning(e)
-        return potential(r, default_potential_name)
+        return potential_from_grid(grid, default_potential_name, dtype)
 
     foo = getattr(module, potential_name)
-    V = foo(r)
+    V = foo(grid, **(parameters or {}))
     if V is None and potential_name != default_potential_name:
-        return potential(r, default_potential_name)
+        return potential_from_grid(grid, default_potential_name, dtype)
     elif V is None and potential_name == default_potential_name:
         logger.warning("V is None, even from default!")
         raise ValueError("Potential evaluating to None from potential file '{}.py'.".format(potential_name))
 
-    return V.sum(axis=0)
+    # potentials that don't depend on every axis are spread over the full grid.
+    shape = np.broadcast(*grid).shape
+    if np.shape(V) != shape:
+        V = np.array(np.broadcast_to(V, shape), dtype=dtype)
+    elif dtype is not None:
+        V = np.asarray(V, dtype=dtype)
+    return V
 
 
 def potential_display_name(potential_name):
@@ -60,6 +122,78 @@ def potential_display_name(potential_name):
     return display_name
 
 
+def is_separable(potential_name):
+    """
+    Whether the potential is declared separable, as a sum of the same one dimensional potential along each axis,
+    by setting separable = True in its module.
+    :param potential_name: The filename of the potential system.
+    :return: Whether the potential is separable.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    if potential_name not in list_potentials():
+        return False
+
+    path = "variational_principle.potential_handling.potentials."
+    try:
+        module = importlib.import_module(path + potential_name)
+    except ModuleNotFoundError as e:
+        logger.warning(e)
+        return False
+
+    return getattr(module, "separable", False)
+
+
+def reflection_axes(potential_name: str, D: int) -> tuple:
+    """
+    The axes the potential is declared to be unchanged by reflecting about the middle of the grid along, by setting
+    reflection_symmetric in its module, to True for every axis, or to a sequence of the axes.
+    :param potential_name: The filename of the potential system.
+    :param D: The number of axes in the system.
+    :return: The tuple of the symmetric axes, empty if it declares none.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    if potential_name not in list_potentials():
+        return ()
+
+    path = "variational_principle.potential_handling.potentials."
+    try:
+        module = importlib.import_module(path + potential_name)
+    except ModuleNotFoundError as e:
+        logger.warning(e)
+        return ()
+
+    declared = getattr(module, "reflection_symmetric", False)
+    if declared is True:
+        return tuple(range(D))
+    if not declared:
+        return ()
+    return tuple(ax for ax in declared if 0 <= ax < D)
+
+
+def potential_source(potential_name: str) -> bytes:
+    """
+    The source code of a potential module, followed by the source of any other potential modules it imports,
+    so that a change to any of them changes the result.
+    :param potential_name: The filename of the potential system.
+    :return: The source code as bytes.
+    """
+    if potential_name not in list_potentials():
+        potential_name = "harmonic_oscillator"
+
+    with open(full_potential_path(potential_name), "rb") as module_file:
+        source = module_file.read()
+
+    for name in sorted(list_potentials()):
+        if name != potential_name and ("potentials." + name).encode("utf-8") in source:
+            with open(full_potential_path(name), "rb") as module_file:
+                source += module_file.read()
+    return source
+
+
 def potentials_directory_path():
     current_path = __file__
     parent_path = os.path.dirname(current_path)
@@ -1,8 +1,8 @@
-import numpy as np
-
 display_name = "Anharmonic Oscillator"
+# The potential is a sum of the same one dimensional potential along each axis.
+separable = True
 
 
-def anharmonic_oscillator(r: np.ndarray):
-    V = r + 0.5 * r ** 2 + 0.25 * r ** 4
+def anharmonic_oscillator(r: list):
+    V = sum(x + 0.5 * x ** 2 + 0.25 * x ** 4 for x in r)
     return V
@@ -1,13 +1,14 @@
-import numpy as np
-
 display_name = "Central Potential"
+# The potential is a sum of the same one dimensional potential along each axis.
+separable = True
 
 
-def central_potential(r: np.ndarray, A=-10, B=1.5, C=8):
-    V_c = A * C * r ** -1
-    V_f = B * C ** 2 * r ** -2
+def central_potential(r: list, A=-10, B=1.5, C=8):
+    V = 0
+    for x in r:
+        V_c = A * C * x ** -1
+        V_f = B * C ** 2 * x ** -2
 
-    V = V_c + V_f
-    # V = np.sum(V, axis=0)
+        V = V + V_c + V_f
 
     return V
@@ -1,9 +1,6 @@
-import numpy as np
+def custom(r: list):
 
+    D = len(r)
+    N = [x.size for x in r]
 
-def custom(r: np.ndarray):
-
-    N = r.shape[1]
-    D = r.shape[0]
-
-    pass
\ No newline at end of file
+    pass
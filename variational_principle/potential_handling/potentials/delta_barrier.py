@@ -3,16 +3,11 @@ import numpy as np
 display_name = "Delta Barrier Potential"
 
 
-def delta_barrier(r: np.ndarray):
-    V = np.zeros(r.shape)
-    sub_V = V
-    while True:
-        sub_sub_V = sub_V[0]
-        if not type(sub_sub_V) is np.ndarray:
-            L = len(sub_V)
-            sub_V[L // 2] = -np.inf
-            break
-        else:
-            sub_V = sub_sub_V
+def delta_barrier(r: list):
+    shape = np.broadcast(*r).shape
+    V = np.zeros(shape)
+    # The barrier sits halfway along the last axis, at the first point of every other axis.
+    index = [0] * (len(shape) - 1) + [shape[-1] // 2]
+    V[tuple(index)] = -np.inf
 
     return V
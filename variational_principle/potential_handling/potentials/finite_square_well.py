@@ -2,7 +2,11 @@ import numpy as np
 from variational_principle.potential_handling.potentials.square_well import square_well
 
 display_name = "Finite Square Well"
+# The potential is a sum of the same one dimensional potential along each axis.
+separable = True
+# The potential is unchanged by reflecting any axis about the middle of a grid centred on the origin.
+reflection_symmetric = True
 
 
-def finite_square_well(r: np.ndarray):
-    return square_well(r, 10, perturbed=False)
+def finite_square_well(r: np.ndarray, V_0=10):
+    return square_well(r, V_0, perturbed=False)
@@ -1,8 +1,12 @@
 import numpy as np
 
 display_name = "Free Particle"
+# The potential is a sum of the same one dimensional potential along each axis.
+separable = True
+# The potential is unchanged by reflecting any axis about the middle of a grid centred on the origin.
+reflection_symmetric = True
 
 
-def free_particle(r: np.ndarray):
-    V = np.zeros(r.shape)
+def free_particle(r: list):
+    V = np.zeros(np.broadcast(*r).shape)
     return V
@@ -1,8 +1,10 @@
-import numpy as np
-
 display_name = "Linear Harmonic Oscillator"
+# The potential is a sum of the same one dimensional potential along each axis.
+separable = True
+# The potential is unchanged by reflecting any axis about the middle of a grid centred on the origin.
+reflection_symmetric = True
 
 
-def harmonic_oscillator(r: np.ndarray):
-    V = 0.5 * r ** 2
+def harmonic_oscillator(r: list, k=1):
+    V = sum(0.5 * k * x ** 2 for x in r)
     return V
@@ -2,6 +2,10 @@ import numpy as np
 from variational_principle.potential_handling.potentials.square_well import square_well
 
 display_name = "Infinite Square Well"
+# The potential is a sum of the same one dimensional potential along each axis.
+separable = True
+# The potential is unchanged by reflecting any axis about the middle of a grid centred on the origin.
+reflection_symmetric = True
 
 
 def infinite_square_well(r: np.ndarray):
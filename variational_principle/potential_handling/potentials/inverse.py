@@ -1,7 +1,7 @@
-import numpy as np
-
 display_name = "Inverse Potential"
+# The potential is a sum of the same one dimensional potential along each axis.
+separable = True
 
 
-def inverse(r: np.ndarray):
-    return r ** -1
+def inverse(r: list):
+    return sum(x ** -1 for x in r)
@@ -1,8 +1,9 @@
-import numpy as np
-from variational_principle.potential_handling.potentials.inverse import inverse
-
 display_name = "Squared Inverse Potential"
+# The potential is a sum of the same one dimensional potential along each axis.
+separable = True
+# The potential is unchanged by reflecting any axis about the middle of a grid centred on the origin.
+reflection_symmetric = True
 
 
-def inverse_square(r: np.ndarray):
-    return inverse(r) ** 2
+def inverse_square(r: list):
+    return sum(x ** -2 for x in r)
@@ -2,7 +2,9 @@ import numpy as np
 from variational_principle.potential_handling.potentials.square_well import square_well
 
 display_name = "Perturbed Finite Square Well"
+# The potential is a sum of the same one dimensional potential along each axis.
+separable = True
 
 
-def perturbed_finite_square_well(r: np.ndarray):
-    return square_well(r, 10, perturbed=True, perturbation=0.5)
+def perturbed_finite_square_well(r: np.ndarray, V_0=10, perturbation=0.5):
+    return square_well(r, V_0, perturbed=True, perturbation=perturbation)
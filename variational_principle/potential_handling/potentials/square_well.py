@@ -1,35 +1,26 @@
 import numpy as np
 
 
-def square_well(r: np.ndarray, V_0=10, well_fraction=3, perturbed=False, perturbation=0.5):
-    N = r.shape[1]
-    D = r.shape[0]
-
+def _well_profile(N: int, V_0, well_fraction: int) -> np.ndarray:
     third = N // well_fraction
 
     addition = int(abs((third - (N / well_fraction))) * well_fraction)
 
-    mid, bef = np.zeros(third + addition), np.linspace(V_0, V_0, third)
-    aft = bef.copy()
-    x_well = np.concatenate((bef, mid, aft))
-    wells = [x_well] * D
-    V = np.array(np.meshgrid(*wells, indexing="ij"))
-
-    # Correction of Corners:
-    V = V.reshape(D * (N ** D))
-
-    if perturbed:
-        # Perturbation
-        R = r.reshape(D * (N ** D))
-    for i in range(len(V)):
-        if V[i] > 0:
-            V[i] = V_0
+    # V_0 before and after the well, 0 across the middle.
+    x_well = np.full(N, V_0, dtype=float)
+    x_well[third:2 * third + addition] = 0
+    return x_well
+
+
+def square_well(r: list, V_0=10, well_fraction=3, perturbed=False, perturbation=0.5):
+    V = 0
+    for x in r:
+        x_well = _well_profile(x.size, V_0, well_fraction).reshape(x.shape)
+
         if perturbed:
             # Perturbation
-            if V[i] == 0:
-                V[i] += perturbation * R[i]
+            x_well = np.where(x_well == 0, perturbation * x, x_well)
 
-    shape = [D] + [N] * D
-    V = V.reshape(shape)
+        V = V + x_well
 
     return V
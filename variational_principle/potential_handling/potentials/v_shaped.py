@@ -1,7 +1,9 @@
-import numpy as np
-
 display_name = "V-shaped"
+# The potential is a sum of the same one dimensional potential along each axis.
+separable = True
+# The potential is unchanged by reflecting any axis about the middle of a grid centred on the origin.
+reflection_symmetric = True
 
 
-def v_shaped(r: np.ndarray):
-    return abs(r)
+def v_shaped(r: list):
+    return sum(abs(x) for x in r)
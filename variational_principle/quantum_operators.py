@@ -1,7 +1,16 @@
 import numpy as np
-from .calculus import laplacian as lap
-import scipy.integrate as intg
+from .calculus.operator_cache import OperatorCache
+from .calculus.laplacian import StencilLaplacian
+import scipy.sparse as sparse
+import scipy.sparse.linalg as sla
 
+try:
+    # the compiled routine behind scipy's CSR products, which can write into a buffer.
+    from scipy.sparse._sparsetools import csr_matvec
+except ImportError:
+    csr_matvec = None
+
+import hashlib
 import logging
 
 ##TODO change these global variables implementation
@@ -12,6 +21,9 @@ m = 9.1093819 * 10 ** -31  # 9.1093837015(28)x10^-31
 # factor used in calculation of energy
 factor = -(hbar ** 2) / (2 * m)
 
+# The assembled Hamiltonians, keyed by their Laplacian and the contents of their potential.
+_hamiltonian_cache = OperatorCache("Hamiltonian")
+
 
 def normalise(psi: np.ndarray, dr: float) -> np.ndarray:
     """
@@ -21,54 +33,201 @@ def normalise(psi: np.ndarray, dr: float) -> np.ndarray:
     :return: The normalised wavefunction
     """
 
-    logger = logging.getLogger(__name__)
-    logger.debug("Normalising energy eigenstate")
-
-    # integrate using the rectangular rule
-    psi_sq = psi * psi
-    # norm = psi_sq.sum() * dr
-
-    logger.debug("Performing integration")
-    norm = intg.trapz(psi_sq, dx=dr)
-    # norm = intg.simps(psi_sq, dx=dr)
-    # Since psi is displayed as |psi|^2, take the sqrt of the norm
-    norm_psi = psi / np.sqrt(norm)
-    logger.debug("Energy eigenstate normalised.")
+    # This runs on every iteration of the variational method, so it doesn't log, see the metrics module instead.
+
+    # The trapezoidal integral of psi^2 as a dot product, without allocating psi^2, only the result.
+    norm = trapezoid_dot(psi, psi, dr)
+    # Since psi is displayed as |psi|^2, take the sqrt of the norm, as a python float so psi keeps its precision.
+    norm_psi = psi / float(np.sqrt(norm))
     return norm_psi
 
 
-def energy(psi: np.ndarray, V: np.ndarray, dr: float) -> float:
+def normalise_in_place(psi: np.ndarray, dr: float) -> np.ndarray:
+    """
+    Normalises psi in place, without allocating any arrays.
+    :param psi: The wavefunction to normalise, as a linear column vector of floats.
+    :param dr: The grid spacing of the wavefunction.
+    :return: psi, normalised.
+    """
+    psi /= float(np.sqrt(trapezoid_dot(psi, psi, dr)))
+    return psi
+
+
+def energy(psi: np.ndarray, V: np.ndarray, dr: float, DEV2) -> float:
     """
     Calculates the energy eigenvalue of a given wavefunction psi in a given potential system V.
     :param psi: The wavefunction in the system.
-    :param V: The potential function of the system.
+    :param V: The potential function of the system, with the points of infinite potential removed.
     :param dr: The grid spacing in the system.
+    :param DEV2: The laplacian derivative operator of the system.
     :return: The energy eigenvalue E.
     """
 
-    logger = logging.getLogger(__name__)
-    logger.debug("Calculating energy eigenvalue for energy eigenstate.")
-
-    # The laplacian derivative matrix
-    DEV2 = lap.get_laplacian()
-    logger.debug("Retrieved Laplacian operator.")
+    # This runs on every iteration of the variational method, so it doesn't log, see the metrics module instead.
 
-    # when V is inf, wil get an invalid value error at runtime, not an issue, is sorted in filtering below:
-    Vp = V * psi
-    # filter out nan values in Vp
-    Vp = np.where(np.isfinite(Vp), Vp, 0)
-    logger.debug("Performed potential operation and filtered out Nan values.")
+    # The points of infinite potential are removed from the system before psi gets here, so V is finite.
+    # <psi|V|psi>, summed in one pass without allocating V * psi.
+    Vp = potential_energy(psi, V, dr)
 
     # Calculate the kinetic energy of the system
-    # DEV2 is the laplacian 2nd derivative matrix.
-    Tp = factor * (DEV2 @ psi)
-    logger.debug("Performed kinetic operation.")
-
-    # Return the integral of the KE and PE applied to psi, which is the energy.
-    H = psi * (Tp + Vp)
-    # return H.sum() * dr
-    I = intg.trapz(H, dx=dr)
-    logger.debug("Completed integration of Hamiltonian.")
-    return I
-    # return intg.simps(H, dx=dr)
+    # DEV2 is the laplacian 2nd derivative matrix, the product is the only array allocated.
+    Tp = factor * trapezoid_dot(psi, DEV2 @ psi, dr)
+
+    # The integral of the KE and PE applied to psi is the energy.
+    return Tp + Vp
+
+
+def trapezoid_dot(a: np.ndarray, b: np.ndarray, dr) -> float:
+    """
+    The trapezoidal integral of a * b, equal to trapz(a * b, dx=dr), as a dot product that doesn't allocate a * b.
+    Single precision vectors are accumulated in double precision.
+    :param a: The first linear column vector.
+    :param b: The second linear column vector.
+    :param dr: The grid spacing in the system, or the weight of each point, from trapezoid_weights, for vectors
+    over only part of the grid, whose ends aren't the ends of the grid.
+    :return: The integral.
+    """
+    if np.ndim(dr) == 1:
+        return float(np.einsum("i,i,i->", a, b, dr, dtype=np.float64))
+    if a.dtype == np.float64 and b.dtype == np.float64:
+        total = np.dot(a, b)
+    else:
+        # einsum casts each buffered chunk up, so the sum keeps double precision without a full sized copy.
+        total = np.einsum("i,i->", a, b, dtype=np.float64)
+    # the trapezoidal rule weights every point by dr, except the two ends which are halved.
+    return dr * (float(total) - 0.5 * (float(a[0]) * float(b[0]) + float(a[-1]) * float(b[-1])))
+
+
+def potential_energy(psi: np.ndarray, V: np.ndarray, dr) -> float:
+    """
+    The trapezoidal integral of psi * V * psi, summed in one pass without allocating V * psi, in double precision.
+    :param psi: The wavefunction in the system.
+    :param V: The finite potential function of the system.
+    :param dr: The grid spacing in the system, or the weight of each point, from trapezoid_weights.
+    :return: The potential energy of psi.
+    """
+    if np.ndim(dr) == 1:
+        return float(np.einsum("i,i,i,i->", psi, V, psi, dr, dtype=np.float64))
+    total = float(np.einsum("i,i,i->", psi, V, psi, dtype=np.float64))
+    ends = float(psi[0]) ** 2 * float(V[0]) + float(psi[-1]) ** 2 * float(V[-1])
+    return dr * (total - 0.5 * ends)
+
+
+class EnergyKernel(object):
+    """
+    Evaluates the energy of wavefunctions in one system over and over without allocating, by applying the
+    laplacian into a preallocated work buffer and integrating with dot products.
+    """
+
+    def __init__(self, V: np.ndarray, dr: float, laplacian):
+        """
+        :param V: The potential function of the system, as a linear column vector of finite values.
+        :param dr: The grid spacing in the system, or the weight of each point, from trapezoid_weights.
+        :param laplacian: The laplacian derivative operator of the system.
+        """
+        self._V = V
+        self._dr = dr
+        self._laplacian = laplacian
+        # The buffer that each product with the laplacian is written into, in the precision of the system.
+        self._work = np.empty(len(V), dtype=np.result_type(V, laplacian.dtype))
+        self._apply = self._matvec_into(laplacian)
+
+    @staticmethod
+    def _matvec_into(laplacian):
+        """
+        A function applying the laplacian to a vector, writing into the work buffer, or None if the laplacian can
+        only allocate its result.
+        """
+        # the matrix-free stencil writes straight into a buffer.
+        if isinstance(laplacian, StencilLaplacian):
+            return laplacian.apply
+
+        # scipy doesn't expose a product into a buffer for its sparse matrices, so use the routine it uses itself.
+        if sparse.isspmatrix_csr(laplacian) and csr_matvec is not None:
+            rows, columns = laplacian.shape
+
+            def apply(x, out):
+                # csr_matvec adds the product to out.
+                out.fill(0)
+                csr_matvec(rows, columns, laplacian.indptr, laplacian.indices, laplacian.data, x, out)
+                return out
+
+            return apply
+
+        return None
+
+    def energy(self, psi: np.ndarray) -> float:
+        """
+        The energy of psi, equal to energy(psi, V, dr, laplacian).
+        :param psi: The wavefunction as a linear column vector of floats.
+        :return: The energy eigenvalue E.
+        """
+        if self._apply is None or psi.dtype != self._work.dtype:
+            laplacian_psi = self._laplacian @ psi
+        else:
+            laplacian_psi = self._apply(psi, self._work)
+        return factor * trapezoid_dot(psi, laplacian_psi, self._dr) + potential_energy(psi, self._V, self._dr)
+
+    def normalise(self, psi: np.ndarray) -> np.ndarray:
+        """
+        Normalises psi in place.
+        :param psi: The wavefunction as a linear column vector of floats.
+        :return: psi, normalised.
+        """
+        return normalise_in_place(psi, self._dr)
+
+
+def volume_element(dr) -> float:
+    """
+    The weight of each point in the integrals of normalise and energy, the grid spacing itself for an even grid,
+    or the volume of a cell, the product of the spacings along each axis, for a sequence of spacings.
+    :param dr: The grid spacing in the system, or a sequence of the spacing along each axis.
+    :return: The weight of each point.
+    """
+    if np.ndim(dr) == 0:
+        return float(dr)
+    return float(np.prod(dr))
+
+
+def trapezoid_weights(size: int, dr) -> np.ndarray:
+    """
+    The weights of the trapezoidal rule used by normalise and energy, so that trapz(f, dx=dr) == weights @ f.
+    Restricting the weights of the full grid to some of its points, weights[mask], keeps the weight of the points
+    next to the removed ones, which aren't ends of the grid.
+    :param size: The number of points in the linear column vector being integrated.
+    :param dr: The grid spacing in the system, or the weights of each point, which are returned as they are.
+    :return: The weights for each point.
+    """
+    if np.ndim(dr) == 1:
+        return np.asarray(dr, dtype=float)
+    weights = np.full(size, dr, dtype=float)
+    weights[0] = weights[-1] = 0.5 * dr
+    return weights
+
+
+def hamiltonian(V: np.ndarray, laplacian, key=None):
+    """
+    Assembles the sparse Hamiltonian matrix H = factor * DEV2 + diag(V) of the system.
+    :param V: The potential function of the system, as a linear column vector of finite values.
+    :param laplacian: The laplacian derivative operator of the system.
+    :param key: The cache key of the laplacian, if given the Hamiltonian is cached along with the potential.
+    :return: The Hamiltonian of the system as a sparse matrix, or a LinearOperator for a matrix-free laplacian.
+    """
+
+    if key is not None:
+        # The potential is keyed by its contents, so different potentials on the same grid don't collide.
+        digest = hashlib.sha1(np.ascontiguousarray(V).view(np.uint8)).hexdigest()
+        return _hamiltonian_cache.get((key, V.shape, digest), lambda: hamiltonian(V, laplacian))
+
+    logger = logging.getLogger(__name__)
+    logger.debug("Assembling the Hamiltonian operator.")
+
+    # The kinetic part is the scaled laplacian, the potential part is diagonal in the position basis.
+    potential_operator = sparse.diags(V, 0, shape=laplacian.shape)
+    if not sparse.issparse(laplacian):
+        logger.debug("Laplacian is matrix-free, composing a Hamiltonian operator.")
+        return factor * laplacian + sla.aslinearoperator(potential_operator)
 
+    H = factor * laplacian + potential_operator
+    logger.debug("Assembled Hamiltonian of size %d.", H.shape[0])
+    return H.tocsr()
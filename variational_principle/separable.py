@@ -0,0 +1,55 @@
+import heapq
+from functools import reduce
+
+import numpy as np
+
+import logging
+
+
+def lowest_combinations(axis_energies: list, num_states: int) -> list:
+    """
+    Finds the combinations of one state per axis with the lowest total energies, as the energy of a separable
+    system is the sum of the energies of its one dimensional states.
+    :param axis_energies: The energies of the one dimensional states along each axis, each in ascending order.
+    :param num_states: The number of combinations to find.
+    :return: The list of (energy, indices) of the lowest combinations in ascending order of energy, where indices
+    holds the index of the state along each axis.
+    """
+
+    logger = logging.getLogger(__name__)
+    logger.debug("Finding the %d lowest combination(s) of the states along %d axes.", num_states,
+                 len(axis_energies))
+
+    D = len(axis_energies)
+    first = (0,) * D
+    # A heap of the candidate combinations, starting from the lowest state along every axis.
+    candidates = [(sum(E[0] for E in axis_energies), first)]
+    seen = {first}
+
+    combinations = []
+    while candidates and len(combinations) < num_states:
+        E, indices = heapq.heappop(candidates)
+        combinations.append((E, indices))
+
+        # the next candidates raise the state along one of the axes.
+        for ax in range(D):
+            if indices[ax] + 1 >= len(axis_energies[ax]):
+                continue
+            next_indices = indices[:ax] + (indices[ax] + 1,) + indices[ax + 1:]
+            if next_indices in seen:
+                continue
+            seen.add(next_indices)
+            next_E = sum(axis_energies[a][i] for a, i in enumerate(next_indices))
+            heapq.heappush(candidates, (next_E, next_indices))
+
+    return combinations
+
+
+def tensor_product(axis_states: list, indices: tuple) -> np.ndarray:
+    """
+    Builds the wavefunction of a separable system as the product of one dimensional states along each axis.
+    :param axis_states: The one dimensional states along each axis.
+    :param indices: The index of the state to use along each axis.
+    :return: The wavefunction as a grid.
+    """
+    return reduce(np.multiply.outer, (axis_states[ax][i] for ax, i in enumerate(indices)))
@@ -0,0 +1,138 @@
+import numpy as np
+import scipy.linalg as la
+import scipy.sparse as sparse
+import scipy.sparse.linalg as sla
+
+import variational_principle.quantum_operators as qo
+import variational_principle.calculus.laplacian as lap
+
+import logging
+
+# The names of the sparse eigensolver backends that can be selected with the "solver" setting.
+solvers = ("eigsh", "lobpcg")
+
+# Systems smaller than this are diagonalised densely, the iterative solvers gain nothing there.
+dense_limit = 500
+
+# Seed for the random initial block given to LOBPCG, for repeatable results.
+seed = 1729
+
+# The largest residual norm, relative to the eigenvalue, of an eigenpair from LOBPCG before it's solved again with
+# ARPACK, as LOBPCG only warns when it stops without converging.
+residual_tolerance = 1e-6
+
+
+def lower_bound(H) -> float:
+    """
+    A lower bound of the spectrum of a sparse hermitian matrix, from the Gershgorin discs of its rows: every
+    eigenvalue is at least the smallest diagonal element less the sum of the magnitudes of the rest of its row.
+    For a Hamiltonian this is close to the minimum of the potential, where the diagonal alone is not a bound.
+    :param H: The sparse, hermitian matrix.
+    :return: The lower bound.
+    """
+    H = sparse.csr_matrix(H)
+    diagonal = H.diagonal()
+    radii = np.asarray(abs(H).sum(axis=1)).ravel() - np.abs(diagonal)
+    return float(np.min(diagonal.real - radii))
+
+
+def lowest_eigenpairs(H, num_states: int, solver="eigsh") -> (np.ndarray, np.ndarray):
+    """
+    Finds the lowest energy eigenvalues and eigenvectors of a sparse Hamiltonian in a single call.
+    :param H: The sparse, hermitian Hamiltonian of the system, or a LinearOperator for it.
+    :param num_states: The number of eigenpairs to find.
+    :param solver: The name of the sparse solver backend, either "eigsh" or "lobpcg".
+    :return: The eigenvalues in ascending order, and the corresponding eigenvectors as columns.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    if solver not in solvers:
+        raise ValueError("Unknown sparse solver '{}', expected one of {}.".format(solver, solvers))
+
+    size = H.shape[0]
+
+    if size <= dense_limit or 5 * num_states >= size:
+        logger.debug("System of size %d is small, diagonalising densely.", size)
+        dense = H.toarray() if sparse.issparse(H) else H @ np.eye(size)
+        E, psi = la.eigh(dense, subset_by_index=[0, num_states - 1])
+
+    elif solver == "eigsh" and not sparse.issparse(H):
+        # There's no matrix to factorise for the shift-invert mode, so search for the smallest directly.
+        logger.debug("Solving for %d eigenpair(s) with matrix-free ARPACK.", num_states)
+        E, psi = sla.eigsh(H, k=num_states, which="SA")
+
+    elif solver == "eigsh":
+        # Shifting below the whole spectrum makes the lowest eigenvalues the largest in magnitude for the
+        # shift-invert mode of ARPACK.
+        sigma = lower_bound(H) - 1
+        logger.debug("Solving for %d eigenpair(s) with ARPACK, using a shift of %f.", num_states, sigma)
+        E, psi = sla.eigsh(H, k=num_states, sigma=sigma, which="LM")
+
+    else:
+        logger.debug("Solving for %d eigenpair(s) with LOBPCG.", num_states)
+        rng = np.random.default_rng(seed)
+        X = rng.standard_normal((size, num_states)).astype(H.dtype)
+
+        M = None
+        if sparse.issparse(H):
+            # an incomplete factorisation of H shifted below its spectrum preconditions the lowest eigenvalues.
+            shifted = (H - (lower_bound(H) - 1) * sparse.identity(size, format="csr")).tocsc()
+            try:
+                ilu = sla.spilu(shifted)
+                M = sla.LinearOperator(H.shape, matvec=ilu.solve, dtype=H.dtype)
+            except RuntimeError as e:
+                logger.debug("Running LOBPCG without a preconditioner, the factorisation failed: %s", e)
+        E, psi = sla.lobpcg(H, X, M=M, largest=False, tol=1e-8, maxiter=max(1000, size // 5))
+
+        residuals = np.linalg.norm(H @ psi - psi * E, axis=0)
+        if np.any(residuals > residual_tolerance * np.maximum(np.abs(E), 1)):
+            logger.warning("LOBPCG stopped with residual norms %s, solving with ARPACK instead.", residuals)
+            return lowest_eigenpairs(H, num_states, "eigsh")
+
+    # sort into ascending order of energy, as the iterative solvers don't guarantee an ordering.
+    order = np.argsort(E)
+    return E[order], psi[:, order]
+
+
+def compute_states(V: np.ndarray, dr: float, num_states: int, solver: str, laplacian_key: tuple) -> (list, list):
+    """
+    Calculates the lowest energy eigenstates of the system from the Hamiltonian directly.
+    Points where the potential is infinite are removed from the problem, so the wavefunction is 0 there.
+    :param V: The potential function of the system as a grid.
+    :param dr: The grid spacing in the system.
+    :param num_states: The number of energy eigenstates to compute.
+    :param solver: The name of the sparse solver backend, either "eigsh" or "lobpcg".
+    :param laplacian_key: The cache key of the Laplacian operator of the system.
+    :return: The list of normalised linear psi column vectors, and the list of their energies.
+    """
+
+    logger = logging.getLogger(__name__)
+    logger.debug("Computing %d energy eigenstate(s) with the '%s' solver.", num_states, solver)
+
+    V = V.reshape(V.size)
+
+    # Only solve over the points where the potential is finite.
+    finite = np.isfinite(V)
+    laplacian, _ = lap.get_restricted_laplacian(laplacian_key, finite)
+    H = qo.hamiltonian(V[finite], laplacian)
+
+    # There are at most as many eigenstates as there are points left in the system.
+    if num_states >= H.shape[0]:
+        logger.debug("Total number of states to calculate constrained from %d to %d, due to the system size.",
+                     num_states, H.shape[0] - 1)
+        num_states = H.shape[0] - 1
+
+    energies, states = lowest_eigenpairs(H, num_states, solver)
+
+    all_psi = []
+    all_E = []
+    for i in range(num_states):
+        # scatter the solution back onto the full grid.
+        psi = np.zeros(V.size)
+        psi[finite] = states[:, i]
+        all_psi.append(qo.normalise(psi, dr))
+        all_E.append(energies[i])
+
+    logger.debug("DONE computing energy eigenstate(s) with the '%s' solver.", solver)
+    return all_psi, all_E
@@ -0,0 +1,125 @@
+import asyncio
+import queue
+import threading
+
+import variational_principle.variation_method as vm
+import variational_principle.data_handling.computation_data as ci
+
+import logging
+
+# Marks the end of the stream of events.
+_done = object()
+
+
+class _Cancelled(Exception):
+    """
+    Raised in the computation thread to stop it once the consumer has stopped listening.
+    """
+
+
+def _start(computed_data: ci.ComputationData, put, cancelled: threading.Event) -> threading.Thread:
+    """
+    Starts the computation in a daemon thread, passing each event to put, followed by _done, or by the exception
+    that stopped the computation.
+    :param computed_data: a ComputedData object containing info required to set up calculation.
+    :param put: A function to pass each event to.
+    :param cancelled: Set when the consumer has stopped listening, to stop the computation at the next event.
+    :return: The started thread.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def listener(event):
+        if cancelled.is_set():
+            raise _Cancelled()
+        put(event)
+
+    def run():
+        try:
+            vm.compute(computed_data, listener=listener)
+        except _Cancelled:
+            logger.debug("Computation cancelled by the consumer.")
+            return
+        except BaseException as e:
+            put(e)
+            return
+        put(_done)
+
+    thread = threading.Thread(target=run, name="variational-principle-stream", daemon=True)
+    thread.start()
+    return thread
+
+
+def stream(computed_data: ci.ComputationData, max_pending=0):
+    """
+    Computes the system in a background thread, yielding the events as they are computed, so each state can be
+    processed while the next is still being computed.
+    :param computed_data: a ComputedData object containing info required to set up calculation.
+    :param max_pending: The maximum number of events to hold before the computation waits for the consumer,
+    0 for no limit.
+    :return: A generator of GridEvent, PotentialEvent, StateEvent and ProgressEvent objects.
+    """
+
+    logger = logging.getLogger(__name__)
+    logger.debug("Streaming the computation of the system.")
+
+    events = queue.Queue(max_pending)
+    cancelled = threading.Event()
+
+    def put(event):
+        # wait for room in the queue, unless the consumer has stopped listening.
+        while not cancelled.is_set():
+            try:
+                events.put(event, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    _start(computed_data, put, cancelled)
+
+    try:
+        while True:
+            event = events.get()
+            if event is _done:
+                return
+            if isinstance(event, BaseException):
+                raise event
+            yield event
+    finally:
+        # stops the computation if the consumer stops early.
+        cancelled.set()
+
+
+async def astream(computed_data: ci.ComputationData):
+    """
+    The asyncio variant of stream, computing the system in a background thread without blocking the event loop.
+    :param computed_data: a ComputedData object containing info required to set up calculation.
+    :return: An async iterator of GridEvent, PotentialEvent, StateEvent and ProgressEvent objects.
+    """
+
+    logger = logging.getLogger(__name__)
+    logger.debug("Streaming the computation of the system asynchronously.")
+
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    cancelled = threading.Event()
+
+    def put(event):
+        try:
+            loop.call_soon_threadsafe(events.put_nowait, event)
+        except RuntimeError:
+            # the event loop has closed, so nobody is listening any more.
+            cancelled.set()
+
+    _start(computed_data, put, cancelled)
+
+    try:
+        while True:
+            event = await events.get()
+            if event is _done:
+                return
+            if isinstance(event, BaseException):
+                raise event
+            yield event
+    finally:
+        cancelled.set()
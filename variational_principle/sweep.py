@@ -0,0 +1,173 @@
+import argparse
+import csv
+import itertools
+import json
+import logging
+import logging.config
+import math
+import os
+import time
+from collections import OrderedDict
+from multiprocessing import Pool
+
+import variational_principle.variation_method as vm
+from variational_principle.data_handling.json_data import JsonData
+from variational_principle.data_handling.computation_data import ComputationData
+
+# The config keys that determine the grid and its Laplacian, configurations sharing them run in the same worker,
+# so they reuse its cached operators and potentials.
+grid_keys = ("start", "stop", "num_samples", "num_dimensions", "laplacian", "dtype", "stencil_order",
+             "boundary")
+
+# The overrides of every configuration, so the jobs don't share checkpoint or metrics files, which they can still
+# override.
+job_defaults = {"checkpoint_interval": 0, "metrics": False}
+
+
+def expand(grid: dict) -> list:
+    """
+    The configurations of every combination of the values in a grid of overrides.
+    :param grid: A dict of config keys to the list of values to sweep over, or to a single value to hold fixed.
+    :return: The list of the overrides of each configuration.
+    """
+    keys = list(grid)
+    values = [value if isinstance(value, list) else [value] for value in grid.values()]
+    return [dict(zip(keys, combination)) for combination in itertools.product(*values)]
+
+
+def group_by_grid(configurations: list, filename="data/data.json") -> list:
+    """
+    Groups the configurations that share a grid, in the order each grid first appears.
+    :param configurations: The list of the overrides of each configuration.
+    :param filename: The config file the overrides apply on top of.
+    :return: The list of groups, each a list of (index, overrides) of the configurations on the same grid.
+    """
+    base = JsonData(filename).read()
+    groups = OrderedDict()
+    for index, overrides in enumerate(configurations):
+        grid = json.dumps([overrides.get(key, base.get(key)) for key in grid_keys])
+        groups.setdefault(grid, []).append((index, overrides))
+    return list(groups.values())
+
+
+def _tasks(groups: list, num_workers: int) -> list:
+    """
+    Splits the groups into contiguous chunks of at most an even share of the configurations each, so every worker
+    gets a task even when most of the configurations share a grid.
+    """
+    total = sum(len(group) for group in groups)
+    chunk_size = max(math.ceil(total / num_workers), 1)
+    return [group[i:i + chunk_size] for group in groups for i in range(0, len(group), chunk_size)]
+
+
+def _run_jobs(filename: str, jobs: list) -> list:
+    """
+    Runs the computation of each configuration in turn, in this process.
+    :param filename: The config file the overrides apply on top of, which is never written to.
+    :param jobs: The list of (index, overrides) of each configuration.
+    :return: The list of (index, overrides, energies, seconds, error) of each configuration.
+    """
+    logger = logging.getLogger(__name__)
+
+    results = []
+    for index, overrides in jobs:
+        data = ComputationData(filename=filename, overrides=dict(job_defaults, **overrides))
+        logger.debug("Running configuration %d: %s", index, overrides)
+        t1 = time.perf_counter()
+        error = ""
+        try:
+            vm.compute(data)
+        except Exception as e:
+            # one failing configuration doesn't stop the rest of the sweep.
+            logger.warning("Configuration %d failed: %s", index, e)
+            error = repr(e)
+        seconds = time.perf_counter() - t1
+        results.append((index, overrides, [float(E) for E in data.all_energy], seconds, error))
+    return results
+
+
+def write_table(results: list, filename="data/sweep.csv"):
+    """
+    Writes the energies of every configuration to a csv table, a row per configuration, with a column per override.
+    :param results: The list of (index, overrides, energies, seconds, error) of each configuration.
+    :param filename: The path of the csv file, relative to the working directory.
+    """
+    keys = []
+    for _, overrides, _, _, _ in results:
+        keys.extend(key for key in overrides if key not in keys)
+    num_states = max((len(energies) for _, _, energies, _, _ in results), default=0)
+
+    filename = os.path.join(os.getcwd(), filename)
+    with open(filename, "w", newline="", encoding="utf-8") as table_file:
+        writer = csv.writer(table_file)
+        writer.writerow(["index"] + keys + ["seconds", "error"] + ["E_{}".format(n) for n in range(num_states)])
+        for index, overrides, energies, seconds, error in sorted(results, key=lambda result: result[0]):
+            values = [json.dumps(overrides[key]) if isinstance(overrides.get(key), dict) else overrides.get(key, "")
+                      for key in keys]
+            writer.writerow([index] + values + [seconds, error] + energies)
+
+
+def run(grid: dict, filename="data/data.json", num_workers=0, output="data/sweep.csv") -> list:
+    """
+    Computes every configuration of a grid of overrides on top of the config file, over a pool of worker processes,
+    and writes their energies to a single table. The config file itself is never written to.
+    :param grid: A dict of config keys to the list of values to sweep over, or to a single value to hold fixed.
+    :param filename: The config file the overrides apply on top of.
+    :param num_workers: The maximum number of worker processes, 0 for one per CPU.
+    :param output: The path of the csv table to write, or None to only return the results.
+    :return: The list of (index, overrides, energies, seconds, error) of each configuration.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    configurations = expand(grid)
+    base = JsonData(filename).read()
+
+    # the block solver runs its own pool, which the daemonic workers of a pool can't, so it runs in this process.
+    def in_pool(overrides):
+        return overrides.get("solver", base.get("solver")) != "block"
+
+    in_process = [(i, overrides) for i, overrides in enumerate(configurations) if not in_pool(overrides)]
+    groups = [[(i, overrides) for i, overrides in group if in_pool(overrides)]
+              for group in group_by_grid(configurations, filename)]
+    groups = [group for group in groups if group]
+
+    num_workers = num_workers or os.cpu_count() or 1
+    tasks = _tasks(groups, num_workers)
+    logger.debug("Sweeping %d configuration(s) on %d grid(s) over %d worker(s).", len(configurations), len(groups),
+                 min(num_workers, len(tasks)))
+
+    results = []
+    if num_workers > 1 and len(tasks) > 1:
+        with Pool(processes=min(num_workers, len(tasks))) as pool:
+            for task_results in pool.starmap(_run_jobs, [(filename, task) for task in tasks]):
+                results.extend(task_results)
+    else:
+        for task in tasks:
+            results.extend(_run_jobs(filename, task))
+    results.extend(_run_jobs(filename, in_process))
+
+    if output is not None:
+        write_table(results, output)
+        logger.debug("Wrote the sweep results to '%s'.", output)
+    return sorted(results, key=lambda result: result[0])
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Computes the energies of every configuration of a grid of "
+                                                 "overrides on top of 'data/data.json', without changing it.")
+    parser.add_argument("grid", help="a json file of config keys to the list of values to sweep over.")
+    parser.add_argument("--config", default="data/data.json", help="the config file the overrides apply on top of.")
+    parser.add_argument("--workers", type=int, default=0, help="the number of worker processes, 0 for one per CPU.")
+    parser.add_argument("--output", default="data/sweep.csv", help="the csv file to write the energies to.")
+    arguments = parser.parse_args(args)
+
+    logging.config.dictConfig(json.load(open("data/logging.json", "r")))
+
+    with open(arguments.grid, "r", encoding="utf-8") as grid_file:
+        grid = json.load(grid_file)
+    run(grid, arguments.config, arguments.workers, arguments.output)
+
+
+if __name__ == "__main__":
+    main()
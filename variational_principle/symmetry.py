@@ -0,0 +1,78 @@
+import itertools
+
+import numpy as np
+
+import variational_principle.calculus.laplacian as lap
+
+import logging
+
+
+def symmetric_axes(V: np.ndarray, declared: tuple) -> tuple:
+    """
+    The declared symmetric axes of a potential that it's unchanged by reflecting along on this grid, up to the round
+    off of the grid points, as an off centre grid, or a well that doesn't fit it evenly, breaks the symmetry the
+    potential declares.
+    :param V: The potential function of the system as a grid.
+    :param declared: The axes the potential declares itself symmetric along.
+    :return: The tuple of the axes the potential is symmetric along.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    axes = []
+    for ax in declared:
+        if _mirrored(V, np.flip(V, axis=ax)):
+            axes.append(ax)
+        else:
+            logger.debug("The potential isn't symmetric along axis %d on this grid.", ax)
+    return tuple(axes)
+
+
+def _mirrored(V: np.ndarray, flipped: np.ndarray, rtol=1e-10) -> bool:
+    """
+    Whether a potential matches its reflection, with the infinite points in the same places, and the finite points
+    equal up to the relative tolerance, as the points of a linspace grid aren't exactly mirrored.
+    """
+    finite = np.isfinite(V)
+    if not np.array_equal(finite, np.isfinite(flipped)) or not np.array_equal(V[~finite], flipped[~finite]):
+        return False
+    scale = np.max(np.abs(V[finite]), initial=0.0)
+    return np.allclose(V[finite], flipped[finite], rtol=rtol, atol=rtol * scale)
+
+
+def sectors(axes: tuple) -> list:
+    """
+    The parities of every symmetry sector, even or odd along each symmetric axis.
+    :param axes: The symmetric axes.
+    :return: The list of the parities of each sector, as tuples of 0 for even and 1 for odd along each axis,
+    starting from the sector that's even along every axis.
+    """
+    return list(itertools.product((0, 1), repeat=len(axes)))
+
+
+def sector_window(shape: tuple, axes: tuple, parities: tuple) -> tuple:
+    """
+    The slices of the full grid that hold the half grid of a symmetry sector, the first points along each folded
+    axis, which are mirrored onto the rest of the axis.
+    :param shape: The size of each axis of the full grid.
+    :param axes: The axes the grid is folded along.
+    :param parities: The parity of the sector along each of the axes, 0 for even and 1 for odd.
+    :return: The tuple of slices to index a grid with.
+    """
+    return tuple(slice(0, n) for n in lap.sector_shape(shape, axes, parities))
+
+
+def unfold(psi: np.ndarray, shape: tuple, axes: tuple, parities: tuple, projector=None) -> np.ndarray:
+    """
+    Unfolds a wavefunction on the half grid of a symmetry sector onto the full grid, mirroring it along each of
+    the folded axes, negated along the axes it's odd along.
+    :param psi: The wavefunction on the half grid of the sector.
+    :param shape: The size of each axis of the full grid.
+    :param axes: The axes the grid is folded along.
+    :param parities: The parity of the sector along each of the axes, 0 for even and 1 for odd.
+    :param projector: The sector_projector of the sector, if it's already built.
+    :return: The wavefunction as a grid of the given shape.
+    """
+    if projector is None:
+        projector = lap.sector_projector(shape, axes, parities)
+    return (projector @ psi.reshape(psi.size)).astype(psi.dtype, copy=False).reshape(shape)
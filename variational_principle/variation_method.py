@@ -1,90 +1,240 @@
+import multiprocessing
+import os
 import random
+from multiprocessing import Pool
 
 import numpy as np
-import scipy.linalg as la
 
 import variational_principle.quantum_operators as qo
+import variational_principle.deflation as dfl
+import variational_principle.sparse_solver as ss
+import variational_principle.block_method as bm
+import variational_principle.separable as sep
+import variational_principle.symmetry as sym
+import variational_principle.multigrid as mg
+import variational_principle.events as ev
+import variational_principle.checkpoint as cp
+import variational_principle.metrics as mt
 import variational_principle.calculus.laplacian as lap
 import variational_principle.potential_handling.potential as pot
 import variational_principle.data_handling.computation_data as ci
+import variational_principle.data_handling.result_cache as rc
+
+from typing import NamedTuple
 
 import logging
 import time
 
+# The bounds of the acceptance rate the adaptive walk keeps its step size between. The rate stays low even for a
+# well sized step, as the changes at the points where psi has died away only ever raise the energy.
+target_acceptance = (0.02, 0.3)
+# The smallest step size of the adaptive walk, the step doesn't shrink below it.
+min_step = 1e-5
+# The fraction of its norm a warm start has to keep once the previous states are taken out of it, below which the
+# walk starts from the quadratic guess instead.
+warm_start_fraction = 0.5
+
+
+class ConvergenceStats(NamedTuple):
+    """
+    How the adaptive walk converged for a state.
+    """
+    iterations: int
+    converged: bool
+    acceptance_rate: float
+    step: float
+    energy_change: float
+
 
-def nth_state(r: np.ndarray, v: np.ndarray, dr: float, D: int, N: int, num_iterations: int,
-              prev_psi_linear: np.ndarray, n: int) -> (np.ndarray, float):
+def nth_state(r: np.ndarray, v: np.ndarray, dr, D: int, N, num_iterations: int,
+              prev_psi_linear: np.ndarray, n: int, incremental=False, basis="null_space",
+              laplacian_key=None, batch_size=1, checkpoint=None, resume=None,
+              initial_psi=None, tolerance=0, window=1000, stats=None, weights=None) -> (np.ndarray, float):
     """
     Calculates the nth psi energy eigenstate wavefunction of a given potential system.
     :param r: The grid coordinates.
-    :param dr: The grid spacing.
+    :param dr: The grid spacing, or a sequence of the spacing along each axis.
     :param D: The number of axes in the system.
-    :param N: The size of each axis.
+    :param N: The size of each axis, or a sequence of the size of each axis.
     :param num_iterations: The number of iterations to calculate over.
     :param prev_psi_linear: The previous calculated psi states for the potential system.
     :param n: The order of the state.
+    :param incremental: Whether to update the energy incrementally instead of re-evaluating it every iteration.
+    :param basis: How to generate the directions orthogonal to the previous states, one of deflation.generators.
+    :param laplacian_key: The cache key of the Laplacian operator to use, defaults to the second order one for the grid.
+    :param batch_size: The number of candidate changes to evaluate together in each iteration of the batched walk.
+    :param checkpoint: The Checkpointer to periodically save the walk with, if any.
+    :param resume: The saved state of the walk to continue from, from Checkpointer.load, if any.
+    :param initial_psi: The wavefunction to start from as a grid, such as the state from a coarser grid, instead of
+    the quadratic guess.
+    :param tolerance: The relative change in energy over a window of iterations under which the walk stops,
+    0 to always run the full num_iterations.
+    :param window: The number of iterations to measure the change in energy and acceptance rate over.
+    :param stats: A list to append the ConvergenceStats of the adaptive walk to.
+    :param weights: The weight of each point of the grid in the integrals over it, defaults to the trapezoidal
+    weights of the grid.
     :return: The energy eigenstate wavefunction psi of order n for the potential system.
     """
 
     logger = logging.getLogger(__name__)
     logger.debug("Beginning computation of energy eigenstate.")
 
-    logger.debug("Calculating the orthonormal basis.")
-    # Get the orthonormal basis for this state, by finding the null space if the previous lower order psi
-    orthonormal_basis = la.null_space(prev_psi_linear).T
+    if laplacian_key is None:
+        laplacian_key = lap.laplacian_key(D, N, dr, dtype=v.dtype)
+
+    shape = lap.axis_sizes(D, N)
+    size = int(np.prod(shape))
+    # the weight of each point in the integrals over the grid.
+    dr = qo.volume_element(dr)
 
     logger.debug("Calculating the potential")
     # turn the potential grid into a linear column vector for linear algebra purposes.
-    V = v.reshape(N ** D)
+    V = v.reshape(size)
+
+    logger.debug("Removing the points of infinite potential from the system.")
+    # psi is always 0 where the potential is infinite, so only the finite points are solved over.
+    finite = np.isfinite(V)
+    with mt.phase("laplacian"):
+        laplacian, laplacian_key = lap.get_restricted_laplacian(laplacian_key, finite)
+    V_finite = V[finite]
+    prev_psi_finite = prev_psi_linear[:, finite]
+    # The finite points keep their weights in the integral over the whole grid, as the points next to an infinite
+    # wall aren't the ends of the grid, where the trapezoidal rule halves them.
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float).reshape(size)[finite]
+    elif np.all(finite):
+        weights = dr
+    else:
+        weights = qo.trapezoid_weights(size, dr)[finite]
+
+    logger.debug("Calculating the orthonormal basis.")
+    with mt.phase("null_space"):
+        if basis == "null_space":
+            # Get the orthonormal basis for this state, by finding the null space if the previous lower order psi
+            orthonormal_basis = dfl.NullSpaceBasis(prev_psi_finite)
+        else:
+            # Project the previous psi out of cheaply generated directions.
+            orthonormal_basis = dfl.ProjectedBasis(prev_psi_finite, shape, basis, allowed=finite)
 
     logger.debug("Setup default wavefunction.")
     # generate an initial psi, I've found that a quadratic function works nicely (no discontinuities.)
-    psi = (0.5 * r ** 2).sum(axis=0)
+    guess = (0.5 * r ** 2).sum(axis=0)
     # psi = np.ones(r.shape).sum(axis=0)
 
-    # linearise psi from a grid to a column vector
-    psi = psi.reshape(N ** D)
-
-    logger.debug("Filtering infinite values from the wavefunction, potential and orthonormal basis.")
-    # Account for infinite values in the potential:
-    len_V = len(V)
-    # Keep track of all the indices that have an inf value for the V.
-    nan_indices = [False] * len_V
-    for j in range(len_V):
-        # # Tag the bordering points as well.
-        # a, b = j - 1, j + 1
-        # if a < 0:
-        #     a = 0
-        # if b >= len_V:
-        #     b = len_V - 1
-        #
-        # if not np.isfinite(V[j]) and (not np.isfinite(V[a]) and not np.isfinite(V[b])):
-        #     # nan_indices[a] = nan_indices[j] = nan_indices[b] = True
-        #     nan_indices[j] = True
-        if not np.isfinite(V[j]):
-            nan_indices[j] = True
-
-    # filter the corresponding psi values to be = 0
-    psi = np.where(nan_indices, 0, psi)
-
-    # filter the values in the orthonormal basis to be 0
-    for j in range(n - 1):
-        nan_indices[j] = False
-    orthonormal_basis = np.where(nan_indices, 0, orthonormal_basis)
-
-    logger.debug("Calculating previous energy.")
-    # get a default initial energy to compare against.
-    prev_E = qo.energy(psi, V, dr)
+    # linearise psi from a grid to a column vector, over the finite points.
+    guess = guess.reshape(size)[finite]
 
-    # Keep track of the number of orthonormal bases that there are.
-    num_bases = len(orthonormal_basis)
+    if initial_psi is None:
+        psi = guess
+    else:
+        logger.debug("Starting from the given wavefunction.")
+        psi = np.array(initial_psi, dtype=V.dtype).reshape(size)[finite]
+        psi = _warm_start(psi, guess, prev_psi_finite, V_finite, weights, laplacian)
 
     logger.debug("Iterating over %d simulation(s)", num_iterations)
     t1 = time.time()
     logger.debug("Simulation began at [%s]", time.asctime())
 
+    mt.begin_state(n)
+    with mt.phase("iterations"):
+        if tolerance > 0:
+            psi, convergence = _adaptive_walk(psi, V_finite, weights, orthonormal_basis, num_iterations, tolerance,
+                                              window, laplacian, laplacian_key, checkpoint, resume)
+            logger.debug("%s", convergence)
+            if stats is not None:
+                stats.append(convergence)
+        elif batch_size > 1:
+            psi = _batched_walk(psi, V_finite, weights, orthonormal_basis, num_iterations, batch_size, laplacian,
+                                laplacian_key, checkpoint, resume)
+        elif incremental:
+            psi = _incremental_walk(psi, V_finite, weights, orthonormal_basis, num_iterations, laplacian,
+                                    laplacian_key, checkpoint, resume)
+        else:
+            psi = _random_walk(psi, V_finite, weights, orthonormal_basis, num_iterations, laplacian, checkpoint,
+                               resume)
+
+    t2 = time.time()
+    logger.debug("Simulation done at  [%s]", time.asctime())
+    logger.debug("Took %f second(s)", t2 - t1)
+
+    logger.debug("Calculating final energy of the eigenstate.")
+    # compute the energy of the resulted wavefunction
+    final_energy = qo.energy(psi, V_finite, weights, laplacian)
+
+    # scatter psi back onto the full grid, and turn it back from a column vector to a grid.
+    full_psi = np.zeros(size, dtype=psi.dtype)
+    full_psi[finite] = psi
+    psi = full_psi.reshape(shape)
+
+    logger.debug("Correcting the arbitrary phase of the computed eigenstate.")
+    psi = _correct_phase(psi, dr)
+
+    logger.debug("DONE oomputing energy eigenstate and eigenvalue")
+    # return the generated psi as a grid.
+    return psi, final_energy
+
+
+def _resume_walk(resume: dict) -> int:
+    """
+    Restores the random number generator to the state saved with a walk.
+    :param resume: The saved state of the walk, from Checkpointer.load.
+    :return: The iteration to continue the walk from.
+    """
+    logger = logging.getLogger(__name__)
+    logger.debug("Resuming the walk from iteration %d.", resume["iteration"])
+    random.setstate(resume["rng"])
+    return resume["iteration"]
+
+
+def _random_walk(psi: np.ndarray, V: np.ndarray, dr, orthonormal_basis, num_iterations: int,
+                 laplacian, checkpoint=None, resume=None) -> np.ndarray:
+    """
+    Lowers the energy of psi by randomly changing it along the orthonormal basis vectors, keeping the changes
+    that lower the energy, re-evaluating the energy in full on every iteration.
+    :param psi: The initial wavefunction as a linear column vector.
+    :param V: The potential function as a linear column vector.
+    :param dr: The grid spacing in the system, or the weight of each point, from trapezoid_weights.
+    :param orthonormal_basis: The basis vectors to change psi along, from the deflation module.
+    :param num_iterations: The number of iterations to calculate over.
+    :param laplacian: The Laplacian operator of the system.
+    :param checkpoint: The Checkpointer to periodically save the walk with, if any.
+    :param resume: The saved state of the walk to continue from, if any.
+    :return: The wavefunction psi of lowest energy found.
+    """
+
+    # get a default initial energy to compare against.
+    prev_E = qo.energy(psi, V, dr, laplacian)
+
+    first_iteration = 0
+    if resume is not None:
+        psi = resume["psi"].copy()
+        prev_E = float(resume["prev_E"])
+        first_iteration = _resume_walk(resume)
+
+    # Keep track of the number of orthonormal bases that there are.
+    num_bases = len(orthonormal_basis)
+
+    # The instrumentation, checked once here so the loop costs nothing extra while it's disabled.
+    metrics = mt.current()
+    laplacian = mt.timed(laplacian)
+    next_sample = first_iteration
+    accepted = 0
+
+    # psi is changed and normalised in place, and the energy evaluated into preallocated buffers, so the loop
+    # doesn't allocate any arrays.
+    psi = np.array(psi, dtype=V.dtype)
+    kernel = qo.EnergyKernel(V, dr, laplacian)
+    change = np.empty_like(psi)
+
     # loop for the desired number of iterations
-    for i in range(num_iterations):
+    for i in range(first_iteration, num_iterations):
+
+        if checkpoint is not None and checkpoint.due(i):
+            checkpoint.save(i, psi=psi, prev_E=prev_E)
+
+        if metrics is not None and i >= next_sample:
+            metrics.sample(i, prev_E)
+            next_sample = i + metrics.sample_interval
 
         # generate a random orthonormal basis to sample.
         rand_index = random.randrange(num_bases)
@@ -100,136 +250,664 @@ def nth_state(r: np.ndarray, v: np.ndarray, dr: float, D: int, N: int, num_itera
         basis_vector = orthonormal_basis[rand_index]
 
         # tweak the psi wavefunction by the generated change, with the given basis.
-        psi += basis_vector * rand_change
+        np.multiply(basis_vector, rand_change, out=change)
+        psi += change
         # re normalise the changed psi
-        psi = qo.normalise(psi, dr)
+        kernel.normalise(psi)
 
         # get the corresponding new energy for the changed psi
-        new_E = qo.energy(psi, V, dr)
+        new_E = kernel.energy(psi)
 
         # if the new energy is lower than the current energy, keep the change.
         if new_E < prev_E:
             prev_E = new_E
+            accepted += 1
         # otherwise set psi back to the way it was before the change.
         else:
-            psi -= basis_vector * rand_change
-            psi = qo.normalise(psi, dr)
+            psi -= change
+            kernel.normalise(psi)
 
-    t2 = time.time()
-    logger.debug("Simulation done at  [%s]", time.asctime())
-    logger.debug("Took %f second(s)", t2 - t1)
+    mt.record_moves(accepted, num_iterations - first_iteration - accepted)
+    return psi
 
-    logger.debug("Calculating final energy of the eigenstate.")
-    # compute the energy of the resulted wavefunction
-    final_energy = qo.energy(psi, V, dr)
 
-    # turn psi back from a column vector to a grid.
-    psi = psi.reshape([N] * D)
+def _incremental_walk(psi: np.ndarray, V: np.ndarray, dr, orthonormal_basis, num_iterations: int,
+                      laplacian, laplacian_key: tuple, checkpoint=None, resume=None) -> np.ndarray:
+    """
+    The same random walk as _random_walk, drawing the same random numbers and making the same acceptance
+    decisions, but psi is left unnormalised and the energy is found as the Rayleigh quotient <psi|H|psi>/<psi|psi>,
+    whose numerator and denominator are updated from H @ basis_vector and a few dot products on every change,
+    instead of applying the full Hamiltonian to psi.
+    :param psi: The initial wavefunction as a linear column vector.
+    :param V: The finite potential function as a linear column vector.
+    :param dr: The grid spacing in the system, or the weight of each point, from trapezoid_weights.
+    :param orthonormal_basis: The basis vectors to change psi along, from the deflation module.
+    :param num_iterations: The number of iterations to calculate over.
+    :param laplacian: The Laplacian operator of the system.
+    :param laplacian_key: The cache key of the Laplacian operator, to cache the Hamiltonian with.
+    :param checkpoint: The Checkpointer to periodically save the walk with, if any.
+    :param resume: The saved state of the walk to continue from, if any.
+    :return: The normalised wavefunction psi of lowest energy found.
+    """
 
-    logger.debug("Correcting the arbitrary phase of the computed eigenstate.")
-    # Correction of phase, to bring it to the positive for nicer plotting.
+    logger = logging.getLogger(__name__)
+    logger.debug("Updating the energy incrementally.")
+
+    H = qo.hamiltonian(V, laplacian, key=laplacian_key)
+    # The inner products use the same trapezoidal weights as the integrations in normalise and energy.
+    weights = qo.trapezoid_weights(len(psi), dr)
+
+    psi = psi.copy()
+    H_psi = H @ psi
+    numerator = np.dot(weights * psi, H_psi)
+    denominator = np.dot(weights * psi, psi)
+
+    # _random_walk starts from the unnormalised psi, so the first energy to compare against isn't a quotient.
+    prev_E = numerator
+    # The scale of the psi _random_walk would hold relative to this psi, it's normalised after the first change.
+    scale = 1.0
+
+    first_iteration = 0
+    if resume is not None:
+        psi = resume["psi"].copy()
+        H_psi = resume["H_psi"].copy()
+        numerator, denominator = float(resume["numerator"]), float(resume["denominator"])
+        prev_E, scale = float(resume["prev_E"]), float(resume["scale"])
+        first_iteration = _resume_walk(resume)
+
+    num_bases = len(orthonormal_basis)
+
+    # The instrumentation, as in _random_walk.
+    metrics = mt.current()
+    H = mt.timed(H)
+    next_sample = first_iteration
+    accepted = 0
+
+    for i in range(first_iteration, num_iterations):
+
+        if checkpoint is not None and checkpoint.due(i):
+            checkpoint.save(i, psi=psi, H_psi=H_psi, numerator=numerator, denominator=denominator, prev_E=prev_E,
+                            scale=scale)
+
+        if metrics is not None and i >= next_sample:
+            metrics.sample(i, prev_E)
+            next_sample = i + metrics.sample_interval
+
+        # draw the random numbers in the same order as _random_walk.
+        rand_index = random.randrange(num_bases)
+        rand_change = random.random() * 0.1 * (num_iterations - i) / num_iterations
+        if random.random() > 0.5:
+            rand_change *= -1
+
+        basis_vector = orthonormal_basis[rand_index]
+        H_basis_vector = orthonormal_basis.product(H, rand_index, basis_vector)
+
+        weighted_basis_vector = weights * basis_vector
+        b_psi = np.dot(weighted_basis_vector, psi)
+        b_b = np.dot(weighted_basis_vector, basis_vector)
+        # <b|H|psi> + <psi|H|b>, the trapezoidal weights make these differ at the end points.
+        b_H_psi = np.dot(weighted_basis_vector, H_psi) + np.dot(weights * psi, H_basis_vector)
+        b_H_b = np.dot(weighted_basis_vector, H_basis_vector)
+
+        # the change to the normalised psi, as a change to this unnormalised psi.
+        change = rand_change / scale
+        new_numerator = numerator + change * b_H_psi + change * change * b_H_b
+        new_denominator = denominator + 2 * change * b_psi + change * change * b_b
+        new_E = new_numerator / new_denominator
+
+        if new_E >= prev_E:
+            # _random_walk takes the change away again after normalising the changed psi, which doesn't quite
+            # return to the original psi, so follow it along the residual change.
+            norm = scale * np.sqrt(new_denominator)
+            change = rand_change * (1 - norm) / scale
+            new_numerator = numerator + change * b_H_psi + change * change * b_H_b
+            new_denominator = denominator + 2 * change * b_psi + change * change * b_b
+        else:
+            prev_E = new_E
+            accepted += 1
+
+        psi += change * basis_vector
+        H_psi += change * H_basis_vector
+        numerator = new_numerator
+        denominator = new_denominator
+        scale = 1 / np.sqrt(denominator)
+
+    mt.record_moves(accepted, num_iterations - first_iteration - accepted)
+    logger.debug("Materialising the normalised wavefunction.")
+    return qo.normalise(psi, dr)
+
+
+def _batched_walk(psi: np.ndarray, V: np.ndarray, dr, orthonormal_basis, num_iterations: int,
+                  batch_size: int, laplacian, laplacian_key: tuple, checkpoint=None, resume=None) -> np.ndarray:
+    """
+    Lowers the energy of psi by drawing blocks of batch_size random changes along the orthonormal basis vectors,
+    applying H to the whole block of basis vectors in one product, then trying the changes one after another as
+    _random_walk does, keeping each that lowers the energy. The inner products of the block with itself keep the
+    energies of the remaining changes exact after each kept change, so psi is only updated once per block.
+    :param psi: The initial wavefunction as a linear column vector.
+    :param V: The finite potential function as a linear column vector.
+    :param dr: The grid spacing in the system, or the weight of each point, from trapezoid_weights.
+    :param orthonormal_basis: The basis vectors to change psi along, from the deflation module.
+    :param num_iterations: The total number of candidate changes to try.
+    :param batch_size: The number of candidate changes to draw together.
+    :param laplacian: The Laplacian operator of the system.
+    :param laplacian_key: The cache key of the Laplacian operator, to cache the Hamiltonian with.
+    :param checkpoint: The Checkpointer to periodically save the walk with, if any.
+    :param resume: The saved state of the walk to continue from, if any.
+    :return: The normalised wavefunction psi of lowest energy found.
+    """
+
+    logger = logging.getLogger(__name__)
+    logger.debug("Evaluating the changes in batches of %d.", batch_size)
+
+    H = qo.hamiltonian(V, laplacian, key=laplacian_key)
+    # The inner products use the same trapezoidal weights as the integrations in normalise and energy.
+    weights = qo.trapezoid_weights(len(psi), dr)
+
+    # psi is kept normalised, so the numerator of the Rayleigh quotient is the energy.
+    psi = qo.normalise(psi, dr)
+    H_psi = H @ psi
+    prev_E = np.dot(weights * psi, H_psi)
+
+    first_iteration = 0
+    if resume is not None:
+        psi = resume["psi"].copy()
+        H_psi = resume["H_psi"].copy()
+        prev_E = float(resume["prev_E"])
+        first_iteration = _resume_walk(resume)
+
+    num_bases = len(orthonormal_basis)
+
+    # The instrumentation, as in _random_walk.
+    metrics = mt.current()
+    H = mt.timed(H)
+    next_sample = first_iteration
+    accepted = 0
+
+    for i in range(first_iteration, num_iterations, batch_size):
+        size = min(batch_size, num_iterations - i)
+
+        if checkpoint is not None and checkpoint.due(i):
+            checkpoint.save(i, psi=psi, H_psi=H_psi, prev_E=prev_E)
+
+        if metrics is not None and i >= next_sample:
+            metrics.sample(i, prev_E)
+            next_sample = i + metrics.sample_interval
+
+        # generate the random changes the same way as _random_walk, for every candidate in the batch.
+        rand_indices = [random.randrange(num_bases) for j in range(size)]
+        rand_changes = np.array([random.random() * 0.1 * (num_iterations - (i + j)) / num_iterations
+                                 for j in range(size)])
+        rand_changes[np.array([random.random() > 0.5 for j in range(size)])] *= -1
+
+        # the candidate basis vectors as columns, and H applied to all of them in one product.
+        basis_block = np.column_stack([orthonormal_basis[index] for index in rand_indices])
+        H_basis_block = H @ basis_block
+
+        weighted_block = weights[:, np.newaxis] * basis_block
+        b_psi = weighted_block.T @ psi
+        # <b|H|psi> + <psi|H|b>, the trapezoidal weights make these differ at the end points.
+        b_H_psi = weighted_block.T @ H_psi + H_basis_block.T @ (weights * psi)
+        # The inner products of every pair of candidates, <b_i|b_j> and <b_i|H|b_j> + <b_j|H|b_i>.
+        b_b = weighted_block.T @ basis_block
+        b_H_b = weighted_block.T @ H_basis_block
+        b_H_b = b_H_b + b_H_b.T
+
+        # psi and H psi after the kept changes are scale * (psi + basis_block @ coefficients), and the same of H_psi.
+        coefficients = np.zeros(size)
+        scale = 1.0
+        for j in range(size):
+            rand_change = rand_changes[j]
+            numerator = prev_E + rand_change * b_H_psi[j] + rand_change ** 2 * 0.5 * b_H_b[j, j]
+            denominator = 1 + 2 * rand_change * b_psi[j] + rand_change ** 2 * b_b[j, j]
+            new_E = numerator / denominator
+
+            if new_E < prev_E:
+                # keep the change, and renormalise, updating the inner products of the rest of the candidates.
+                norm = np.sqrt(denominator)
+                coefficients[j] += rand_change / scale
+                scale /= norm
+                b_psi = (b_psi + rand_change * b_b[:, j]) / norm
+                b_H_psi = (b_H_psi + rand_change * b_H_b[:, j]) / norm
+                prev_E = new_E
+                accepted += 1
+
+        if scale != 1.0:
+            psi += basis_block @ coefficients
+            psi *= scale
+            H_psi += H_basis_block @ coefficients
+            H_psi *= scale
+
+    mt.record_moves(accepted, num_iterations - first_iteration - accepted)
+    return psi
+
+
+def _adaptive_walk(psi: np.ndarray, V: np.ndarray, dr, orthonormal_basis, num_iterations: int,
+                   tolerance: float, window: int, laplacian, laplacian_key: tuple, checkpoint=None,
+                   resume=None) -> (np.ndarray, ConvergenceStats):
+    """
+    Lowers the energy of psi by random changes along the orthonormal basis vectors until it converges. After
+    every window of iterations, the step size grows if more than the target fraction of changes were accepted and
+    shrinks if fewer were, and the walk stops once the energy changed by less than the tolerance over the window.
+    :param psi: The initial wavefunction as a linear column vector.
+    :param V: The finite potential function as a linear column vector.
+    :param dr: The grid spacing in the system, or the weight of each point, from trapezoid_weights.
+    :param orthonormal_basis: The basis vectors to change psi along, from the deflation module.
+    :param num_iterations: The most iterations to run for.
+    :param tolerance: The relative change in energy over a window under which the walk has converged.
+    :param window: The number of iterations in each window.
+    :param laplacian: The Laplacian operator of the system.
+    :param laplacian_key: The cache key of the Laplacian operator, to cache the Hamiltonian with.
+    :param checkpoint: The Checkpointer to periodically save the walk with, if any.
+    :param resume: The saved state of the walk to continue from, if any.
+    :return: The normalised wavefunction psi of lowest energy found, and the ConvergenceStats of the walk.
+    """
+
+    logger = logging.getLogger(__name__)
+    logger.debug("Walking until the energy changes by less than %g over %d iterations.", tolerance, window)
+
+    H = qo.hamiltonian(V, laplacian, key=laplacian_key)
+    # The inner products use the same trapezoidal weights as the integrations in normalise and energy.
+    weights = qo.trapezoid_weights(len(psi), dr)
+
+    # psi is kept normalised, so the numerator of the Rayleigh quotient is the energy.
+    psi = qo.normalise(psi, dr)
+    H_psi = H @ psi
+    prev_E = np.dot(weights * psi, H_psi)
+
+    # the step starts as large as the first step of _random_walk.
+    step = 0.1
+    window = max(int(window), 1)
+    window_E = prev_E
+    accepted = 0
+    energy_change = np.inf
+    acceptance_rate = 0.0
+    converged = False
+
+    first_iteration = 0
+    if resume is not None:
+        psi = resume["psi"].copy()
+        H_psi = resume["H_psi"].copy()
+        prev_E, step = float(resume["prev_E"]), float(resume["step"])
+        window_E, accepted = float(resume["window_E"]), int(resume["accepted"])
+        first_iteration = _resume_walk(resume)
+
+    num_bases = len(orthonormal_basis)
+
+    # The instrumentation, as in _random_walk.
+    metrics = mt.current()
+    H = mt.timed(H)
+    next_sample = first_iteration
+    total_accepted = 0
+
+    i = first_iteration
+    while i < num_iterations:
+
+        if checkpoint is not None and checkpoint.due(i):
+            checkpoint.save(i, psi=psi, H_psi=H_psi, prev_E=prev_E, step=step, window_E=window_E,
+                            accepted=accepted)
+
+        if metrics is not None and i >= next_sample:
+            metrics.sample(i, prev_E)
+            next_sample = i + metrics.sample_interval
+
+        rand_index = random.randrange(num_bases)
+        rand_change = random.random() * step
+        if random.random() > 0.5:
+            rand_change *= -1
+
+        basis_vector = orthonormal_basis[rand_index]
+        H_basis_vector = orthonormal_basis.product(H, rand_index, basis_vector)
+
+        weighted_basis_vector = weights * basis_vector
+        numerator = prev_E + rand_change * (np.dot(weighted_basis_vector, H_psi) +
+                                            np.dot(weights * psi, H_basis_vector)) \
+            + rand_change ** 2 * np.dot(weighted_basis_vector, H_basis_vector)
+        denominator = 1 + 2 * rand_change * np.dot(weighted_basis_vector, psi) \
+            + rand_change ** 2 * np.dot(weighted_basis_vector, basis_vector)
+        new_E = numerator / denominator
+
+        if new_E < prev_E:
+            # keep the change, and renormalise.
+            norm = np.sqrt(denominator)
+            psi += rand_change * basis_vector
+            psi /= norm
+            H_psi += rand_change * H_basis_vector
+            H_psi /= norm
+            prev_E = new_E
+            accepted += 1
+            total_accepted += 1
+
+        i += 1
+        if i % window:
+            continue
+
+        # the end of a window, adapt the step to the acceptance rate, and check for convergence.
+        acceptance_rate = accepted / window
+        energy_change = window_E - prev_E
+        if acceptance_rate < target_acceptance[0]:
+            # the energy barely changes over a window with too big a step, which isn't convergence, so keep going.
+            step = max(0.5 * step, min_step)
+        else:
+            if acceptance_rate > target_acceptance[1]:
+                step = min(2 * step, 1.0)
+            if energy_change <= tolerance * abs(prev_E):
+                converged = True
+                break
+        window_E = prev_E
+        accepted = 0
+
+    if i % window:
+        # stopped part way through a window at the iteration cap.
+        acceptance_rate = accepted / (i % window)
+    mt.record_moves(total_accepted, i - first_iteration - total_accepted)
+    return psi, ConvergenceStats(i, converged, acceptance_rate, step, float(energy_change))
+
+
+def _warm_start(psi: np.ndarray, guess: np.ndarray, prev_psi: np.ndarray, V: np.ndarray, dr,
+                laplacian) -> np.ndarray:
+    """
+    The initial psi of a walk from a warm start, such as a state interpolated from a coarser grid, with the previous
+    states taken out of it, as the walk can't change psi along them. A warm start that was mostly along the previous
+    states leaves little but noise behind, so the quadratic guess, with the previous states taken out of it the same
+    way, starts the walk instead whenever the warm start loses most of its norm, or its energy is above the guess's.
+    :param psi: The warm start as a linear column vector over the finite points.
+    :param guess: The quadratic guess as a linear column vector over the finite points.
+    :param prev_psi: The previous states as linear column vectors over the finite points.
+    :param V: The finite potential function as a linear column vector.
+    :param dr: The grid spacing in the system, or the weight of each point, from trapezoid_weights.
+    :param laplacian: The Laplacian operator of the system.
+    :return: The normalised initial psi.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    norm = np.sqrt(qo.trapezoid_dot(psi, psi, dr))
+    prev_psi_nonzero = prev_psi[np.any(prev_psi != 0, axis=1)]
+    if len(prev_psi_nonzero):
+        Q = np.linalg.qr(prev_psi_nonzero.T)[0]
+        psi = psi - Q @ (Q.T @ psi)
+        guess = guess - Q @ (Q.T @ guess)
+    guess = qo.normalise(guess, dr)
+
+    residual = np.sqrt(qo.trapezoid_dot(psi, psi, dr))
+    if residual <= warm_start_fraction * norm:
+        logger.debug("The warm start was mostly along the previous states, starting from the quadratic guess.")
+        return guess
+
+    psi = qo.normalise(psi, dr)
+    if qo.energy(psi, V, dr, laplacian) > qo.energy(guess, V, dr, laplacian):
+        logger.debug("The warm start has a higher energy than the quadratic guess, starting from the guess.")
+        return guess
+    return psi
+
+
+def _correct_phase(psi: np.ndarray, dr: float) -> np.ndarray:
+    """
+    Correction of the arbitrary phase of psi, to bring it to the positive for nicer plotting.
+    :param psi: The wavefunction to correct.
+    :param dr: The grid spacing in the system.
+    :return: The wavefunction with a positive phase.
+    """
     phase = np.sum(psi) * dr
     if phase < 0:
         psi *= -1
+    return psi
 
-    logger.debug("DONE oomputing energy eigenstate and eigenvalue")
-    # return the generated psi as a grid.
-    return psi, final_energy
 
+def _publish_state(computed_data: ci.ComputationData, i: int, psi: np.ndarray, E: float, num_states: int,
+                   emit=None):
+    """
+    Stores a computed energy eigenstate and eigenvalue, and emits them as events if there is a listener.
+    :param computed_data: The ComputationData object to store the state in.
+    :param i: The order of the state.
+    :param psi: The energy eigenstate as a grid.
+    :param E: The energy eigenvalue of the state.
+    :param num_states: The total number of states being computed.
+    :param emit: A function to pass the StateEvent and ProgressEvent of the state to.
+    """
+    computed_data.add_psi(psi)
+    computed_data.add_energy(E)
 
-def calculate_r(computed_data):
+    if emit is not None:
+        emit(ev.StateEvent(i, psi, E))
+        emit(ev.ProgressEvent(i + 1, num_states))
 
-    start = computed_data.start
-    stop = computed_data.stop
-    N = computed_data.num_samples
+
+def _per_axis(value, D: int, name: str) -> tuple:
+    """
+    A config value for each axis, from either a single value shared by every axis or a list of one per axis.
+    :param value: The config value.
+    :param D: The number of axes in the system.
+    :param name: The name of the config key, for the error message.
+    :return: The tuple of the value along each axis.
+    """
+    if np.ndim(value) == 0:
+        return (value,) * D
+    if len(value) != D:
+        raise ValueError("Expected a '{}' for each of the {} axes, got {}.".format(name, D, len(value)))
+    return tuple(value)
+
+
+def _even(values: tuple):
+    """
+    The value shared by every axis if they're all the same, so an even grid is handled as it always has been,
+    otherwise the tuple of the value along each axis.
+    """
+    if len(set(values)) == 1:
+        return values[0]
+    return values
+
+
+def grid_axes(computed_data: ci.ComputationData) -> (tuple, tuple, tuple):
+    """
+    The extent and number of points along each axis of the grid, each of which can be set for every axis at once,
+    or as a list of one per axis.
+    :param computed_data: a ComputedData object containing info required to set up calculation.
+    :return: The tuples of the start, stop and number of points along each axis.
+    """
     D = computed_data.num_dimensions
+    starts = _per_axis(computed_data.start, D, "start")
+    stops = _per_axis(computed_data.stop, D, "stop")
+    sizes = tuple(int(n) for n in _per_axis(computed_data.num_samples, D, "num_samples"))
+    return starts, stops, sizes
+
 
-    x = np.linspace(start, stop, N)
-    # The axes along each dimension
-    axes = [x]
-    for i in range(D - 1):
-        axes.append(x)
+def calculate_r(computed_data):
+
+    starts, stops, sizes = grid_axes(computed_data)
+
+    # The axes along each dimension, the grid is stored in the configured precision, it's the largest array of
+    # the system. A periodic grid leaves out the stop point, which is the start point of the next cell.
+    dtype = _dtype(computed_data)
+    periodic = _boundary(computed_data) == "periodic"
+    axes = [np.linspace(start, stop, N, endpoint=not periodic, dtype=dtype)
+            for start, stop, N in zip(starts, stops, sizes)]
     # populate the grid using the axes.
     r = np.array(np.meshgrid(*axes, indexing="ij"))
     return r
 
 
-def compute(computed_data: ci.ComputationData, write_pipe=None) -> (
-        np.ndarray, np.ndarray, np.ndarray, np.ndarray):
+def _dtype(computed_data: ci.ComputationData) -> str:
     """
-    The method to set up the variables and system, and aggregate the computed wavefunctions.
+    The floating point type to store the system in, defaulting to double precision when unknown.
     :param computed_data: a ComputedData object containing info required to set up calculation.
-    :param write_pipe: A Connection object for a pipe to write computed data to if implementing multiprocessing.
-    :return: r, V, all_psi: the grid, potential function and the list of all the wavefunctions.
+    :return: The name of the type, one of laplacian.dtypes.
     """
+    dtype = computed_data.dtype
+    if dtype not in lap.dtypes:
+        logger = logging.getLogger(__name__)
+        logger.warning("Unknown dtype '%s', defaulting to 'float64'.", dtype)
+        dtype = "float64"
+    return dtype
 
-    start = computed_data.start
-    stop = computed_data.stop
-    N = computed_data.num_samples
-    D = computed_data.num_dimensions
-    num_states = computed_data.num_states
-    num_iterations = 10 ** computed_data.num_iterations
+
+def _boundary(computed_data: ci.ComputationData) -> str:
+    """
+    The boundary condition at the edges of the grid, defaulting to Dirichlet when unknown.
+    :param computed_data: a ComputedData object containing info required to set up calculation.
+    :return: The name of the boundary condition, one of laplacian.boundary_conditions.
+    """
+    boundary = computed_data.boundary
+    if boundary not in lap.boundary_conditions:
+        logger = logging.getLogger(__name__)
+        logger.warning("Unknown boundary condition '%s', defaulting to 'dirichlet'.", boundary)
+        boundary = "dirichlet"
+    return boundary
+
+
+def _solver_settings(computed_data: ci.ComputationData) -> dict:
+    """
+    Reads the settings of how to solve for the states from the ComputationData, replacing unknown values with
+    their defaults.
+    :param computed_data: a ComputedData object containing info required to set up calculation.
+    :return: The solver settings.
+    """
 
     logger = logging.getLogger(__name__)
-    logger.debug("Beginning computation of %d energy eigenstate(s).", num_states)
 
-    # Set a seed for repeatable results.
-    random.seed("THE-VARIATIONAL-PRINCIPLE")
+    solver = computed_data.solver
+    if solver not in ("variational", "block") and solver not in ss.solvers:
+        logger.warning("Unknown solver '%s', defaulting to 'variational'.", solver)
+        solver = "variational"
 
-    # Keep the number of states in bounds, so that the orthonormal basis generator doesn't return an error.
-    if num_states >= N:
-        logger.debug("Total number of states to calculate constrained from %d to %d, due to computational limitation.",
-                     num_states, N - 2)
-        num_states = N - 2
+    basis = computed_data.basis
+    if basis not in dfl.generators:
+        logger.warning("Unknown basis generator '%s', defaulting to 'null_space'.", basis)
+        basis = "null_space"
 
-    logger.debug("Generating spatial grid")
-    r = calculate_r(computed_data)
-    computed_data.r = r
+    stencil_order = computed_data.stencil_order
+    if stencil_order not in lap.stencil_orders:
+        logger.warning("Unsupported stencil order %s, defaulting to 2.", stencil_order)
+        stencil_order = 2
 
-    logger.debug("Generating potential.")
-    # generate the potential for the system
-    potential_name = computed_data.potential_name
-    V = pot.potential(r, potential_name)
-    computed_data.V = V
-    if write_pipe is not None:
-        write_pipe.send((computed_data.r_key, r))
-        logger.debug("Sent position array through pipe.")
-        write_pipe.send((computed_data.v_key, V))
-        logger.debug("Sent potential array through pipe.")
+    return {"solver": solver,
+            "num_iterations": 10 ** computed_data.num_iterations,
+            "incremental": computed_data.incremental_energy,
+            "basis": basis,
+            "matrix_free": computed_data.laplacian == "matrix_free",
+            "batch_size": max(int(computed_data.batch_size), 1),
+            "num_workers": max(int(computed_data.num_workers), 0),
+            "sync_interval": max(int(computed_data.sync_interval), 1),
+            "multigrid_levels": max(int(computed_data.multigrid_levels), 1),
+            "tolerance": max(float(computed_data.tolerance), 0.0),
+            "convergence_window": max(int(computed_data.convergence_window), 1),
+            "dtype": _dtype(computed_data),
+            "stencil_order": stencil_order,
+            "boundary": _boundary(computed_data)}
 
-    # Calculate the grid spacing for the symmetric grid.
-    dr = (stop - start) / N
-    logger.debug("The grid spacing of the system is: dr=%f", dr)
+
+def _solve_states(r: np.ndarray, V: np.ndarray, dr, D: int, N, num_states: int, settings: dict,
+                  publish=None, checkpoint=None, resume=None, initial_psi=None, stats=None,
+                  laplacian_key=None, weights=None) -> (list, list):
+    """
+    Finds the lowest energy eigenstates and eigenvalues of the system with the configured solver.
+    :param r: The grid coordinates.
+    :param V: The potential function of the system as a grid.
+    :param dr: The grid spacing in the system, or a sequence of the spacing along each axis.
+    :param D: The number of axes in the system.
+    :param N: The size of each axis, or a sequence of the size of each axis.
+    :param num_states: The number of states to find.
+    :param settings: The solver settings, from _solver_settings.
+    :param publish: A function of (i, psi, E) to call with each state as soon as it's found.
+    :param checkpoint: The Checkpointer to periodically save the progress of the variational method with, if any.
+    :param resume: The checkpoint to continue the variational method from, from Checkpointer.load, if any.
+    :param initial_psi: The list of wavefunctions to start the variational method for each state from, as grids,
+    any states beyond its end start from the quadratic guess.
+    :param stats: A list to append the ConvergenceStats of each state to, when converging to a tolerance.
+    :param laplacian_key: The cache key of the Laplacian operator to use, defaults to the configured one for the grid.
+    :param weights: The weight of each point of the grid in the integrals of the variational method, defaults to
+    the trapezoidal weights of the grid.
+    :return: The lists of the states as grids, and of their energies.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    solver = settings["solver"]
+    all_psi = []
+    all_E = []
 
     logger.debug("Generating the Laplacian operator for the system.")
-    # Generate the 2nd order finite difference derivative matrix.
-    lap.generate_laplacian(D, N, dr)
+    # Generate the 2nd order finite difference derivative matrix, or reuse it from the cache for the same grid.
+    if laplacian_key is None:
+        laplacian_key = lap.laplacian_key(D, N, dr, settings["stencil_order"], boundary=settings["boundary"],
+                                          matrix_free=settings["matrix_free"], dtype=settings["dtype"])
+    with mt.phase("laplacian"):
+        lap.get_laplacian_by_key(laplacian_key)
+
+    shape = lap.axis_sizes(D, N)
+    size = int(np.prod(shape))
+    # the weight of each point in the integrals over the grid.
+    volume = qo.volume_element(dr)
+
+    if solver in ss.solvers:
+        logger.debug("Computing all %d states at once with the '%s' solver.", num_states, solver)
+        all_psi_linear, energies = ss.compute_states(V, volume, num_states, solver, laplacian_key)
+        for i in range(len(all_psi_linear)):
+            psi = _correct_phase(all_psi_linear[i].reshape(shape), volume)
+            all_psi.append(psi)
+            all_E.append(energies[i])
+            if publish is not None:
+                publish(i, psi, energies[i])
+        return all_psi, all_E
+
+    if solver == "block":
+        logger.debug("Optimising all %d states at once as a block.", num_states)
+
+        def publish_grid(i, psi_linear, E):
+            psi = _correct_phase(psi_linear.reshape(shape), volume)
+            all_psi.append(psi)
+            all_E.append(E)
+            if publish is not None:
+                publish(i, psi, E)
+
+        bm.compute_states(V.reshape(size), volume if weights is None else weights, shape, num_states,
+                          settings["num_iterations"], laplacian_key, settings["num_workers"], settings["sync_interval"],
+                          publish_grid)
+        return all_psi, all_E
 
     # Keep track whether we are on the first iteration or not.
     first_iteration = True
-    # Set up two arrays to store the generated psi:
     # Stores the psi as linear column vectors, used for calculating the next psi in the series.
-    all_psi_linear = np.zeros((1, N ** D))
-    # stores in their proper shape as grids, used for plotting.
-    all_psi = []
-    all_E = []
+    all_psi_linear = np.zeros((1, size), dtype=settings["dtype"])
+    first_state = 0
+    walk = None
+
+    if resume is not None and resume["state"] > 0:
+        logger.debug("Restoring %d completed state(s) from the checkpoint.", resume["state"])
+        all_psi_linear = np.array(resume["completed_psi"])
+        first_iteration = False
+        for i in range(resume["state"]):
+            psi = all_psi_linear[i].reshape(shape)
+            all_psi.append(psi)
+            all_E.append(float(resume["completed_E"][i]))
+            if publish is not None:
+                publish(i, psi, all_E[i])
+        first_state = resume["state"]
+        if checkpoint is not None:
+            checkpoint.set_completed(all_psi_linear, all_E, save=False)
+    if resume is not None:
+        walk = resume["walk"]
+        if walk is None:
+            # continue the random numbers from where the last completed state left them.
+            random.setstate(resume["rng"])
 
     logger.debug("Beginning computation of %d states", num_states)
     # iterate over the number of states we want to generate psi for.
-    for i in range(num_states):
+    for i in range(first_state, num_states):
 
         logger.debug("Calculating the energy eigenstate and eigenvalue for state %d", i)
         logger.debug("=" * 10)
         # Generate the psi for this order number
-        psi, E = nth_state(r, V, dr, D, N, num_iterations, all_psi_linear, i + 1)
-
-        computed_data.add_psi(psi)
-        computed_data.add_energy(E)
+        psi, E = nth_state(r, V, dr, D, N, settings["num_iterations"], all_psi_linear, i + 1,
+                           settings["incremental"], settings["basis"], laplacian_key, settings["batch_size"],
+                           checkpoint, walk, initial_psi[i] if initial_psi and i < len(initial_psi) else None,
+                           settings["tolerance"], settings["convergence_window"], stats, weights)
+        # only the first state continues from a saved walk.
+        walk = None
 
-        if write_pipe is not None:
-            key = "state_{}".format(i)
-            write_pipe.send((key, psi))
-            write_pipe.send(E)
+        if publish is not None:
+            publish(i, psi, E)
 
         logger.debug("=" * 10)
         logger.debug("DONE generating energy eigenstate and eigenvalue")
@@ -239,17 +917,408 @@ def compute(computed_data: ci.ComputationData, write_pipe=None) -> (
         all_psi.append(psi)
         all_E.append(E)
 
-        psi_linear = psi.reshape(N ** D)
+        psi_linear = psi.reshape(size)
         if first_iteration:
             all_psi_linear = np.array([psi_linear])
             first_iteration = False
         else:
             all_psi_linear = np.vstack((all_psi_linear, [psi_linear]))
 
+        if checkpoint is not None:
+            checkpoint.set_completed(all_psi_linear, all_E)
+
+    return all_psi, all_E
+
+
+def _solve_multigrid(r: np.ndarray, dr: float, D: int, N: int, num_states: int, potential_name: str,
+                     settings: dict, publish=None, stats=None, potential_parameters=None) -> (list, list):
+    """
+    Finds the lowest energy eigenstates with the variational method on a series of grids, halving in size from
+    the finest, solving the coarsest first and interpolating each state up as the initial psi of that state on
+    the next grid, so the finer grids only spend iterations refining them.
+    :param r: The grid coordinates of the finest grid.
+    :param dr: The grid spacing of the finest grid.
+    :param D: The number of axes in the system.
+    :param N: The size of each axis of the finest grid.
+    :param num_states: The number of states to find.
+    :param potential_name: The name of the potential of the system.
+    :param settings: The solver settings, from _solver_settings.
+    :param publish: A function of (i, psi, E) to call with each state of the finest grid as soon as it's found.
+    :param stats: A list to append the ConvergenceStats of each state on the finest grid to.
+    :param potential_parameters: The keyword arguments to pass to the potential function.
+    :return: The lists of the states on the finest grid as grids, and of their energies.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    sizes = mg.level_sizes(N, settings["multigrid_levels"])
+    logger.debug("Solving on grids of sizes %s.", sizes)
+
+    # the points along each axis of the finest grid, the coarser grids span the same range.
+    x = pot.open_grid(r)[0].reshape(N)
+
+    states = None
+    x_prev = None
+    for level, N_l in enumerate(sizes):
+        finest = level == len(sizes) - 1
+        if finest:
+            r_l, dr_l, x_l = r, dr, x
+        else:
+            dr_l = dr * N / N_l
+            if settings["boundary"] == "periodic":
+                # the coarser periodic grids span the same cell, leaving out its stop point.
+                x_l = (x[0] + dr_l * np.arange(N_l)).astype(x.dtype)
+            else:
+                x_l = np.linspace(x[0], x[-1], N_l, dtype=x.dtype)
+            r_l = np.array(np.meshgrid(*([x_l] * D), indexing="ij"))
+        V_l = pot.potential(r_l, potential_name, settings["dtype"], potential_parameters)
+
+        initial_psi = None
+        if states is not None:
+            initial_psi = [mg.interpolate(psi, x_prev, x_l) for psi in states]
+
+        # the coarser grids can only hold so many states, the rest start from the quadratic guess.
+        num_states_l = min(num_states, N_l - 2)
+        level_settings = dict(settings, num_iterations=mg.level_iterations(settings["num_iterations"], level))
+        logger.debug("Solving level %d of %d points along each axis over %d iteration(s).", level, N_l,
+                     level_settings["num_iterations"])
+        states, energies = _solve_states(r_l, V_l, dr_l, D, N_l, num_states_l, level_settings,
+                                         publish if finest else None, initial_psi=initial_psi,
+                                         stats=stats if finest else None)
+        x_prev = x_l
+
+    return states, energies
+
+
+def _solve_separable(r: np.ndarray, dr, D: int, N, num_states: int, potential_name: str,
+                     settings: dict, publish=None, potential_parameters=None) -> (list, list):
+    """
+    Finds the lowest energy eigenstates of a separable system, by solving the one dimensional problem along each
+    axis and combining the one dimensional states as tensor products, with the sums of their energies.
+    :param r: The grid coordinates.
+    :param dr: The grid spacing in the system, or a sequence of the spacing along each axis.
+    :param D: The number of axes in the system.
+    :param N: The size of each axis, or a sequence of the size of each axis.
+    :param num_states: The number of states to find.
+    :param potential_name: The name of the separable potential of the system.
+    :param settings: The solver settings, from _solver_settings.
+    :param publish: A function of (i, psi, E) to call with each state as soon as it's found.
+    :param potential_parameters: The keyword arguments to pass to the potential function.
+    :return: The lists of the states as grids, and of their energies.
+    """
+
+    logger = logging.getLogger(__name__)
+    logger.debug("Solving the separable system as %d one dimensional system(s).", D)
+
+    shape = lap.axis_sizes(D, N)
+    spacings = lap.axis_spacings(D, dr)
+    volume = qo.volume_element(dr)
+
+    axis_states = []
+    axis_energies = []
+    for ax, x in enumerate(pot.open_grid(r)):
+        logger.debug("Solving the one dimensional system along axis %d.", ax)
+        N_x = shape[ax]
+        x = x.reshape(N_x)
+        V_x = pot.potential_from_grid([x], potential_name, settings["dtype"], potential_parameters)
+        states, energies = _solve_states(x.reshape(1, N_x), V_x, spacings[ax], 1, N_x, num_states, settings)
+        axis_states.append(states)
+        axis_energies.append(energies)
+
+    all_psi = []
+    all_E = []
+    for i, (E, indices) in enumerate(sep.lowest_combinations(axis_energies, num_states)):
+        psi = sep.tensor_product(axis_states, indices)
+        psi = qo.normalise(psi.reshape(psi.size), volume).reshape(shape)
+        psi = _correct_phase(psi, volume)
+        all_psi.append(psi)
+        all_E.append(E)
+        if publish is not None:
+            publish(i, psi, E)
+
+    return all_psi, all_E
+
+
+def _solve_sector(r: np.ndarray, V: np.ndarray, dr, D: int, N, num_states: int, settings: dict, axes: tuple,
+                  parities: tuple) -> (list, list):
+    """
+    Finds the lowest energy eigenstates of one symmetry sector of a reflection symmetric system, on the half grid
+    of the sector, where the Laplacian is folded so the states are even or odd along each symmetric axis.
+    :param r: The grid coordinates of the full grid.
+    :param V: The potential function of the system as a grid.
+    :param dr: The grid spacing in the system, or a sequence of the spacing along each axis.
+    :param D: The number of axes in the system.
+    :param N: The size of each axis of the full grid, or a sequence of the size of each axis.
+    :param num_states: The number of states to find in the sector.
+    :param settings: The solver settings, from _solver_settings.
+    :param axes: The axes the potential is symmetric along.
+    :param parities: The parity of the sector along each of the axes, 0 for even and 1 for odd.
+    :return: The lists of the states unfolded onto the full grid, and of their energies.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    # each sector seeds its own random numbers, so its states don't depend on which process solves it, or when.
+    random.seed("THE-VARIATIONAL-PRINCIPLE-" + "".join(str(parity) for parity in parities))
+
+    shape = lap.axis_sizes(D, N)
+    sector_shape = lap.sector_shape(shape, axes, parities)
+    window = sym.sector_window(shape, axes, parities)
+
+    # the half grid holds fewer states, the same bound as for the full grid.
+    num_states = min(num_states, min(sector_shape) - 2)
+    if num_states < 1:
+        return [], []
+    logger.debug("Solving %d state(s) of the sector of parities %s on a grid of %s.", num_states, parities,
+                 sector_shape)
+
+    # The Laplacian of the full grid, folded onto the sector. The potential is the same at each mirrored point, so
+    # it folds onto its values on the half grid.
+    grid_key = lap.laplacian_key(D, N, dr, settings["stencil_order"], settings["boundary"],
+                                 settings["matrix_free"], settings["dtype"])
+    key = lap.sector_key(grid_key, axes, parities)
+    # The columns of the projector are orthonormal, so the folded Laplacian's eigenstates are those of the plain sum
+    # over the half grid, without the trapezoidal rule halving its ends, the last of which is the mirror's centre.
+    volume = qo.volume_element(dr)
+    weights = np.full(int(np.prod(sector_shape)), volume)
+    states, energies = _solve_states(r[(slice(None),) + window], V[window], dr, D, _even(sector_shape), num_states,
+                                     settings, laplacian_key=key, weights=weights)
+
+    projector = lap.sector_projector(shape, axes, parities)
+    all_psi = []
+    for psi in states:
+        psi = sym.unfold(psi, shape, axes, parities, projector)
+        psi = qo.normalise(psi.reshape(psi.size), volume).reshape(shape)
+        all_psi.append(_correct_phase(psi, volume))
+    return all_psi, list(energies)
+
+
+def _solve_symmetric(r: np.ndarray, V: np.ndarray, dr, D: int, N, num_states: int, settings: dict, axes: tuple,
+                     publish=None) -> (list, list):
+    """
+    Finds the lowest energy eigenstates of a reflection symmetric system, by solving each symmetry sector, even or
+    odd along each symmetric axis, on half of the grid along those axes, then merging the states of every sector
+    in ascending order of energy. The sectors are independent, so they're solved over a pool of processes.
+    :param r: The grid coordinates.
+    :param V: The potential function of the system as a grid.
+    :param dr: The grid spacing in the system, or a sequence of the spacing along each axis.
+    :param D: The number of axes in the system.
+    :param N: The size of each axis, or a sequence of the size of each axis.
+    :param num_states: The number of states to find.
+    :param settings: The solver settings, from _solver_settings.
+    :param axes: The axes the potential is symmetric along.
+    :param publish: A function of (i, psi, E) to call with each state once every sector is solved.
+    :return: The lists of the states as grids, and of their energies.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    # any of the lowest states could be in any sector, so each sector solves for as many states.
+    jobs = [(r, V, dr, D, N, num_states, settings, axes, parities) for parities in sym.sectors(axes)]
+    num_workers = min(settings["num_workers"] or os.cpu_count() or 1, len(jobs))
+    logger.debug("Solving the %d symmetry sector(s) of the reflections along axes %s.", len(jobs), axes)
+
+    # the block solver runs its own pool, which the daemonic workers of a pool can't, neither can a daemonic
+    # process, such as a worker of a sweep, start one.
+    if num_workers > 1 and settings["solver"] != "block" and not multiprocessing.current_process().daemon:
+        logger.debug("Solving the sectors over %d worker(s).", num_workers)
+        with Pool(processes=num_workers) as pool:
+            results = pool.starmap(_solve_sector, jobs)
+    else:
+        results = [_solve_sector(*job) for job in jobs]
+
+    states = [(E, psi) for sector_psi, sector_E in results for psi, E in zip(sector_psi, sector_E)]
+    states.sort(key=lambda state: state[0])
+
+    all_psi = []
+    all_E = []
+    for i, (E, psi) in enumerate(states[:num_states]):
+        all_psi.append(psi)
+        all_E.append(E)
+        if publish is not None:
+            publish(i, psi, E)
+
+    return all_psi, all_E
+
+
+def _write_metrics(computed_data: ci.ComputationData, metrics):
+    """
+    Stops recording the instrumentation of the run, and writes it to the configured metrics file.
+    :param computed_data: The ComputationData object of the run.
+    :param metrics: The Metrics of the run, or None if they weren't recorded.
+    """
+    if metrics is None:
+        return
+    mt.disable()
+    metrics.write(computed_data.metrics_file)
+    logger = logging.getLogger(__name__)
+    logger.debug("Wrote the metrics of the run to '%s'.", computed_data.metrics_file)
+
+
+def _add_convergence_stats(computed_data: ci.ComputationData, stats: list):
+    """
+    Logs the ConvergenceStats of each state, and adds them to the ComputationData.
+    :param computed_data: The ComputationData of the run.
+    :param stats: The list of the ConvergenceStats of each state, empty unless converging to a tolerance.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    for i, convergence in enumerate(stats):
+        logger.info("State %d stopped after %d iteration(s), %s, with an acceptance rate of %.3f.", i,
+                    convergence.iterations, "converged" if convergence.converged else "at the iteration cap",
+                    convergence.acceptance_rate)
+        computed_data.add_convergence_stats(convergence)
+
+
+def compute(computed_data: ci.ComputationData, write_pipe=None, listener=None, resume=False) -> (
+        np.ndarray, np.ndarray, np.ndarray, np.ndarray):
+    """
+    The method to set up the variables and system, and aggregate the computed wavefunctions.
+    :param computed_data: a ComputedData object containing info required to set up calculation.
+    :param write_pipe: A Connection object for a pipe to write computed data to if implementing multiprocessing.
+    :param listener: A function to pass the GridEvent, PotentialEvent, StateEvent and ProgressEvent objects to
+    as they are computed, see streaming.stream for a generator over them.
+    :param resume: Whether to continue the variational method from the checkpoint of an interrupted run.
+    :return: r, V, all_psi: the grid, potential function and the list of all the wavefunctions.
+    """
+
+    start = computed_data.start
+    stop = computed_data.stop
+    D = computed_data.num_dimensions
+    starts, stops, sizes = grid_axes(computed_data)
+    # an even grid keeps a single size and spacing, an uneven one has a tuple of one per axis.
+    N = _even(sizes)
+    num_states = computed_data.num_states
+    settings = _solver_settings(computed_data)
+
+    logger = logging.getLogger(__name__)
+    logger.debug("Beginning computation of %d energy eigenstate(s).", num_states)
+
+    # Set a seed for repeatable results.
+    random.seed("THE-VARIATIONAL-PRINCIPLE")
+
+    # Record the instrumentation of this run only if it's asked for, it's disabled otherwise.
+    if computed_data.metrics:
+        metrics = mt.enable()
+    else:
+        metrics = None
+        mt.disable()
+
+    # Keep the number of states in bounds, so that the orthonormal basis generator doesn't return an error.
+    if num_states >= min(sizes):
+        logger.debug("Total number of states to calculate constrained from %d to %d, due to computational limitation.",
+                     num_states, min(sizes) - 2)
+        num_states = min(sizes) - 2
+
+    listeners = []
+    if write_pipe is not None:
+        # the pipe is written to with the legacy tuples.
+        listeners.append(ev.PipeAdapter(write_pipe, computed_data.r_key, computed_data.v_key))
+    if listener is not None:
+        listeners.append(listener)
+
+    def emit(event):
+        for notify in listeners:
+            notify(event)
+
+    logger.debug("Generating spatial grid")
+    r = calculate_r(computed_data)
+    computed_data.r = r
+
+    logger.debug("Generating potential.")
+    # generate the potential for the system
+    potential_name = computed_data.potential_name
+    potential_parameters = dict(computed_data.potential_parameters)
+    with mt.phase("potential"):
+        V = pot.potential(r, potential_name, settings["dtype"], potential_parameters)
+    computed_data.V = V
+    emit(ev.GridEvent(r))
+    emit(ev.PotentialEvent(V))
+
+    # Calculate the grid spacing along each axis.
+    dr = _even(tuple((b - a) / n for a, b, n in zip(starts, stops, sizes)))
+    logger.debug("The grid spacing of the system is: dr=%s", dr)
+
+    # The axes to fold the grid along, which the potential declares and is symmetric along on this grid.
+    symmetric_axes = ()
+    if computed_data.use_symmetry:
+        symmetric_axes = sym.symmetric_axes(V, pot.reflection_axes(potential_name, D))
+        if not symmetric_axes:
+            logger.warning("The potential '%s' isn't reflection symmetric on this grid, solving the full grid.",
+                           potential_name)
+
+    def publish(i, psi, E):
+        _publish_state(computed_data, i, psi, E, num_states, emit)
+
+    # The ConvergenceStats of each state, when converging to a tolerance.
+    stats = []
+
+    result_cache = None
+    if computed_data.result_cache_size > 0:
+        # The states only depend on the potential and these settings, not on how they're plotted.
+        result_cache = rc.ResultCache(computed_data.result_cache_dir, computed_data.result_cache_size)
+        key = rc.result_key(pot.potential_source(potential_name),
+                            {"start": start, "stop": stop, "N": N, "D": D, "num_states": num_states,
+                             "use_separable": computed_data.use_separable, "symmetric_axes": symmetric_axes,
+                             "settings": settings,
+                             "potential_parameters": potential_parameters})
+        stored = result_cache.load(key)
+        if stored is not None:
+            logger.debug("Using the stored result of the same computation.")
+            all_psi, all_E, all_stats = stored
+            for i in range(len(all_E)):
+                publish(i, all_psi[i], float(all_E[i]))
+            # the convergence stats of the run that stored the result, as the states weren't walked this time.
+            stats = [ConvergenceStats(int(row[0]), bool(row[1]), float(row[2]), float(row[3]), float(row[4]))
+                     for row in all_stats]
+            _add_convergence_stats(computed_data, stats)
+            computed_data.r = r
+            computed_data.V = V
+            _write_metrics(computed_data, metrics)
+            return computed_data
+
+    if settings["multigrid_levels"] > 1 and np.ndim(N) != 0:
+        logger.warning("The multigrid warm start needs the same number of points along every axis, "
+                       "solving on the single grid.")
+
+    if D > 1 and computed_data.use_separable and pot.is_separable(potential_name):
+        all_psi, all_E = _solve_separable(r, dr, D, N, num_states, potential_name, settings, publish,
+                                          potential_parameters)
+    elif symmetric_axes:
+        if computed_data.checkpoint_interval > 0 or resume:
+            logger.warning("The symmetry sectors aren't checkpointed, solving them from the start.")
+        all_psi, all_E = _solve_symmetric(r, V, dr, D, N, num_states, settings, symmetric_axes, publish)
+    elif settings["solver"] == "variational" and settings["multigrid_levels"] > 1 and np.ndim(N) == 0:
+        all_psi, all_E = _solve_multigrid(r, dr, D, N, num_states, potential_name, settings, publish, stats,
+                                          potential_parameters)
+    elif settings["solver"] == "variational" and (computed_data.checkpoint_interval > 0 or resume):
+        # Only the sequential variational method runs for long enough to need checkpoints.
+        run_fingerprint = cp.fingerprint({"start": start, "stop": stop, "N": N, "D": D, "num_states": num_states,
+                                          "potential_name": potential_name, "settings": settings,
+                                          "potential_parameters": potential_parameters})
+        interval = computed_data.checkpoint_interval or settings["num_iterations"]
+        checkpoint = cp.Checkpointer(computed_data.checkpoint_file, interval, run_fingerprint)
+        saved = checkpoint.load() if resume else None
+        try:
+            all_psi, all_E = _solve_states(r, V, dr, D, N, num_states, settings, publish, checkpoint, saved,
+                                           stats=stats)
+        except BaseException:
+            # keep the checkpoint of the interrupted run to resume from.
+            checkpoint.close()
+            raise
+        checkpoint.close(remove=True)
+    else:
+        all_psi, all_E = _solve_states(r, V, dr, D, N, num_states, settings, publish, stats=stats)
+
+    _add_convergence_stats(computed_data, stats)
+
+    if result_cache is not None:
+        result_cache.store(key, all_psi, all_E, stats)
+
     logger.debug("DONE simulation of %d energy eigenstate(s)", num_states)
     computed_data.r = r
     computed_data.V = V
-    # computation_data.all_psi = all_psi
-    # computation_data.all_energy = all_E
+    _write_metrics(computed_data, metrics)
 
     return computed_data